@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 from pydantic import BaseModel
 
@@ -11,5 +11,29 @@ class CreateItemRequest(BaseModel):
 class CreateItemResponse(CreateItemRequest):
     id: UUID
 
+class PartialItemResponse(BaseModel):
+    """Item with only the fields a client asked for; the rest stay unset."""
+    id: UUID
+    name: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[float] = None
+    quantity: Optional[int] = None
+
 class AllItemsResponse(BaseModel):
-    items: List[CreateItemResponse]
\ No newline at end of file
+    items: List[CreateItemResponse]
+    next_cursor: Optional[str] = None
+
+class PartialItemsResponse(BaseModel):
+    items: List[PartialItemResponse]
+    next_cursor: Optional[str] = None
+
+class BulkItemResult(BaseModel):
+    index: int
+    status: Literal["created", "conflict"]
+    id: Optional[UUID] = None
+    detail: Optional[str] = None
+
+class BulkCreateItemsResponse(BaseModel):
+    created: int
+    conflicts: int
+    results: List[BulkItemResult]
@@ -1,6 +1,6 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class CreateUserRequest(BaseModel):
     first_name: str
@@ -16,9 +16,34 @@ class CreateUserResponse(BaseModel):
     email: str
     shipping_address: Optional[str] = None
 
+class BulkUserResult(BaseModel):
+    index: int
+    status: Literal["created", "conflict"]
+    id: Optional[UUID] = None
+    detail: Optional[str] = None
+
+class BulkCreateUsersResponse(BaseModel):
+    created: int
+    conflicts: int
+    results: List[BulkUserResult]
+
 class AddToCartRequest(BaseModel):
     item_id: UUID
-    quantity: int
+    quantity: int = Field(gt=0)
+
+class UpdateCartItemRequest(BaseModel):
+    quantity: int = Field(gt=0)
 
 class AddToCartResponse(BaseModel):
-    items: List[AddToCartRequest]
\ No newline at end of file
+    items: List[AddToCartRequest]
+
+class CartLineResponse(BaseModel):
+    item_id: UUID
+    quantity: int
+    name: str
+    unit_price: float
+    line_total: float
+
+class CartResponse(BaseModel):
+    items: List[CartLineResponse]
+    total: float
@@ -1,22 +1,30 @@
+import base64
+import dataclasses
+import json
+from numbers import Real
+from typing import AsyncIterator, List, Optional, Sequence, Tuple, Union
 from fastapi import HTTPException
 from uuid import UUID
 
 from be_task_ca.domain.item.entities import Item
-from be_task_ca.domain.item.repositories import ItemRepository
+from be_task_ca.domain.item.exceptions import DuplicateItemNameError
+from be_task_ca.domain.item.queries import ItemPosition, ItemQuery
+from be_task_ca.domain.item.repositories import AsyncItemRepository
+from be_task_ca.domain.item.search import tokenize
 
 from ..dto.item_dto import (
     AllItemsResponse,
+    BulkCreateItemsResponse,
+    BulkItemResult,
     CreateItemRequest,
-    CreateItemResponse
+    CreateItemResponse,
+    PartialItemResponse,
+    PartialItemsResponse,
 )
 
-def create_item(item: CreateItemRequest, item_repository: ItemRepository) -> CreateItemResponse:
-    search_result = item_repository.find_item_by_name(item.name)
-    if search_result is not None:
-        raise HTTPException(
-            status_code=409, detail="An item with this name already exists"
-        )
+DUPLICATE_ITEM_NAME = "An item with this name already exists"
 
+async def create_item(item: CreateItemRequest, item_repository: AsyncItemRepository) -> CreateItemResponse:
     new_item = Item(
         name=item.name,
         description=item.description,
@@ -24,12 +32,267 @@ def create_item(item: CreateItemRequest, item_repository: ItemRepository) -> Cre
         quantity=item.quantity,
     )
 
-    item_repository.save_item(new_item)
+    # Uniqueness is left to the repository, which detects it in the same
+    # statement that writes the item
+    try:
+        await item_repository.save_item(new_item)
+    except DuplicateItemNameError:
+        raise HTTPException(status_code=409, detail=DUPLICATE_ITEM_NAME)
     return model_to_schema(new_item)
 
-def get_all(item_repository: ItemRepository) -> AllItemsResponse:
-    item_list = item_repository.get_all_items()
-    return AllItemsResponse(items=list(map(model_to_schema, item_list)))
+async def get_item(item_id: UUID, item_repository: AsyncItemRepository) -> CreateItemResponse:
+    item = await item_repository.find_item_by_id(item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item does not exist")
+    return model_to_schema(item)
+
+async def create_items_bulk(
+    items: List[CreateItemRequest], item_repository: AsyncItemRepository
+) -> BulkCreateItemsResponse:
+    results: List[Optional[BulkItemResult]] = [None] * len(items)
+    existing_names = await item_repository.find_existing_item_names(
+        {item.name for item in items}
+    )
+
+    # Names repeated within the batch conflict with their first occurrence
+    claimed_names = set(existing_names)
+    candidates: List[Tuple[int, Item]] = []
+    for index, item in enumerate(items):
+        if item.name in claimed_names:
+            results[index] = _bulk_conflict(index)
+            continue
+
+        claimed_names.add(item.name)
+        candidates.append((index, Item(
+            name=item.name,
+            description=item.description,
+            price=item.price,
+            quantity=item.quantity,
+        )))
+
+    inserted = await item_repository.insert_items([item for _, item in candidates])
+    inserted_ids = {item.id for item in inserted}
+
+    for index, new_item in candidates:
+        if new_item.id in inserted_ids:
+            results[index] = BulkItemResult(index=index, status="created", id=new_item.id)
+        else:
+            # Lost a race against a concurrent insert of the same name
+            results[index] = _bulk_conflict(index)
+
+    return BulkCreateItemsResponse(
+        created=len(inserted_ids),
+        conflicts=len(items) - len(inserted_ids),
+        results=results,
+    )
+
+def _bulk_conflict(index: int) -> BulkItemResult:
+    return BulkItemResult(index=index, status="conflict", detail=DUPLICATE_ITEM_NAME)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+ITEM_FIELDS = tuple(field.name for field in dataclasses.fields(Item))
+
+ItemsResponse = Union[AllItemsResponse, PartialItemsResponse]
+
+async def get_all(
+    item_repository: AsyncItemRepository,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+    query: Optional[ItemQuery] = None,
+) -> ItemsResponse:
+    fields = validate_fields(fields)
+    query = validate_query(query)
+    if limit is None and cursor is None and query is None:
+        item_list = await item_repository.get_all_items(fields)
+        return items_to_schema(item_list, fields)
+
+    return await get_page(
+        item_repository, limit or DEFAULT_PAGE_SIZE, cursor, fields, query
+    )
+
+async def get_page(
+    item_repository: AsyncItemRepository,
+    limit: int,
+    cursor: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+    query: Optional[ItemQuery] = None,
+) -> ItemsResponse:
+    fields = validate_fields(fields)
+    query = validate_query(query)
+    if query is None:
+        after = decode_cursor(cursor) if cursor else None
+
+        # Fetch one extra row to learn whether another page exists
+        item_list = await item_repository.get_items_page(limit + 1, after, fields)
+        page = item_list[:limit]
+
+        next_cursor = None
+        if len(item_list) > limit:
+            next_cursor = encode_cursor(page[-1].id)
+
+        return items_to_schema(page, fields, next_cursor)
+
+    position = decode_position(cursor, query) if cursor else None
+    item_list = await item_repository.query_items(
+        query, limit + 1, position, _fields_for_query(fields, query)
+    )
+    page = item_list[:limit]
+
+    next_cursor = None
+    if len(item_list) > limit:
+        next_cursor = encode_position(query.position(page[-1]), query)
+
+    return items_to_schema(page, fields, next_cursor)
+
+async def search(
+    item_repository: AsyncItemRepository,
+    query: str,
+    limit: int,
+    fields: Optional[Sequence[str]] = None,
+) -> ItemsResponse:
+    fields = validate_fields(fields)
+    item_list = await item_repository.search_items(tokenize(query), limit, fields)
+    return items_to_schema(item_list, fields)
+
+def stream_all(
+    item_repository: AsyncItemRepository,
+    fields: Optional[Sequence[str]] = None,
+    query: Optional[ItemQuery] = None,
+) -> AsyncIterator[str]:
+    # Validated before returning, so bad parameters fail the request instead
+    # of breaking a response that has already started
+    fields = validate_fields(fields)
+    query = validate_query(query)
+    if query is None:
+        items = item_repository.iter_all_items(fields=fields)
+    else:
+        items = _iter_query(item_repository, query, fields)
+    return _to_ndjson(items, fields)
+
+async def _to_ndjson(
+    items: AsyncIterator[Item], fields: Optional[Sequence[str]]
+) -> AsyncIterator[str]:
+    async for item in items:
+        if fields is None:
+            yield model_to_schema(item).json() + "\n"
+        else:
+            yield model_to_partial_schema(item, fields).json(exclude_unset=True) + "\n"
+
+async def _iter_query(
+    item_repository: AsyncItemRepository,
+    query: ItemQuery,
+    fields: Optional[Sequence[str]],
+    batch_size: int = MAX_PAGE_SIZE,
+) -> AsyncIterator[Item]:
+    after = None
+    while True:
+        page = await item_repository.query_items(
+            query, batch_size, after, _fields_for_query(fields, query)
+        )
+        for item in page:
+            yield item
+        if len(page) < batch_size:
+            return
+        after = query.position(page[-1])
+
+def _fields_for_query(
+    fields: Optional[Sequence[str]], query: ItemQuery
+) -> Optional[List[str]]:
+    # The price is part of the keyset position when sorting by it
+    if fields is None or not query.sorts_by_price or "price" in fields:
+        return fields
+    return [*fields, "price"]
+
+def validate_query(query: Optional[ItemQuery]) -> Optional[ItemQuery]:
+    if query is None or query == ItemQuery():
+        return None
+
+    if (
+        query.min_price is not None
+        and query.max_price is not None
+        and query.min_price > query.max_price
+    ):
+        raise HTTPException(
+            status_code=400, detail="min_price must not be greater than max_price"
+        )
+    return query
+
+def validate_fields(fields: Optional[Sequence[str]]) -> Optional[List[str]]:
+    if fields is None:
+        return None
+
+    unknown = [name for name in fields if name not in ITEM_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown item fields: {', '.join(unknown)}"
+        )
+
+    # Asking for every field is the same as not projecting at all
+    selected = [name for name in ITEM_FIELDS if name in fields and name != "id"]
+    if len(selected) == len(ITEM_FIELDS) - 1:
+        return None
+    return selected
+
+def encode_cursor(last_id: UUID) -> str:
+    return _encode_cursor_values([str(last_id)])
+
+def decode_cursor(cursor: str) -> UUID:
+    try:
+        (last_id,) = _decode_cursor_values(cursor)
+        return UUID(last_id)
+    except (AttributeError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def encode_position(position: ItemPosition, query: ItemQuery) -> str:
+    sort_value, last_id = position
+    if not query.sorts_by_price:
+        return encode_cursor(last_id)
+    return _encode_cursor_values([sort_value, str(last_id)])
+
+def decode_position(cursor: str, query: ItemQuery) -> ItemPosition:
+    if not query.sorts_by_price:
+        last_id = decode_cursor(cursor)
+        return (last_id, last_id)
+
+    try:
+        price, last_id = _decode_cursor_values(cursor)
+        if isinstance(price, bool) or not isinstance(price, Real):
+            raise ValueError("price must be a number")
+        return (price, UUID(last_id))
+    except (AttributeError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _encode_cursor_values(values: list) -> str:
+    payload = json.dumps(values).encode("UTF-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+def _decode_cursor_values(cursor: str) -> list:
+    # Malformed input raises ValueError, which binascii.Error derives from
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+def items_to_schema(
+    item_list: List[Item],
+    fields: Optional[Sequence[str]],
+    next_cursor: Optional[str] = None,
+) -> ItemsResponse:
+    if fields is None:
+        return AllItemsResponse(
+            items=list(map(model_to_schema, item_list)), next_cursor=next_cursor
+        )
+
+    return PartialItemsResponse(
+        items=[model_to_partial_schema(item, fields) for item in item_list],
+        next_cursor=next_cursor,
+    )
+
+def model_to_partial_schema(item: Item, fields: Sequence[str]) -> PartialItemResponse:
+    return PartialItemResponse(
+        id=item.id, **{name: getattr(item, name) for name in fields}
+    )
 
 def model_to_schema(item: Item) -> CreateItemResponse:
     return CreateItemResponse(
@@ -1,36 +1,50 @@
-import hashlib
+import asyncio
+from decimal import Decimal
+from typing import List, Optional, Tuple
 from fastapi import HTTPException
 from uuid import UUID
 
 from be_task_ca.domain.user.entities import User, CartItem
-from be_task_ca.domain.user.repositories import UserRepository
-from be_task_ca.domain.item.repositories import ItemRepository
+from be_task_ca.domain.user.exceptions import DuplicateEmailError
+from be_task_ca.domain.user.passwords import PasswordHasher
+from be_task_ca.domain.user.repositories import AsyncUserRepository
+from be_task_ca.domain.item.repositories import AsyncItemRepository
 
 from ..dto.user_dto import (
     AddToCartRequest,
     AddToCartResponse,
+    BulkCreateUsersResponse,
+    BulkUserResult,
+    CartLineResponse,
+    CartResponse,
     CreateUserRequest,
     CreateUserResponse,
+    UpdateCartItemRequest,
 )
 
-def create_user(create_user: CreateUserRequest, user_repository: UserRepository) -> CreateUserResponse:
-    search_result = user_repository.find_user_by_email(create_user.email)
-    if search_result is not None:
-        raise HTTPException(
-            status_code=409, detail="An user with this email adress already exists"
-        )
+DUPLICATE_EMAIL = "An user with this email adress already exists"
+CART_ITEM_NOT_FOUND = "Item is not in the cart"
+CART_ITEM_CONFLICT = "The cart line keeps changing, try again"
+# Reads of a cart line retried after losing a compare-and-set to another update
+CART_UPDATE_ATTEMPTS = 5
 
+async def create_user(
+    create_user: CreateUserRequest,
+    user_repository: AsyncUserRepository,
+    password_hasher: PasswordHasher,
+) -> CreateUserResponse:
     new_user = User(
         first_name=create_user.first_name,
         last_name=create_user.last_name,
         email=create_user.email,
-        hashed_password=hashlib.sha512(
-            create_user.password.encode("UTF-8")
-        ).hexdigest(),
+        hashed_password=await password_hasher.hash(create_user.password),
         shipping_address=create_user.shipping_address,
     )
 
-    user_repository.save_user(new_user)
+    try:
+        await user_repository.save_user(new_user)
+    except DuplicateEmailError:
+        raise HTTPException(status_code=409, detail=DUPLICATE_EMAIL)
 
     return CreateUserResponse(
         id=new_user.id,
@@ -40,40 +54,177 @@ def create_user(create_user: CreateUserRequest, user_repository: UserRepository)
         shipping_address=new_user.shipping_address,
     )
 
-def add_item_to_cart(
+async def create_users_bulk(
+    users: List[CreateUserRequest],
+    user_repository: AsyncUserRepository,
+    password_hasher: PasswordHasher,
+) -> BulkCreateUsersResponse:
+    results: List[Optional[BulkUserResult]] = [None] * len(users)
+
+    # Emails repeated within the batch conflict with their first occurrence
+    # and are rejected before paying for a hash
+    claimed_emails = set()
+    candidates: List[Tuple[int, CreateUserRequest]] = []
+    for index, user in enumerate(users):
+        if user.email in claimed_emails:
+            results[index] = _bulk_conflict(index)
+            continue
+
+        claimed_emails.add(user.email)
+        candidates.append((index, user))
+
+    # Hashed before the first repository call, so no connection sits idle in
+    # a transaction while the KDF runs; emails that are already registered
+    # are caught by the insert. The hasher's pool bounds how many run at once
+    hashed_passwords = await asyncio.gather(
+        *(password_hasher.hash(user.password) for _, user in candidates)
+    )
+    new_users = [
+        User(
+            first_name=user.first_name,
+            last_name=user.last_name,
+            email=user.email,
+            hashed_password=hashed_password,
+            shipping_address=user.shipping_address,
+        )
+        for (_, user), hashed_password in zip(candidates, hashed_passwords)
+    ]
+
+    inserted = await user_repository.insert_users(new_users)
+    inserted_ids = {user.id for user in inserted}
+
+    for (index, _), new_user in zip(candidates, new_users):
+        if new_user.id in inserted_ids:
+            results[index] = BulkUserResult(
+                index=index, status="created", id=new_user.id
+            )
+        else:
+            # Lost a race against a concurrent signup with the same email
+            results[index] = _bulk_conflict(index)
+
+    return BulkCreateUsersResponse(
+        created=len(inserted_ids),
+        conflicts=len(users) - len(inserted_ids),
+        results=results,
+    )
+
+def _bulk_conflict(index: int) -> BulkUserResult:
+    return BulkUserResult(index=index, status="conflict", detail=DUPLICATE_EMAIL)
+
+async def add_item_to_cart(
     user_id: UUID,
     cart_item: AddToCartRequest,
-    user_repository: UserRepository,
-    item_repository: ItemRepository
+    user_repository: AsyncUserRepository,
+    item_repository: AsyncItemRepository
 ) -> AddToCartResponse:
-    user = user_repository.find_user_by_id(user_id)
-    if user is None:
+    # Duplicates are caught by the insert, so existence is all that is needed
+    if not await user_repository.user_exists(user_id):
         raise HTTPException(status_code=404, detail="User does not exist")
 
-    item = item_repository.find_item_by_id(cart_item.item_id)
-    if item is None:
+    # Served by the item cache when it is on; its stock may be stale, so it
+    # only turns away items that do not exist
+    if await item_repository.find_item_by_id(cart_item.item_id) is None:
         raise HTTPException(status_code=404, detail="Item does not exist")
-    if item.quantity < cart_item.quantity:
-        raise HTTPException(status_code=409, detail="Not enough items in stock")
 
-    item_ids = [o.item_id for o in user.cart_items]
-    if cart_item.item_id in item_ids:
-        raise HTTPException(status_code=409, detail="Item already in cart")
+    # The stock check and the reservation are one statement, so concurrent
+    # adds can never take more units than there are
+    if not await item_repository.reserve_stock(cart_item.item_id, cart_item.quantity):
+        raise HTTPException(status_code=409, detail="Not enough items in stock")
 
     new_cart_item = CartItem(
-        user_id=user.id,
+        user_id=user_id,
         item_id=cart_item.item_id,
         quantity=cart_item.quantity
     )
 
-    user.cart_items.append(new_cart_item)
-    user_repository.save_user(user)
+    # Only the new line is written; a line for the item already in the cart
+    # makes the insert a no-op
+    if not await user_repository.add_cart_item(new_cart_item):
+        await item_repository.release_stock(cart_item.item_id, cart_item.quantity)
+        raise HTTPException(status_code=409, detail="Item already in cart")
 
-    return list_items_in_cart(user.id, user_repository)
+    return await list_items_in_cart(user_id, user_repository)
 
-def list_items_in_cart(user_id: UUID, user_repository: UserRepository):
-    cart_items = user_repository.find_cart_items_for_user_id(user_id)
+async def update_cart_item_quantity(
+    user_id: UUID,
+    item_id: UUID,
+    update: UpdateCartItemRequest,
+    user_repository: AsyncUserRepository,
+    item_repository: AsyncItemRepository
+) -> AddToCartResponse:
+    for _ in range(CART_UPDATE_ATTEMPTS):
+        cart_items = await user_repository.find_cart_items_for_user_id(user_id)
+        line = next((line for line in cart_items if line.item_id == item_id), None)
+        if line is None:
+            raise HTTPException(status_code=404, detail=CART_ITEM_NOT_FOUND)
+
+        # The line only changes if it still holds what was read, so the stock
+        # moved below always matches the change made to the line. Losing to
+        # a concurrent update changes nothing, and the line is read again
+        held = line.quantity
+        if await user_repository.update_cart_item_quantity(
+            user_id, item_id, update.quantity, expected=held
+        ):
+            break
+    else:
+        raise HTTPException(status_code=409, detail=CART_ITEM_CONFLICT)
+
+    # Only the difference to what the line held is reserved or released; a
+    # failed reservation rolls the line back with the rest of the request
+    change = update.quantity - held
+    if change > 0 and not await item_repository.reserve_stock(item_id, change):
+        await _raise_stock_error(item_id, item_repository)
+    if change < 0:
+        await item_repository.release_stock(item_id, -change)
+
+    return await list_items_in_cart(user_id, user_repository)
+
+async def remove_item_from_cart(
+    user_id: UUID,
+    item_id: UUID,
+    user_repository: AsyncUserRepository,
+    item_repository: AsyncItemRepository
+) -> AddToCartResponse:
+    removed = await user_repository.remove_cart_item(user_id, item_id)
+    if removed is None:
+        raise HTTPException(status_code=404, detail=CART_ITEM_NOT_FOUND)
+
+    await item_repository.release_stock(item_id, removed.quantity)
+    return await list_items_in_cart(user_id, user_repository)
+
+async def _raise_stock_error(item_id: UUID, item_repository: AsyncItemRepository):
+    # Only a failed reservation reads the item, to tell a missing item from
+    # one without enough stock
+    if await item_repository.find_item_by_id(item_id) is None:
+        raise HTTPException(status_code=404, detail="Item does not exist")
+    raise HTTPException(status_code=409, detail="Not enough items in stock")
+
+async def list_items_in_cart(user_id: UUID, user_repository: AsyncUserRepository):
+    cart_items = await user_repository.find_cart_items_for_user_id(user_id)
     return AddToCartResponse(items=list(map(cart_item_model_to_schema, cart_items)))
 
+async def view_cart(
+    user_id: UUID, user_repository: AsyncUserRepository
+) -> CartResponse:
+    # One query returns every line with the item's name and price, so the
+    # client needs no catalog lookup per line
+    lines = await user_repository.find_cart_lines_for_user_id(user_id)
+
+    # Summed as decimals so the totals carry no binary rounding noise
+    line_totals = [Decimal(str(line.price)) * line.quantity for line in lines]
+    return CartResponse(
+        items=[
+            CartLineResponse(
+                item_id=line.item_id,
+                quantity=line.quantity,
+                name=line.name,
+                unit_price=line.price,
+                line_total=float(line_total),
+            )
+            for line, line_total in zip(lines, line_totals)
+        ],
+        total=float(sum(line_totals, Decimal(0))),
+    )
+
 def cart_item_model_to_schema(model: CartItem):
     return AddToCartRequest(item_id=model.item_id, quantity=model.quantity)
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Measure how a burst of signups affects the latency of other requests.
+
+The app runs in-process on in-memory repositories. While `--signups`
+concurrent POST /users/ requests are hashing passwords, GET / is probed in
+a loop and its latency recorded, once with the hash computed inline on the
+event loop and once on the password hasher's worker pool.
+
+    poetry run bench-signup --signups 50 --cost 16384
+"""
+import argparse
+import asyncio
+import math
+import statistics
+import time
+import uuid
+from typing import List
+
+import httpx
+
+from be_task_ca.config import get_password_hash_workers, use_in_memory_repositories
+from be_task_ca.domain.user.passwords import PasswordHasher
+from be_task_ca.infrastructure.factory import get_password_hasher
+from be_task_ca.infrastructure.security.passwords import (
+    PasswordKdf,
+    PooledPasswordHasher,
+    ScryptKdf,
+    verify_password,
+)
+from be_task_ca.main import app
+
+
+class InlinePasswordHasher(PasswordHasher):
+    """Hashes on the event loop, the way signups used to run."""
+
+    def __init__(self, kdf: PasswordKdf):
+        self.kdf = kdf
+
+    async def hash(self, password: str) -> str:
+        return self.kdf.hash(password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return verify_password(password, hashed_password)
+
+
+async def measure(hasher: PasswordHasher, signups: int) -> List[float]:
+    app.dependency_overrides[get_password_hasher] = lambda: hasher
+    latencies: List[float] = []
+    signups_done = asyncio.Event()
+
+    async with httpx.AsyncClient(app=app, base_url="http://benchmark") as client:
+        async def probe():
+            while not signups_done.is_set():
+                started = time.perf_counter()
+                await client.get("/")
+                latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.005)
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post("/users/", json={
+                "first_name": "Bench",
+                "last_name": "Mark",
+                "email": f"{uuid.uuid4()}@example.com",
+                "password": "correct horse battery staple",
+            })
+            for _ in range(signups)
+        ))
+        elapsed = time.perf_counter() - started
+        signups_done.set()
+        await prober
+
+    app.dependency_overrides.pop(get_password_hasher)
+    assert all(response.status_code == 200 for response in responses)
+    print(f"  {signups} signups took {elapsed:.2f}s")
+    return latencies
+
+
+def report(name: str, latencies: List[float]) -> None:
+    milliseconds = sorted(latency * 1000 for latency in latencies)
+    p95 = milliseconds[math.ceil(len(milliseconds) * 0.95) - 1]
+    print(
+        f"  GET / while signing up ({name}): {len(milliseconds)} probes, "
+        f"p50 {statistics.median(milliseconds):.1f} ms, p95 {p95:.1f} ms, "
+        f"max {milliseconds[-1]:.1f} ms"
+    )
+
+
+async def run(signups: int, cost: int, workers: int) -> None:
+    kdf = ScryptKdf(n=cost)
+    print(f"scrypt N={cost}, {workers} hashing threads")
+
+    print("inline hashing:")
+    report("inline", await measure(InlinePasswordHasher(kdf), signups))
+
+    pooled = PooledPasswordHasher(kdf, workers)
+    try:
+        print("pooled hashing:")
+        report("pooled", await measure(pooled, signups))
+    finally:
+        pooled.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--signups", type=int, default=50)
+    parser.add_argument("--cost", type=int, default=2**14, help="scrypt N")
+    parser.add_argument("--workers", type=int, default=get_password_hash_workers())
+    args = parser.parse_args()
+
+    use_in_memory_repositories()
+    asyncio.run(run(args.signups, args.cost, args.workers))
+
+
+if __name__ == "__main__":
+    main()
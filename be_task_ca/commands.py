@@ -1,7 +1,39 @@
+from sqlalchemy import Connection, Engine, inspect, literal, update
+
 from be_task_ca.infrastructure.database.config import engine, Base
 
 from be_task_ca.infrastructure.database.models.user_model import UserModel, CartItemModel
-from be_task_ca.infrastructure.database.models.item_model import ItemModel
+from be_task_ca.infrastructure.database.models.item_model import (
+    ItemModel,
+    item_version_sequence,
+)
+
+def create_db_schema(bind: Engine = engine):
+    Base.metadata.create_all(bind=bind)
+
+    with bind.begin() as connection:
+        add_item_versions(connection)
+
+    # create_all skips tables that already exist, so indexes added to them
+    # later (like the search index) are created here
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+def add_item_versions(connection: Connection) -> None:
+    """Add the version column to an items table created before it existed."""
+    columns = inspect(connection).get_columns(ItemModel.__tablename__)
+    if any(column["name"] == "version" for column in columns):
+        return
 
-def create_db_schema():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    version = ItemModel.__table__.c.version
+    column_type = version.type.compile(dialect=connection.dialect)
+    connection.exec_driver_sql(
+        f"ALTER TABLE {ItemModel.__tablename__} ADD COLUMN version {column_type}"
+    )
+    # Every existing item gets a version, so the catalog version sums them all
+    if connection.dialect.name == "postgresql":
+        backfill = item_version_sequence.next_value()
+    else:
+        backfill = literal(1)
+    connection.execute(update(ItemModel).values(version=backfill))
@@ -1,5 +1,5 @@
 from fastapi import Request
 
 
-def get_db(request: Request):
-    return request.state.db
+async def get_db(request: Request):
+    return await request.state.container.session()
@@ -0,0 +1,6 @@
+class DuplicateItemNameError(Exception):
+    """Raised by repositories when an item's name is already taken."""
+
+    def __init__(self, name: str):
+        super().__init__(f"An item named {name!r} already exists")
+        self.name = name
@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Optional, Tuple
+from uuid import UUID
+
+from .entities import Item
+
+# Keyset position of an item in a listing: its sort key and its id
+ItemPosition = Tuple[Any, UUID]
+
+
+class ItemSort(str, Enum):
+    ID = "id"
+    PRICE = "price"
+    PRICE_DESC = "-price"
+
+
+@dataclass(frozen=True)
+class ItemQuery:
+    """Filters and ordering of a catalog listing. Price bounds are inclusive."""
+
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    in_stock: bool = False
+    sort: ItemSort = ItemSort.ID
+
+    @property
+    def has_price_range(self) -> bool:
+        return self.min_price is not None or self.max_price is not None
+
+    @property
+    def sorts_by_price(self) -> bool:
+        return self.sort is not ItemSort.ID
+
+    def matches(self, item: Item) -> bool:
+        if self.in_stock and not item.quantity:
+            return False
+        if self.min_price is not None and item.price < self.min_price:
+            return False
+        if self.max_price is not None and item.price > self.max_price:
+            return False
+        return True
+
+    def position(self, item: Item) -> ItemPosition:
+        if self.sorts_by_price:
+            return (item.price, item.id)
+        return (item.id, item.id)
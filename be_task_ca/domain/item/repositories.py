@@ -1,23 +1,201 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Sequence, Set
 from uuid import UUID
 
 from .entities import Item
+from .queries import ItemPosition, ItemQuery
 
 
 class ItemRepository(ABC):
+    """
+    Listing reads accept `fields` to load only some item attributes. The id
+    is always loaded; attributes left out keep their `Item` defaults.
+    """
+
     @abstractmethod
     def save_item(self, item: Item) -> Item:
+        """
+        Insert or update an item by id.
+
+        Raises DuplicateItemNameError when another item has the same name.
+        """
+        pass
+
+    @abstractmethod
+    def insert_items(self, items: List[Item]) -> List[Item]:
+        """
+        Insert many new items at once and return the ones that were stored.
+
+        Items whose id or name is already taken are skipped rather than
+        failing the whole batch.
+        """
+        pass
+
+    @abstractmethod
+    def get_all_items(self, fields: Optional[Sequence[str]] = None) -> List[Item]:
+        pass
+
+    @abstractmethod
+    def get_items_page(
+        self,
+        limit: int,
+        after: Optional[UUID] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Item]:
+        """Return up to `limit` items ordered by id, starting after the `after` id."""
+        pass
+
+    @abstractmethod
+    def query_items(
+        self,
+        query: ItemQuery,
+        limit: int,
+        after: Optional[ItemPosition] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Item]:
+        """
+        Return up to `limit` items matching `query` in its sort order,
+        starting strictly after the `after` position.
+        """
         pass
 
     @abstractmethod
-    def get_all_items(self) -> List[Item]:
+    def iter_all_items(
+        self, batch_size: int = 1000, fields: Optional[Sequence[str]] = None
+    ) -> Iterator[Item]:
+        """Yield every item while holding at most one batch of rows in memory."""
         pass
 
     @abstractmethod
     def find_item_by_name(self, name: str) -> Optional[Item]:
         pass
 
+    @abstractmethod
+    def search_items(
+        self, terms: List[str], limit: int, fields: Optional[Sequence[str]] = None
+    ) -> List[Item]:
+        """
+        Return the best matching items containing every term as a prefix of
+        a word in their name or description, best match first.
+        """
+        pass
+
+    @abstractmethod
+    def find_existing_item_names(self, names: Iterable[str]) -> Set[str]:
+        pass
+
     @abstractmethod
     def find_item_by_id(self, id: UUID) -> Optional[Item]:
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def find_items_by_ids(
+        self, ids: Iterable[UUID], fields: Optional[Sequence[str]] = None
+    ) -> List[Item]:
+        """
+        Fetch many items in one lookup, in the order of `ids`. Ids without an
+        item are skipped.
+        """
+        pass
+
+    @abstractmethod
+    def reserve_stock(self, item_id: UUID, quantity: int) -> bool:
+        """
+        Take `quantity` units out of an item's stock in one atomic
+        compare-and-decrement. Returns False, changing nothing, when the
+        item does not exist or has fewer units left.
+        """
+        pass
+
+    @abstractmethod
+    def release_stock(self, item_id: UUID, quantity: int) -> bool:
+        """Put reserved units back, returning False when the item does not exist."""
+        pass
+
+    @abstractmethod
+    def get_catalog_version(self) -> int:
+        """
+        Return a counter that moves forward whenever any item is saved or
+        inserted, or has stock reserved or released.
+        """
+        pass
+
+
+class AsyncItemRepository(ABC):
+    """
+    Awaitable variant of `ItemRepository` for use on an event loop, with the
+    same semantics for every method.
+    """
+
+    @abstractmethod
+    async def save_item(self, item: Item) -> Item:
+        pass
+
+    @abstractmethod
+    async def insert_items(self, items: List[Item]) -> List[Item]:
+        pass
+
+    @abstractmethod
+    async def get_all_items(self, fields: Optional[Sequence[str]] = None) -> List[Item]:
+        pass
+
+    @abstractmethod
+    async def get_items_page(
+        self,
+        limit: int,
+        after: Optional[UUID] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Item]:
+        pass
+
+    @abstractmethod
+    async def query_items(
+        self,
+        query: ItemQuery,
+        limit: int,
+        after: Optional[ItemPosition] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Item]:
+        pass
+
+    @abstractmethod
+    def iter_all_items(
+        self, batch_size: int = 1000, fields: Optional[Sequence[str]] = None
+    ) -> AsyncIterator[Item]:
+        pass
+
+    @abstractmethod
+    async def find_item_by_name(self, name: str) -> Optional[Item]:
+        pass
+
+    @abstractmethod
+    async def search_items(
+        self, terms: List[str], limit: int, fields: Optional[Sequence[str]] = None
+    ) -> List[Item]:
+        pass
+
+    @abstractmethod
+    async def find_existing_item_names(self, names: Iterable[str]) -> Set[str]:
+        pass
+
+    @abstractmethod
+    async def find_item_by_id(self, id: UUID) -> Optional[Item]:
+        pass
+
+    @abstractmethod
+    async def find_items_by_ids(
+        self, ids: Iterable[UUID], fields: Optional[Sequence[str]] = None
+    ) -> List[Item]:
+        pass
+
+    @abstractmethod
+    async def reserve_stock(self, item_id: UUID, quantity: int) -> bool:
+        pass
+
+    @abstractmethod
+    async def release_stock(self, item_id: UUID, quantity: int) -> bool:
+        pass
+
+    @abstractmethod
+    async def get_catalog_version(self) -> int:
+        pass
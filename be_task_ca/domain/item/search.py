@@ -0,0 +1,16 @@
+import re
+from typing import List, Optional
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Split text into lowercase search terms.
+
+    Underscores separate terms, as they do in PostgreSQL's text search
+    parser, so both search backends agree on what a term is.
+    """
+    if not text:
+        return []
+    return _TOKEN_PATTERN.findall(text.lower())
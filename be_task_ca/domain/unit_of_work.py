@@ -0,0 +1,29 @@
+from abc import ABC, abstractmethod
+
+
+class WriteConflictError(Exception):
+    """
+    A concurrent unit of work committed a write that conflicts with this
+    one's, which was rolled back instead; the request may be retried.
+    """
+
+
+class UnitOfWork(ABC):
+    """
+    Groups the repository writes of one request into a single transaction.
+
+    Repositories only stage their writes; nothing is durable until `commit`,
+    and `rollback` discards everything staged since `begin`.
+    """
+
+    @abstractmethod
+    async def begin(self) -> None:
+        pass
+
+    @abstractmethod
+    async def commit(self) -> None:
+        pass
+
+    @abstractmethod
+    async def rollback(self) -> None:
+        pass
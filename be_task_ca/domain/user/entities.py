@@ -11,6 +11,15 @@ class CartItem:
     quantity: int
 
 
+@dataclass
+class CartLine:
+    """A cart item together with the catalog data needed to show it."""
+    item_id: uuid.UUID
+    quantity: int
+    name: str
+    price: float
+
+
 @dataclass
 class User:
     id: uuid.UUID = field(default_factory=uuid.uuid4)
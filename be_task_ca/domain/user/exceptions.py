@@ -0,0 +1,6 @@
+class DuplicateEmailError(Exception):
+    """Raised by repositories when a user's email is already registered."""
+
+    def __init__(self, email: str):
+        super().__init__(f"A user with email {email!r} already exists")
+        self.email = email
@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+
+
+class PasswordHasher(ABC):
+    """
+    Turns passwords into salted, slow hashes and checks them.
+
+    Both operations are awaitable, since a proper key derivation function
+    takes long enough that it must not run on the event loop.
+    """
+
+    @abstractmethod
+    async def hash(self, password: str) -> str:
+        pass
+
+    @abstractmethod
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        pass
@@ -0,0 +1,13 @@
+from enum import Enum
+
+
+class UserShape(str, Enum):
+    """
+    How much of a user a read loads.
+
+    PROFILE loads only the user's own fields and leaves `cart_items` empty;
+    WITH_CART also loads the cart.
+    """
+
+    PROFILE = "profile"
+    WITH_CART = "with_cart"
@@ -2,22 +2,138 @@ from abc import ABC, abstractmethod
 from typing import List, Optional
 from uuid import UUID
 
-from .entities import User, CartItem
+from .entities import CartLine, User, CartItem
+from .queries import UserShape
 
 
 class UserRepository(ABC):
     @abstractmethod
     def save_user(self, user: User) -> User:
+        """
+        Insert or update a user by id.
+
+        Raises DuplicateEmailError when another user has the same email.
+        """
+        pass
+
+    @abstractmethod
+    def insert_users(self, users: List[User]) -> List[User]:
+        """
+        Insert many new users at once and return the ones that were stored.
+
+        Users whose id or email is already taken are skipped rather than
+        failing the whole batch. Cart items are not stored.
+        """
+        pass
+
+    @abstractmethod
+    def find_user_by_email(
+        self, email: str, shape: UserShape = UserShape.WITH_CART
+    ) -> Optional[User]:
         pass
 
     @abstractmethod
-    def find_user_by_email(self, email: str) -> Optional[User]:
+    def find_user_by_id(
+        self, user_id: UUID, shape: UserShape = UserShape.WITH_CART
+    ) -> Optional[User]:
         pass
 
     @abstractmethod
-    def find_user_by_id(self, user_id: UUID) -> Optional[User]:
+    def user_exists(self, user_id: UUID) -> bool:
+        """Check for a user without loading any of its data."""
         pass
 
     @abstractmethod
     def find_cart_items_for_user_id(self, user_id: UUID) -> List[CartItem]:
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def find_cart_lines_for_user_id(self, user_id: UUID) -> List[CartLine]:
+        """Return the user's cart joined with the name and price of each item."""
+        pass
+
+    @abstractmethod
+    def add_cart_item(self, cart_item: CartItem) -> bool:
+        """
+        Add a line to a user's cart, returning False when the cart already
+        holds the item. The user's other lines are not touched.
+        """
+        pass
+
+    @abstractmethod
+    def update_cart_item_quantity(
+        self,
+        user_id: UUID,
+        item_id: UUID,
+        quantity: int,
+        expected: Optional[int] = None,
+    ) -> bool:
+        """
+        Set the quantity of a cart line, returning False when there is none.
+
+        With `expected`, the line is only changed while it still holds that
+        quantity, in one compare-and-set; otherwise False is returned and
+        nothing changes.
+        """
+        pass
+
+    @abstractmethod
+    def remove_cart_item(self, user_id: UUID, item_id: UUID) -> Optional[CartItem]:
+        """Remove a cart line and return it, or None when there is none."""
+        pass
+
+
+class AsyncUserRepository(ABC):
+    """Awaitable variant of `UserRepository` for use on an event loop."""
+
+    @abstractmethod
+    async def save_user(self, user: User) -> User:
+        pass
+
+    @abstractmethod
+    async def insert_users(self, users: List[User]) -> List[User]:
+        pass
+
+    @abstractmethod
+    async def find_user_by_email(
+        self, email: str, shape: UserShape = UserShape.WITH_CART
+    ) -> Optional[User]:
+        pass
+
+    @abstractmethod
+    async def find_user_by_id(
+        self, user_id: UUID, shape: UserShape = UserShape.WITH_CART
+    ) -> Optional[User]:
+        pass
+
+    @abstractmethod
+    async def user_exists(self, user_id: UUID) -> bool:
+        pass
+
+    @abstractmethod
+    async def find_cart_items_for_user_id(self, user_id: UUID) -> List[CartItem]:
+        pass
+
+    @abstractmethod
+    async def find_cart_lines_for_user_id(self, user_id: UUID) -> List[CartLine]:
+        pass
+
+    @abstractmethod
+    async def add_cart_item(self, cart_item: CartItem) -> bool:
+        pass
+
+    @abstractmethod
+    async def update_cart_item_quantity(
+        self,
+        user_id: UUID,
+        item_id: UUID,
+        quantity: int,
+        expected: Optional[int] = None,
+    ) -> bool:
+        pass
+
+    @abstractmethod
+    async def remove_cart_item(
+        self, user_id: UUID, item_id: UUID
+    ) -> Optional[CartItem]:
+        pass
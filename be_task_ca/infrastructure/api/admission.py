@@ -0,0 +1,135 @@
+import asyncio
+from collections import deque
+from typing import Callable, Deque, Iterable, Optional
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class ConcurrencyLimiter:
+    """
+    Admits at most `limit` requests at once, with a bounded FIFO wait queue.
+
+    A request arriving while all slots are taken waits for up to
+    `queue_timeout` seconds, unless `queue_size` requests are already
+    waiting. Rejecting the rest immediately keeps the latency of admitted
+    requests flat instead of letting every request slow down together.
+    """
+
+    def __init__(self, limit: int, queue_size: int, queue_timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """Take a slot, returning False when the request must be shed."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.queue_size or self.queue_timeout <= 0:
+            return False
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        expiry = loop.call_later(self.queue_timeout, self._expire, waiter)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            # A slot handed over just before the cancellation must be passed on
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+        finally:
+            expiry.cancel()
+
+    def release(self) -> None:
+        # The slot goes straight to the oldest waiter, so `active` only
+        # drops when nobody is queued
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.active -= 1
+
+    def _expire(self, waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            waiter.set_result(False)
+        self._discard(waiter)
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+class AdmissionController:
+    """
+    Picks the limiter for a request: paths listed in `cheap_paths` are
+    served without touching the database and get their own, higher limit,
+    so they stay available while expensive routes are shedding load.
+    """
+
+    def __init__(
+        self,
+        limiter: ConcurrencyLimiter,
+        cheap_limiter: Optional[ConcurrencyLimiter] = None,
+        cheap_paths: Iterable[str] = (),
+        retry_after: int = 1,
+    ):
+        self.limiter = limiter
+        self.cheap_limiter = cheap_limiter or limiter
+        self.cheap_paths = frozenset(cheap_paths)
+        self.retry_after = retry_after
+
+    def limiter_for(self, path: str) -> ConcurrencyLimiter:
+        if path in self.cheap_paths:
+            return self.cheap_limiter
+        return self.limiter
+
+
+class AdmissionMiddleware:
+    """
+    Sheds requests the admission controller has no slot for with a 503.
+
+    Written as plain ASGI middleware so the slot is held until the whole
+    response, streamed bodies included, has been sent, and is released
+    even when the client disconnects midway.
+    """
+
+    def __init__(
+        self, app: ASGIApp, get_controller: Callable[[], AdmissionController]
+    ):
+        self.app = app
+        self.get_controller = get_controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.get_controller()
+        limiter = controller.limiter_for(scope["path"])
+        if not await limiter.acquire():
+            response = JSONResponse(
+                {"detail": "The server is overloaded, try again later"},
+                status_code=503,
+                headers={"Retry-After": str(controller.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
@@ -0,0 +1,17 @@
+from fastapi import Request
+
+from be_task_ca.domain.item.repositories import AsyncItemRepository
+from be_task_ca.domain.user.repositories import AsyncUserRepository
+from be_task_ca.infrastructure.container import AppContainer
+
+
+def get_container(request: Request) -> AppContainer:
+    return request.state.container.app_container
+
+
+async def get_user_repo(request: Request) -> AsyncUserRepository:
+    return await request.state.container.user_repository()
+
+
+async def get_item_repo(request: Request) -> AsyncItemRepository:
+    return await request.state.container.item_repository()
@@ -0,0 +1,30 @@
+import hashlib
+from typing import Optional
+
+
+def make_etag(version: int, variant: str = "") -> str:
+    """
+    Build a strong ETag for a representation of versioned data.
+
+    `variant` distinguishes representations of the same version, such as
+    different pages or media types, so they never share a validator.
+    """
+    digest = hashlib.sha1(f"{version}:{variant}".encode("UTF-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header using the weak comparison it requires."""
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+
+    return False
@@ -0,0 +1,54 @@
+import json
+from typing import Any, Dict, List, Optional, Type, TypeVar
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+M = TypeVar("M", bound=BaseModel)
+
+
+async def parse_json_rows(
+    request: Request, model: Type[M], max_rows: Optional[int] = None
+) -> List[M]:
+    """
+    Parse a request body holding many rows of `model`.
+
+    The body is either a JSON array or, with a Content-Type of
+    application/x-ndjson, one JSON object per line. Validation errors are
+    collected for every row and reported together as a 422, with the row
+    index in each error location. Bodies with more than `max_rows` rows are
+    rejected with a 413 before any row is validated.
+    """
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+
+    try:
+        if content_type.startswith(NDJSON_MEDIA_TYPE):
+            raw_rows = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            raw_rows = json.loads(body)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=f"Malformed JSON body: {error}")
+
+    if not isinstance(raw_rows, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of rows")
+    if max_rows is not None and len(raw_rows) > max_rows:
+        raise HTTPException(
+            status_code=413, detail=f"At most {max_rows} rows per request"
+        )
+
+    rows: List[M] = []
+    errors: List[Dict[str, Any]] = []
+    for index, raw_row in enumerate(raw_rows):
+        try:
+            rows.append(model.parse_obj(raw_row))
+        except ValidationError as error:
+            for row_error in error.errors():
+                errors.append({**row_error, "loc": ["body", index, *row_error["loc"]]})
+
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+    return rows
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from be_task_ca.infrastructure.api.dependencies import get_container
+from be_task_ca.infrastructure.container import AppContainer
+from be_task_ca.infrastructure.database.config import (
+    async_pool_metrics,
+    get_async_engine,
+)
+
+# Operational endpoints, left out of the public API schema
+internal_router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False,
+)
+
+
+@internal_router.get("/pool")
+async def get_pool_metrics(container: AppContainer = Depends(get_container)):
+    """Checkout counts, wait times and current state of the database pool."""
+    if container.repository_type != "sql":
+        raise HTTPException(status_code=404, detail="No database pool in use")
+    return async_pool_metrics.report(get_async_engine().pool)
+
+
+@internal_router.get("/item-cache")
+async def get_item_cache_metrics(container: AppContainer = Depends(get_container)):
+    """Hit, miss and eviction counts and current size of the item cache."""
+    if container.item_cache is None:
+        raise HTTPException(status_code=404, detail="Item cache is disabled")
+    return container.item_cache.report()
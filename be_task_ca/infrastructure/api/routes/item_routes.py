@@ -1,31 +1,115 @@
-from fastapi import APIRouter, Depends, Request
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from be_task_ca.domain.item.repositories import ItemRepository
-from be_task_ca.application.item.usecases import create_item, get_all
-from be_task_ca.application.dto.item_dto import CreateItemRequest, CreateItemResponse
-from be_task_ca.infrastructure.factory import get_item_repository
-from be_task_ca.config import get_repository_type
+from be_task_ca.domain.item.queries import ItemQuery, ItemSort
+from be_task_ca.domain.item.repositories import AsyncItemRepository
+from be_task_ca.application.item.usecases import (
+    MAX_PAGE_SIZE,
+    create_item,
+    create_items_bulk,
+    get_all,
+    get_item,
+    search,
+    stream_all,
+)
+from be_task_ca.application.dto.item_dto import (
+    BulkCreateItemsResponse,
+    CreateItemRequest,
+    CreateItemResponse,
+)
+from be_task_ca.infrastructure.api.dependencies import get_item_repo
+from be_task_ca.infrastructure.api.etag import etag_matches, make_etag
+from be_task_ca.infrastructure.api.ndjson import NDJSON_MEDIA_TYPE, parse_json_rows
+from be_task_ca.config import get_bulk_items_max_rows
 
 item_router = APIRouter(
     prefix="/items",
     tags=["item"],
 )
 
-def get_item_repo(request: Request) -> ItemRepository:
-    repo_type = get_repository_type()
-    if repo_type == "sql":
-        return get_item_repository("sql", request.state.db)
-    return get_item_repository("memory")
+FIELDS_QUERY = Query(
+    None, description="Comma separated item fields to return, e.g. name,price"
+)
+
+def split_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if fields is None:
+        return None
+    return [name.strip() for name in fields.split(",") if name.strip()]
+
+def sparse_json(content, headers: Optional[dict] = None) -> JSONResponse:
+    # Partial items leave unrequested fields unset, so they are dropped
+    # from the payload instead of being sent as null
+    return JSONResponse(jsonable_encoder(content, exclude_unset=True), headers=headers)
 
 @item_router.post("/")
 async def post_item(
     item: CreateItemRequest,
-    repository: ItemRepository = Depends(get_item_repo)
+    repository: AsyncItemRepository = Depends(get_item_repo)
 ) -> CreateItemResponse:
-    return create_item(item, repository)
+    return await create_item(item, repository)
+
+@item_router.post("/bulk")
+async def post_items_bulk(
+    request: Request,
+    repository: AsyncItemRepository = Depends(get_item_repo)
+) -> BulkCreateItemsResponse:
+    items = await parse_json_rows(
+        request, CreateItemRequest, max_rows=get_bulk_items_max_rows()
+    )
+    return await create_items_bulk(items, repository)
 
 @item_router.get("/")
 async def get_items(
-    repository: ItemRepository = Depends(get_item_repo)
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = FIELDS_QUERY,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: bool = False,
+    sort: ItemSort = ItemSort.ID,
+    repository: AsyncItemRepository = Depends(get_item_repo)
 ):
-    return get_all(repository)
\ No newline at end of file
+    query = ItemQuery(
+        min_price=min_price, max_price=max_price, in_stock=in_stock, sort=sort
+    )
+    stream = NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+    # The version is read before any rows, so a concurrent write can only
+    # make the body newer than its ETag and never the other way round
+    version = await repository.get_catalog_version()
+    etag = make_etag(version, f"{request.url.query}:{stream}")
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if stream:
+        return StreamingResponse(
+            stream_all(repository, split_fields(fields), query),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers=headers,
+        )
+
+    return sparse_json(
+        await get_all(repository, limit, cursor, split_fields(fields), query), headers
+    )
+
+@item_router.get("/search")
+async def search_items(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = FIELDS_QUERY,
+    repository: AsyncItemRepository = Depends(get_item_repo)
+):
+    return sparse_json(await search(repository, q, limit, split_fields(fields)))
+
+# Declared after /search, which would otherwise be taken for an item id
+@item_router.get("/{item_id}")
+async def get_item_by_id(
+    item_id: UUID,
+    repository: AsyncItemRepository = Depends(get_item_repo)
+) -> CreateItemResponse:
+    return await get_item(item_id, repository)
@@ -1,12 +1,31 @@
 from fastapi import APIRouter, Depends, Request
 from uuid import UUID
 
-from be_task_ca.domain.user.repositories import UserRepository
-from be_task_ca.domain.item.repositories import ItemRepository
-from be_task_ca.application.user.usecases import add_item_to_cart, create_user, list_items_in_cart
-from be_task_ca.application.dto.user_dto import AddToCartRequest, CreateUserRequest
-from be_task_ca.infrastructure.factory import get_user_repository, get_item_repository
-from be_task_ca.config import get_repository_type
+from be_task_ca.domain.user.passwords import PasswordHasher
+from be_task_ca.domain.user.repositories import AsyncUserRepository
+from be_task_ca.domain.item.repositories import AsyncItemRepository
+from be_task_ca.application.user.usecases import (
+    add_item_to_cart,
+    create_user,
+    create_users_bulk,
+    remove_item_from_cart,
+    update_cart_item_quantity,
+    view_cart,
+)
+from be_task_ca.application.dto.user_dto import (
+    AddToCartRequest,
+    BulkCreateUsersResponse,
+    CartResponse,
+    CreateUserRequest,
+    UpdateCartItemRequest,
+)
+from be_task_ca.infrastructure.api.dependencies import get_item_repo, get_user_repo
+from be_task_ca.infrastructure.api.ndjson import parse_json_rows
+from be_task_ca.config import get_bulk_users_max_rows
+from be_task_ca.infrastructure.factory import (
+    get_bulk_password_hasher,
+    get_password_hasher,
+)
 
 user_router = APIRouter(
     prefix="/users",
@@ -14,37 +33,60 @@ user_router = APIRouter(
 )
 
 
-def get_user_repo(request: Request) -> UserRepository:
-    repo_type = get_repository_type()
-    if repo_type == "sql":
-        return get_user_repository("sql", request.state.db)
-    return get_user_repository("memory")
-
-def get_item_repo(request: Request) -> ItemRepository:
-    repo_type = get_repository_type()
-    if repo_type == "sql":
-        return get_item_repository("sql", request.state.db)
-    return get_item_repository("memory")
-
 @user_router.post("/")
 async def post_customer(
     user: CreateUserRequest,
-    user_repository: UserRepository = Depends(get_user_repo)
+    user_repository: AsyncUserRepository = Depends(get_user_repo),
+    password_hasher: PasswordHasher = Depends(get_password_hasher)
 ):
-    return create_user(user, user_repository)
+    return await create_user(user, user_repository, password_hasher)
+
+@user_router.post("/bulk")
+async def post_customers_bulk(
+    request: Request,
+    user_repository: AsyncUserRepository = Depends(get_user_repo),
+    password_hasher: PasswordHasher = Depends(get_bulk_password_hasher)
+) -> BulkCreateUsersResponse:
+    users = await parse_json_rows(
+        request, CreateUserRequest, max_rows=get_bulk_users_max_rows()
+    )
+    return await create_users_bulk(users, user_repository, password_hasher)
 
 @user_router.post("/{user_id}/cart")
 async def post_cart(
     user_id: UUID,
     cart_item: AddToCartRequest,
-    user_repository: UserRepository = Depends(get_user_repo),
-    item_repository: ItemRepository = Depends(get_item_repo)
+    user_repository: AsyncUserRepository = Depends(get_user_repo),
+    item_repository: AsyncItemRepository = Depends(get_item_repo)
 ):
-    return add_item_to_cart(user_id, cart_item, user_repository, item_repository)
+    return await add_item_to_cart(user_id, cart_item, user_repository, item_repository)
+
+@user_router.put("/{user_id}/cart/{item_id}")
+async def put_cart_item(
+    user_id: UUID,
+    item_id: UUID,
+    update: UpdateCartItemRequest,
+    user_repository: AsyncUserRepository = Depends(get_user_repo),
+    item_repository: AsyncItemRepository = Depends(get_item_repo)
+):
+    return await update_cart_item_quantity(
+        user_id, item_id, update, user_repository, item_repository
+    )
+
+@user_router.delete("/{user_id}/cart/{item_id}")
+async def delete_cart_item(
+    user_id: UUID,
+    item_id: UUID,
+    user_repository: AsyncUserRepository = Depends(get_user_repo),
+    item_repository: AsyncItemRepository = Depends(get_item_repo)
+):
+    return await remove_item_from_cart(
+        user_id, item_id, user_repository, item_repository
+    )
 
 @user_router.get("/{user_id}/cart")
 async def get_cart(
     user_id: UUID,
-    user_repository: UserRepository = Depends(get_user_repo)
-):
-    return list_items_in_cart(user_id, user_repository)
\ No newline at end of file
+    user_repository: AsyncUserRepository = Depends(get_user_repo)
+) -> CartResponse:
+    return await view_cart(user_id, user_repository)
\ No newline at end of file
@@ -0,0 +1,37 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from be_task_ca.infrastructure.database.instrumentation import QueryStats, track_queries
+
+
+def server_timing(stats: QueryStats) -> str:
+    """`Server-Timing` header value for the database work of a request."""
+    return f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"'
+
+
+class ServerTimingMiddleware:
+    """
+    Reports the number of SQL statements a request ran and their total
+    time in a `Server-Timing` header.
+
+    Statements run while a streamed body is produced come after the
+    headers and are not included.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", server_timing(stats))
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
@@ -0,0 +1,100 @@
+import time
+from typing import Callable
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from be_task_ca.domain.unit_of_work import WriteConflictError
+from be_task_ca.infrastructure.container import AppContainer
+
+# Holds the time until which the client's reads go to the primary
+READ_PRIMARY_COOKIE = "read_primary_until"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class UnitOfWorkMiddleware:
+    """
+    Gives each request a container and runs it in a unit of work.
+
+    The container is read back through `request.state.container` and only
+    opens a session and unit of work when a repository is first resolved.
+    The unit of work commits as the response starts, so a client is never
+    told about a write that is then lost, and rolls back when the request
+    fails or answers with an error status. Streamed bodies are produced
+    after that point and only read; the session stays open until they have
+    been sent. A commit that loses to a conflicting write replaces the
+    response with a `409`.
+
+    When reads are routed to replicas, requests with a safe method are
+    read-only. A successful write sets a cookie that keeps the client's
+    reads on the primary for the read-your-writes window.
+    """
+
+    def __init__(self, app: ASGIApp, get_container: Callable[[], AppContainer]):
+        self.app = app
+        self.get_container = get_container
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        app_container = self.get_container()
+        read_only = scope["method"] in SAFE_METHODS and not _reads_primary(scope)
+        container = app_container.request_container(read_only)
+        scope.setdefault("state", {})["container"] = container
+        finished = False
+        replaced = False
+
+        async def send_after_commit(message: Message) -> None:
+            nonlocal finished, replaced
+            if replaced:
+                return
+            if message["type"] == "http.response.start" and not finished:
+                finished = True
+                if message["status"] < 400:
+                    try:
+                        await container.commit()
+                    except WriteConflictError as error:
+                        replaced = True
+                        response = JSONResponse({"detail": str(error)}, 409)
+                        await response(scope, receive, send)
+                        return
+                    if container.wrote_to_primary:
+                        _stick_to_primary(
+                            message, app_container.read_your_writes_seconds
+                        )
+                else:
+                    await container.rollback()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_after_commit)
+        except Exception:
+            if not finished:
+                finished = True
+                await container.rollback()
+            raise
+        finally:
+            await container.close()
+
+
+def _reads_primary(scope: Scope) -> bool:
+    until = HTTPConnection(scope).cookies.get(READ_PRIMARY_COOKIE)
+    try:
+        return until is not None and float(until) > time.time()
+    except ValueError:
+        return False
+
+
+def _stick_to_primary(message: Message, seconds: float) -> None:
+    # The deadline is in the cookie, so it holds whichever worker serves the
+    # next read
+    until = time.time() + seconds
+    MutableHeaders(scope=message).append(
+        "Set-Cookie",
+        f"{READ_PRIMARY_COOKIE}={until:.3f}; Max-Age={max(int(seconds), 1)}; "
+        "Path=/; HttpOnly; SameSite=Lax",
+    )
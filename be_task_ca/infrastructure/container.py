@@ -0,0 +1,160 @@
+from itertools import cycle
+from typing import Literal, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from be_task_ca.config import get_read_your_writes_seconds, get_repository_type
+from be_task_ca.domain.item.repositories import AsyncItemRepository
+from be_task_ca.domain.unit_of_work import UnitOfWork
+from be_task_ca.domain.user.repositories import AsyncUserRepository
+from be_task_ca.infrastructure.database.config import (
+    get_async_session_factory,
+    get_replica_session_factories,
+)
+from be_task_ca.infrastructure.factory import (
+    get_async_item_repository,
+    get_async_user_repository,
+    get_item_cache,
+    get_unit_of_work,
+)
+from be_task_ca.infrastructure.item_cache import ItemCache
+
+_app_container = None
+
+
+class AppContainer:
+    """
+    Composition root: the configuration and factories every request shares,
+    built once when the app starts.
+
+    With `replica_session_factories`, read-only requests take their
+    sessions from the replicas in turn and everything else from the
+    primary's `session_factory`. A client's reads stay on the primary for
+    `read_your_writes_seconds` after it wrote, so it never reads data older
+    than its own writes from a lagging replica. SQL item repositories are
+    put behind `item_cache` when it is given.
+    """
+
+    def __init__(
+        self,
+        repository_type: Literal["sql", "memory"],
+        session_factory: Optional[async_sessionmaker] = None,
+        replica_session_factories: Sequence[async_sessionmaker] = (),
+        read_your_writes_seconds: float = 5.0,
+        item_cache: Optional[ItemCache] = None,
+    ):
+        if repository_type == "sql" and session_factory is None:
+            raise ValueError("A session factory is required for SQL repositories")
+        self.repository_type = repository_type
+        self.session_factory = session_factory
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self.item_cache = item_cache
+        self.routes_reads = repository_type == "sql" and bool(replica_session_factories)
+        self._replicas = cycle(replica_session_factories)
+
+    def request_container(self, read_only: bool = False) -> "RequestContainer":
+        return RequestContainer(self, read_only and self.routes_reads)
+
+    def session_factory_for(self, read_only: bool) -> async_sessionmaker:
+        if read_only and self.routes_reads:
+            return next(self._replicas)
+        if self.session_factory is None:
+            raise ValueError("In-memory repositories have no database session")
+        return self.session_factory
+
+
+class RequestContainer:
+    """
+    Resources of one request, created on first use.
+
+    The session and the unit of work are opened when the first repository
+    is resolved, so requests that never touch a repository neither open a
+    session nor check out a connection. A `read_only` container's session
+    comes from a replica.
+    """
+
+    def __init__(self, app_container: AppContainer, read_only: bool = False):
+        self.app_container = app_container
+        self.read_only = read_only
+        self.db: Optional[AsyncSession] = None
+        self.unit_of_work: Optional[UnitOfWork] = None
+        self._user_repository: Optional[AsyncUserRepository] = None
+        self._item_repository: Optional[AsyncItemRepository] = None
+
+    async def session(self) -> AsyncSession:
+        if self.app_container.repository_type == "sql":
+            await self._begin()
+        if self.db is None:
+            raise ValueError("In-memory repositories have no database session")
+        return self.db
+
+    async def user_repository(self) -> AsyncUserRepository:
+        if self._user_repository is None:
+            await self._begin()
+            self._user_repository = get_async_user_repository(
+                self.app_container.repository_type, self.db
+            )
+        return self._user_repository
+
+    async def item_repository(self) -> AsyncItemRepository:
+        if self._item_repository is None:
+            await self._begin()
+            self._item_repository = get_async_item_repository(
+                self.app_container.repository_type,
+                self.db,
+                self.app_container.item_cache,
+            )
+        return self._item_repository
+
+    async def commit(self) -> None:
+        if self.unit_of_work is not None:
+            await self.unit_of_work.commit()
+
+    async def rollback(self) -> None:
+        if self.unit_of_work is not None:
+            await self.unit_of_work.rollback()
+
+    @property
+    def wrote_to_primary(self) -> bool:
+        """Whether the request may have written through the primary."""
+        return self.app_container.routes_reads and (
+            self.unit_of_work is not None and not self.read_only
+        )
+
+    async def close(self) -> None:
+        if self.db is not None:
+            await self.db.close()
+
+    async def _begin(self) -> None:
+        if self.unit_of_work is not None:
+            return
+        if self.app_container.repository_type == "sql":
+            self.db = self.app_container.session_factory_for(self.read_only)()
+        self.unit_of_work = get_unit_of_work(self.app_container.repository_type, self.db)
+        await self.unit_of_work.begin()
+
+
+def get_app_container() -> AppContainer:
+    """The composition root, built from the environment on first use."""
+    global _app_container
+
+    if _app_container is None:
+        repository_type = get_repository_type()
+        if repository_type == "sql":
+            _app_container = AppContainer(
+                repository_type,
+                get_async_session_factory(),
+                get_replica_session_factories(),
+                get_read_your_writes_seconds(),
+                get_item_cache(),
+            )
+        else:
+            _app_container = AppContainer(repository_type)
+    return _app_container
+
+
+def reset_app_container() -> None:
+    """Drop the composition root, so the next use reads the environment again."""
+    global _app_container
+
+    _app_container = None
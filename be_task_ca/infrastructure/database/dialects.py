@@ -0,0 +1,120 @@
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import (
+    Column,
+    Table,
+    UniqueConstraint,
+    and_,
+    insert,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# Backends whose INSERT supports ON CONFLICT, by dialect name; the others
+# fall back to reading the conflicting rows first
+ON_CONFLICT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def supports_on_conflict(db: Session) -> bool:
+    return db.get_bind().dialect.name in ON_CONFLICT_INSERTS
+
+
+def _on_conflict_insert(db: Session, table: Table):
+    return ON_CONFLICT_INSERTS[db.get_bind().dialect.name](table)
+
+
+def upsert(db: Session, model, row: Dict[str, Any], **updates: Any) -> None:
+    """
+    Insert `row`, or update the row with its primary key to it.
+
+    `updates` override columns of `row` only when the row exists. Without ON
+    CONFLICT the row is updated first and inserted when nothing matched.
+    """
+    table: Table = model.__table__
+    key = list(table.primary_key.columns)
+    columns = [name for name in row if name not in {column.key for column in key}]
+
+    if supports_on_conflict(db):
+        statement = _on_conflict_insert(db, table).values(row)
+        statement = statement.on_conflict_do_update(
+            index_elements=key,
+            set_={
+                **{name: statement.excluded[name] for name in columns},
+                **updates,
+            },
+        )
+        db.execute(statement)
+        return
+
+    changes = {**{name: row[name] for name in columns}, **updates}
+    result = db.execute(update(table).where(_matches(key, row)).values(changes))
+    if result.rowcount == 0:
+        db.execute(insert(table).values(row))
+
+
+def insert_ignoring_conflicts(
+    db: Session, model, rows: List[Dict[str, Any]], **values: Any
+) -> int:
+    """
+    Insert `rows` in one executemany, skipping those that would break a
+    unique key, and return the number inserted.
+
+    `values` are set on every row. Without ON CONFLICT the rows that clash
+    with existing ones, or with earlier rows of the batch, are read and left
+    out first; a clashing row committed meanwhile still raises
+    IntegrityError and rolls the unit of work back.
+    """
+    if not rows:
+        return 0
+
+    # On the table, not the mapped class, so the result keeps its rowcount
+    table: Table = model.__table__
+    if supports_on_conflict(db):
+        statement = _on_conflict_insert(db, table).values(**values)
+        result = db.execute(statement.on_conflict_do_nothing(), rows)
+        return result.rowcount
+
+    keys = _unique_keys(table)
+    taken = [_existing_keys(db, key, rows) for key in keys]
+    new_rows = []
+    for row in rows:
+        row_keys = [tuple(row.get(column.key) for column in key) for key in keys]
+        if any(row_key in seen for row_key, seen in zip(row_keys, taken)):
+            continue
+        for row_key, seen in zip(row_keys, taken):
+            seen.add(row_key)
+        new_rows.append(row)
+
+    if new_rows:
+        db.execute(insert(table).values(**values), new_rows)
+    return len(new_rows)
+
+
+def _unique_keys(table: Table) -> List[Sequence[Column]]:
+    keys: List[Sequence[Column]] = [list(table.primary_key.columns)]
+    for index in table.indexes:
+        # Expression indexes have no columns to compare rows by
+        if index.unique and index.columns:
+            keys.append(list(index.columns))
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            keys.append(list(constraint.columns))
+    return keys
+
+
+def _existing_keys(db: Session, key: Sequence[Column], rows: List[Dict[str, Any]]):
+    if len(key) == 1:
+        condition = key[0].in_([row.get(key[0].key) for row in rows])
+    else:
+        condition = or_(*(_matches(key, row) for row in rows))
+    return {tuple(existing) for existing in db.execute(select(*key).where(condition))}
+
+
+def _matches(key: Sequence[Column], row: Dict[str, Any]):
+    return and_(*(column == row.get(column.key) for column in key))
@@ -0,0 +1,85 @@
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    """Statements executed within one `track_queries` block."""
+
+    count: int = 0
+    seconds: float = 0.0
+
+
+class SlowQueryLog:
+    """
+    Logs statements that take `threshold` seconds or longer.
+
+    Only a `sample_rate` share of them is logged, so a slow database does
+    not also flood the logs. Parameters are left out, they may hold
+    personal data.
+    """
+
+    def __init__(self, threshold: float, sample_rate: float = 1.0):
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+
+    def observe(self, statement: str, seconds: float) -> None:
+        if seconds < self.threshold or random.random() >= self.sample_rate:
+            return
+        logger.warning("Slow query (%.1f ms): %s", seconds * 1000, statement)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+_slow_query_log: Optional[SlowQueryLog] = None
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count the statements executed by this task, e.g. for one request."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def instrument_engines(slow_query_log: Optional[SlowQueryLog] = None) -> None:
+    """
+    Time the statements of every engine, async engines included, since
+    they execute through a synchronous engine.
+    """
+    global _slow_query_log
+
+    _slow_query_log = slow_query_log
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context: Any, executemany
+) -> None:
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context: Any, executemany
+) -> None:
+    seconds = time.perf_counter() - context._query_started
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += seconds
+    if _slow_query_log is not None:
+        _slow_query_log.observe(statement, seconds)
@@ -1,4 +1,15 @@
-from sqlalchemy import UUID, Column, String, Float, Integer
+from sqlalchemy import (
+    UUID,
+    BigInteger,
+    Column,
+    Float,
+    Index,
+    Integer,
+    Sequence,
+    String,
+    func,
+    text,
+)
 import uuid
 
 from be_task_ca.infrastructure.database.config import Base
@@ -15,4 +26,38 @@ class ItemModel(Base):
     name = Column(String, unique=True, index=True)
     description = Column(String, nullable=True)
     price = Column(Float)
-    quantity = Column(Integer)
\ No newline at end of file
+    quantity = Column(Integer, index=True)
+    # Set on every save, insert and stock change; the catalog version is
+    # the sum of them all, read off the index
+    version = Column(BigInteger, index=True)
+
+    __table_args__ = (
+        # Includes id so price sorted keyset pages are read straight off
+        # the index in either direction
+        Index("ix_items_price", "price", "id"),
+    )
+
+
+def item_search_vector():
+    """
+    Weighted tsvector over name ('A') and description ('B').
+
+    Constants are rendered inline so queries repeat the exact expression of
+    ix_items_search and PostgreSQL can use the index whatever the driver.
+    """
+    columns = ItemModel.__table__.c
+    config = text("'simple'::regconfig")
+    empty = text("''")
+    name = func.to_tsvector(config, func.coalesce(columns.name, empty))
+    description = func.to_tsvector(config, func.coalesce(columns.description, empty))
+    return func.setweight(name, text("'A'")).op("||")(
+        func.setweight(description, text("'B'"))
+    )
+
+
+Index(
+    "ix_items_search", item_search_vector(), postgresql_using="gin"
+).ddl_if(dialect="postgresql")
+
+# Hands out item versions on PostgreSQL without taking any lock
+item_version_sequence = Sequence("item_version_seq", metadata=Base.metadata)
@@ -0,0 +1,99 @@
+import bisect
+import threading
+import time
+from typing import Any, Dict, List, Sequence, Type
+
+from sqlalchemy import exc
+from sqlalchemy.pool import Pool, PoolProxiedConnection, QueuePool
+
+# Upper bounds in seconds of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class PoolMetrics:
+    """
+    Counters and a checkout wait-time histogram for one connection pool.
+
+    A checkout "waits" when it finds no idle connection and no overflow
+    left, so it queues for a connection another request returns.
+    """
+
+    def __init__(self, buckets: Sequence[float] = WAIT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        # One count per bucket plus one for waits above the last bound
+        self._bucket_counts: List[int] = [0] * (len(self.buckets) + 1)
+
+    def observe_checkout(self, seconds: float, waited: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.waits += waited
+            self.wait_seconds_total += seconds
+            self._bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def report(self, pool: Pool) -> Dict[str, Any]:
+        """The counters together with the pool's current state."""
+        with self._lock:
+            counts = list(self._bucket_counts)
+            report: Dict[str, Any] = {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+            }
+
+        # Cumulative, like Prometheus histograms: each bucket counts the
+        # checkouts that waited at most its bound
+        running = 0
+        histogram = []
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], counts):
+            running += count
+            histogram.append({"le": bound, "count": running})
+        report["wait_seconds_histogram"] = histogram
+
+        if isinstance(pool, QueuePool):
+            report.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+            )
+        return report
+
+
+def metered_pool_class(
+    base: Type[QueuePool], metrics: PoolMetrics
+) -> Type[QueuePool]:
+    """
+    Subclass `base` to time every checkout into `metrics`.
+
+    The metrics live on the class rather than the instance, because the
+    engine rebuilds its pool from the class when it is disposed.
+    """
+
+    class MeteredPool(base):  # type: ignore[valid-type, misc]
+        def connect(self) -> PoolProxiedConnection:
+            waited = (
+                self.checkedin() == 0
+                and self._max_overflow > -1
+                and self.overflow() >= self._max_overflow
+            )
+            started = time.perf_counter()
+            try:
+                connection = super().connect()
+            except exc.TimeoutError:
+                metrics.observe_timeout()
+                raise
+            metrics.observe_checkout(time.perf_counter() - started, waited)
+            return connection
+
+    MeteredPool.__name__ = f"Metered{base.__name__}"
+    return MeteredPool
@@ -0,0 +1,121 @@
+from typing import (
+    AsyncIterator,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    TypeVar,
+)
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from be_task_ca.domain.item.entities import Item
+from be_task_ca.domain.item.queries import ItemPosition, ItemQuery
+from be_task_ca.domain.item.repositories import AsyncItemRepository
+from be_task_ca.infrastructure.database.repositories.item_repository import (
+    SQLItemRepository,
+    row_to_item,
+    select_items,
+)
+
+R = TypeVar("R")
+
+
+class AsyncSQLItemRepository(AsyncItemRepository):
+    """
+    `SQLItemRepository` on an `AsyncSession`.
+
+    Calls run the synchronous repository through `AsyncSession.run_sync`,
+    where SQLAlchemy drives the async driver from a greenlet: every round
+    trip awaits asyncpg or aiosqlite and frees the event loop meanwhile, and
+    the queries themselves stay defined in one place.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def save_item(self, item: Item) -> Item:
+        return await self._run(lambda repository: repository.save_item(item))
+
+    async def insert_items(self, items: List[Item]) -> List[Item]:
+        return await self._run(lambda repository: repository.insert_items(items))
+
+    async def get_all_items(self, fields: Optional[Sequence[str]] = None) -> List[Item]:
+        return await self._run(lambda repository: repository.get_all_items(fields))
+
+    async def get_items_page(
+        self,
+        limit: int,
+        after: Optional[UUID] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Item]:
+        return await self._run(
+            lambda repository: repository.get_items_page(limit, after, fields)
+        )
+
+    async def query_items(
+        self,
+        query: ItemQuery,
+        limit: int,
+        after: Optional[ItemPosition] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Item]:
+        return await self._run(
+            lambda repository: repository.query_items(query, limit, after, fields)
+        )
+
+    async def iter_all_items(
+        self, batch_size: int = 1000, fields: Optional[Sequence[str]] = None
+    ) -> AsyncIterator[Item]:
+        # run_sync cannot hand rows back before it returns, so the export
+        # streams from a server-side cursor of its own instead
+        result = await self.db.stream(
+            select_items(fields).execution_options(yield_per=batch_size)
+        )
+        async for row in result:
+            yield row_to_item(row)
+
+    async def find_item_by_name(self, name: str) -> Optional[Item]:
+        return await self._run(lambda repository: repository.find_item_by_name(name))
+
+    async def search_items(
+        self, terms: List[str], limit: int, fields: Optional[Sequence[str]] = None
+    ) -> List[Item]:
+        return await self._run(
+            lambda repository: repository.search_items(terms, limit, fields)
+        )
+
+    async def find_existing_item_names(self, names: Iterable[str]) -> Set[str]:
+        names = list(names)
+        return await self._run(
+            lambda repository: repository.find_existing_item_names(names)
+        )
+
+    async def find_item_by_id(self, id: UUID) -> Optional[Item]:
+        return await self._run(lambda repository: repository.find_item_by_id(id))
+
+    async def find_items_by_ids(
+        self, ids: Iterable[UUID], fields: Optional[Sequence[str]] = None
+    ) -> List[Item]:
+        ids = list(ids)
+        return await self._run(
+            lambda repository: repository.find_items_by_ids(ids, fields)
+        )
+
+    async def reserve_stock(self, item_id: UUID, quantity: int) -> bool:
+        return await self._run(
+            lambda repository: repository.reserve_stock(item_id, quantity)
+        )
+
+    async def release_stock(self, item_id: UUID, quantity: int) -> bool:
+        return await self._run(
+            lambda repository: repository.release_stock(item_id, quantity)
+        )
+
+    async def get_catalog_version(self) -> int:
+        return await self._run(lambda repository: repository.get_catalog_version())
+
+    async def _run(self, call: Callable[[SQLItemRepository], R]) -> R:
+        return await self.db.run_sync(lambda session: call(SQLItemRepository(session)))
@@ -0,0 +1,78 @@
+from typing import Callable, List, Optional, TypeVar
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from be_task_ca.domain.user.entities import CartLine, User, CartItem
+from be_task_ca.domain.user.queries import UserShape
+from be_task_ca.domain.user.repositories import AsyncUserRepository
+from be_task_ca.infrastructure.database.repositories.user_repository import (
+    SQLUserRepository,
+)
+
+R = TypeVar("R")
+
+
+class AsyncSQLUserRepository(AsyncUserRepository):
+    """`SQLUserRepository` on an `AsyncSession`, see `AsyncSQLItemRepository`."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def save_user(self, user: User) -> User:
+        return await self._run(lambda repository: repository.save_user(user))
+
+    async def insert_users(self, users: List[User]) -> List[User]:
+        return await self._run(lambda repository: repository.insert_users(users))
+
+    async def find_user_by_email(
+        self, email: str, shape: UserShape = UserShape.WITH_CART
+    ) -> Optional[User]:
+        return await self._run(
+            lambda repository: repository.find_user_by_email(email, shape)
+        )
+
+    async def find_user_by_id(
+        self, user_id: UUID, shape: UserShape = UserShape.WITH_CART
+    ) -> Optional[User]:
+        return await self._run(
+            lambda repository: repository.find_user_by_id(user_id, shape)
+        )
+
+    async def user_exists(self, user_id: UUID) -> bool:
+        return await self._run(lambda repository: repository.user_exists(user_id))
+
+    async def find_cart_items_for_user_id(self, user_id: UUID) -> List[CartItem]:
+        return await self._run(
+            lambda repository: repository.find_cart_items_for_user_id(user_id)
+        )
+
+    async def find_cart_lines_for_user_id(self, user_id: UUID) -> List[CartLine]:
+        return await self._run(
+            lambda repository: repository.find_cart_lines_for_user_id(user_id)
+        )
+
+    async def add_cart_item(self, cart_item: CartItem) -> bool:
+        return await self._run(lambda repository: repository.add_cart_item(cart_item))
+
+    async def update_cart_item_quantity(
+        self,
+        user_id: UUID,
+        item_id: UUID,
+        quantity: int,
+        expected: Optional[int] = None,
+    ) -> bool:
+        return await self._run(
+            lambda repository: repository.update_cart_item_quantity(
+                user_id, item_id, quantity, expected
+            )
+        )
+
+    async def remove_cart_item(
+        self, user_id: UUID, item_id: UUID
+    ) -> Optional[CartItem]:
+        return await self._run(
+            lambda repository: repository.remove_cart_item(user_id, item_id)
+        )
+
+    async def _run(self, call: Callable[[SQLUserRepository], R]) -> R:
+        return await self.db.run_sync(lambda session: call(SQLUserRepository(session)))
@@ -1,10 +1,42 @@
-from typing import List, Optional
+import io
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set
 from uuid import UUID
+from sqlalchemy import (
+    ColumnElement,
+    Row,
+    Select,
+    and_,
+    func,
+    literal,
+    or_,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
 
 from be_task_ca.domain.item.entities import Item
+from be_task_ca.domain.item.exceptions import DuplicateItemNameError
+from be_task_ca.domain.item.queries import ItemPosition, ItemQuery, ItemSort
 from be_task_ca.domain.item.repositories import ItemRepository
-from be_task_ca.infrastructure.database.models.item_model import ItemModel
+from be_task_ca.infrastructure.database.dialects import (
+    insert_ignoring_conflicts,
+    upsert,
+)
+from be_task_ca.infrastructure.database.models.item_model import (
+    ItemModel,
+    item_search_vector,
+    item_version_sequence,
+)
+
+BULK_CHUNK_SIZE = 10000
+# Drivers that can stream rows into a table with COPY
+COPY_DRIVERS = {"psycopg2", "asyncpg"}
+# Columns that map onto `Item`; the version is bookkeeping
+ITEM_COLUMNS = ["id", "name", "description", "price", "quantity"]
 
 
 class SQLItemRepository(ItemRepository):
@@ -12,29 +44,96 @@ class SQLItemRepository(ItemRepository):
         self.db = db
 
     def save_item(self, item: Item) -> Item:
-        db_item = self.db.query(ItemModel).filter(ItemModel.id == item.id).first()
-
-        if not db_item:
-            db_item = ItemModel(
-                id=item.id,
-                name=item.name,
-                description=item.description,
-                price=item.price,
-                quantity=item.quantity
+        try:
+            upsert(
+                self.db,
+                ItemModel,
+                {**_to_row(item), "version": self._next_version()},
+                # Drawn once the row is locked, so it is above the version
+                # of any write to the row that committed first
+                version=self._next_version(),
             )
-            self.db.add(db_item)
-        else:
-            db_item.name = item.name
-            db_item.description = item.description
-            db_item.price = item.price
-            db_item.quantity = item.quantity
+        except IntegrityError as error:
+            # The upsert only arbitrates on the id, so a taken name is the
+            # one constraint left to fail; the unit of work rolls back
+            raise DuplicateItemNameError(item.name) from error
 
-        self.db.commit()
         return item
 
-    def get_all_items(self) -> List[Item]:
-        db_items = self.db.query(ItemModel).all()
-        return [self._map_to_domain(item) for item in db_items]
+    def insert_items(self, items: List[Item]) -> List[Item]:
+        use_copy = self.db.get_bind().dialect.driver in COPY_DRIVERS
+
+        inserted_ids: Set[UUID] = set()
+        for start in range(0, len(items), BULK_CHUNK_SIZE):
+            chunk = items[start:start + BULK_CHUNK_SIZE]
+            if use_copy:
+                inserted_ids.update(self._copy_items(chunk))
+            else:
+                inserted_ids.update(self._insert_many_items(chunk))
+
+        return [item for item in items if item.id in inserted_ids]
+
+    def get_all_items(self, fields: Optional[Sequence[str]] = None) -> List[Item]:
+        rows = self.db.execute(select_items(fields))
+        return [row_to_item(row) for row in rows]
+
+    def get_items_page(
+        self,
+        limit: int,
+        after: Optional[UUID] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Item]:
+        statement = select_items(fields)
+        if after is not None:
+            statement = statement.where(ItemModel.id > after)
+
+        rows = self.db.execute(statement.order_by(ItemModel.id).limit(limit))
+        return [row_to_item(row) for row in rows]
+
+    def query_items(
+        self,
+        query: ItemQuery,
+        limit: int,
+        after: Optional[ItemPosition] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Item]:
+        statement = select_items(fields)
+        if query.min_price is not None:
+            statement = statement.where(ItemModel.price >= query.min_price)
+        if query.max_price is not None:
+            statement = statement.where(ItemModel.price <= query.max_price)
+        if query.in_stock:
+            statement = statement.where(ItemModel.quantity > 0)
+
+        if query.sort is ItemSort.ID:
+            if after is not None:
+                statement = statement.where(ItemModel.id > after[1])
+            statement = statement.order_by(ItemModel.id)
+        else:
+            position = tuple_(ItemModel.price, ItemModel.id)
+            if query.sort is ItemSort.PRICE:
+                if after is not None:
+                    statement = statement.where(position > after)
+                statement = statement.order_by(ItemModel.price, ItemModel.id)
+            else:
+                if after is not None:
+                    statement = statement.where(position < after)
+                statement = statement.order_by(
+                    ItemModel.price.desc(), ItemModel.id.desc()
+                )
+
+        rows = self.db.execute(statement.limit(limit))
+        return [row_to_item(row) for row in rows]
+
+    def iter_all_items(
+        self, batch_size: int = 1000, fields: Optional[Sequence[str]] = None
+    ) -> Iterator[Item]:
+        # yield_per streams rows through a server-side cursor on PostgreSQL
+        rows = self.db.execute(
+            select_items(fields).execution_options(yield_per=batch_size)
+        )
+        for row in rows:
+            yield row_to_item(row)
 
     def find_item_by_name(self, name: str) -> Optional[Item]:
         db_item = self.db.query(ItemModel).filter(ItemModel.name == name).first()
@@ -43,6 +142,49 @@ class SQLItemRepository(ItemRepository):
 
         return self._map_to_domain(db_item)
 
+    def search_items(
+        self, terms: List[str], limit: int, fields: Optional[Sequence[str]] = None
+    ) -> List[Item]:
+        if not terms:
+            return []
+
+        if self.db.get_bind().dialect.name == "postgresql":
+            vector = item_search_vector()
+            query = func.to_tsquery(
+                text("'simple'::regconfig"),
+                literal(" & ".join(f"{term}:*" for term in terms)),
+            )
+            statement = (
+                select_items(fields)
+                .where(vector.op("@@")(query))
+                .order_by(func.ts_rank(vector, query).desc(), ItemModel.id)
+            )
+        else:
+            # Unindexed fallback for backends without text search. Terms
+            # match the start of a word, like the prefix tsquery above
+            statement = select_items(fields).where(and_(*(
+                or_(*(
+                    column.ilike(pattern)
+                    for column in (ItemModel.name, ItemModel.description)
+                    for pattern in (f"{term}%", f"% {term}%")
+                ))
+                for term in terms
+            ))).order_by(ItemModel.name)
+
+        rows = self.db.execute(statement.limit(limit))
+        return [row_to_item(row) for row in rows]
+
+    def find_existing_item_names(self, names: Iterable[str]) -> Set[str]:
+        names = list(names)
+        existing: Set[str] = set()
+        for start in range(0, len(names), BULK_CHUNK_SIZE):
+            chunk = names[start:start + BULK_CHUNK_SIZE]
+            result = self.db.execute(
+                select(ItemModel.name).where(ItemModel.name.in_(chunk))
+            )
+            existing.update(result.scalars())
+        return existing
+
     def find_item_by_id(self, id: UUID) -> Optional[Item]:
         db_item = self.db.query(ItemModel).filter(ItemModel.id == id).first()
         if not db_item:
@@ -50,6 +192,57 @@ class SQLItemRepository(ItemRepository):
 
         return self._map_to_domain(db_item)
 
+    def find_items_by_ids(
+        self, ids: Iterable[UUID], fields: Optional[Sequence[str]] = None
+    ) -> List[Item]:
+        ids = list(ids)
+        found: Dict[UUID, Item] = {}
+        for start in range(0, len(ids), BULK_CHUNK_SIZE):
+            chunk = ids[start:start + BULK_CHUNK_SIZE]
+            rows = self.db.execute(select_items(fields).where(ItemModel.id.in_(chunk)))
+            found.update((row.id, row_to_item(row)) for row in rows)
+        return [found[id] for id in ids if id in found]
+
+    def reserve_stock(self, item_id: UUID, quantity: int) -> bool:
+        # The condition is checked against the row as the UPDATE locks it, so
+        # concurrent reservations queue on the row instead of overselling
+        return self._change_stock(
+            item_id, -quantity, ItemModel.quantity >= quantity
+        )
+
+    def release_stock(self, item_id: UUID, quantity: int) -> bool:
+        return self._change_stock(item_id, quantity)
+
+    def get_catalog_version(self) -> int:
+        # Every write gives the rows it touches a version above the one they
+        # had, so the sum grows whenever a write commits. The maximum would
+        # not: a write may commit after one that drew a higher version.
+        # Summed off the version index, without reading the rows
+        version = self.db.execute(select(func.sum(ItemModel.version))).scalar()
+        return int(version or 0)
+
+    def _change_stock(
+        self, item_id: UUID, delta: int, *conditions: ColumnElement[bool]
+    ) -> bool:
+        # Drawing the version from the sequence takes no lock beyond the
+        # row's own, so stock changes move the catalog version on without
+        # queueing reservations of different items behind each other
+        result = self.db.execute(
+            update(ItemModel)
+            .where(ItemModel.id == item_id, *conditions)
+            .values(quantity=ItemModel.quantity + delta, version=self._next_version())
+        )
+        return result.rowcount == 1
+
+    def _next_version(self) -> ColumnElement[int]:
+        if self.db.get_bind().dialect.name == "postgresql":
+            return item_version_sequence.next_value()
+        # Other backends run one write transaction at a time
+        return (
+            select(func.coalesce(func.max(ItemModel.version), 0) + 1)
+            .scalar_subquery()
+        )
+
     def _map_to_domain(self, db_item: ItemModel) -> Item:
         return Item(
             id=db_item.id,
@@ -57,4 +250,93 @@ class SQLItemRepository(ItemRepository):
             description=db_item.description,
             price=db_item.price,
             quantity=db_item.quantity
-        )
\ No newline at end of file
+        )
+
+    def _copy_items(self, items: List[Item]) -> Set[UUID]:
+        # COPY cannot skip conflicting rows, so the batch is streamed into a
+        # temporary staging table and moved over with a single
+        # INSERT ... SELECT ... ON CONFLICT DO NOTHING
+        connection = self.db.connection()
+        connection.exec_driver_sql(
+            "CREATE TEMP TABLE IF NOT EXISTS items_staging "
+            "(LIKE items INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+        connection.exec_driver_sql("TRUNCATE items_staging")
+
+        driver_connection = connection.connection.driver_connection
+        if connection.dialect.driver == "asyncpg":
+            # Runs in the greenlet of AsyncSession.run_sync, which awaits it
+            await_only(driver_connection.copy_records_to_table(
+                "items_staging",
+                records=[tuple(_to_row(item).values()) for item in items],
+                columns=ITEM_COLUMNS,
+            ))
+        else:
+            buffer = io.StringIO("".join(map(_copy_line, items)))
+            with driver_connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY items_staging ({', '.join(ITEM_COLUMNS)}) FROM STDIN",
+                    buffer,
+                )
+
+        result = connection.exec_driver_sql(
+            "INSERT INTO items (id, name, description, price, quantity, version) "
+            "SELECT id, name, description, price, quantity, "
+            f"nextval('{item_version_sequence.name}') FROM items_staging "
+            "ON CONFLICT DO NOTHING RETURNING id"
+        )
+        return {UUID(str(id)) for id in result.scalars()}
+
+    def _insert_many_items(self, items: List[Item]) -> Set[UUID]:
+        insert_ignoring_conflicts(
+            self.db,
+            ItemModel,
+            [_to_row(item) for item in items],
+            version=self._next_version(),
+        )
+
+        result = self.db.execute(
+            select(ItemModel.id).where(ItemModel.id.in_([item.id for item in items]))
+        )
+        return set(result.scalars())
+
+
+def select_items(fields: Optional[Sequence[str]] = None) -> Select:
+    # Core column selects skip ORM identity-map bookkeeping for list reads
+    # and only ship the requested columns from the database
+    columns = ItemModel.__table__.c
+    if fields is None:
+        fields = ITEM_COLUMNS
+    return select(columns.id, *(columns[name] for name in fields if name != "id"))
+
+
+def row_to_item(row: Row) -> Item:
+    return Item(**row._mapping)
+
+
+def _to_row(item: Item) -> Dict[str, Any]:
+    return {
+        "id": item.id,
+        "name": item.name,
+        "description": item.description,
+        "price": item.price,
+        "quantity": item.quantity,
+    }
+
+
+def _copy_line(item: Item) -> str:
+    values = [item.id, item.name, item.description, item.price, item.quantity]
+    return "\t".join(map(_copy_value, values)) + "\n"
+
+
+def _copy_value(value: Any) -> str:
+    """Encode a value for COPY's text format, where \\N is NULL."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
@@ -1,35 +1,34 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Set
 from uuid import UUID
-from sqlalchemy.orm import Session
+from sqlalchemy import ColumnElement, delete, exists, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
 
-from be_task_ca.domain.user.entities import User, CartItem
+from be_task_ca.domain.user.entities import CartLine, User, CartItem
+from be_task_ca.domain.user.exceptions import DuplicateEmailError
+from be_task_ca.domain.user.queries import UserShape
 from be_task_ca.domain.user.repositories import UserRepository
+from be_task_ca.infrastructure.database.dialects import (
+    insert_ignoring_conflicts,
+    upsert,
+)
+from be_task_ca.infrastructure.database.models.item_model import ItemModel
 from be_task_ca.infrastructure.database.models.user_model import UserModel, CartItemModel
 
+BULK_CHUNK_SIZE = 10000
+
 
 class SQLUserRepository(UserRepository):
     def __init__(self, db: Session):
         self.db = db
 
     def save_user(self, user: User) -> User:
-        db_user = self.db.query(UserModel).filter(UserModel.id == user.id).first()
-
-        if not db_user:
-            db_user = UserModel(
-                id=user.id,
-                email=user.email,
-                first_name=user.first_name,
-                last_name=user.last_name,
-                hashed_password=user.hashed_password,
-                shipping_address=user.shipping_address
-            )
-            self.db.add(db_user)
-        else:
-            db_user.email = user.email
-            db_user.first_name = user.first_name
-            db_user.last_name = user.last_name
-            db_user.hashed_password = user.hashed_password
-            db_user.shipping_address = user.shipping_address
+        try:
+            upsert(self.db, UserModel, _to_row(user))
+        except IntegrityError as error:
+            # The upsert only arbitrates on the id, so a taken email is the
+            # one constraint left to fail; the unit of work rolls back
+            raise DuplicateEmailError(user.email) from error
 
         if user.cart_items:
             self.db.query(CartItemModel).filter(
@@ -43,37 +42,116 @@ class SQLUserRepository(UserRepository):
                     quantity=item.quantity
                 )
                 self.db.add(db_cart_item)
+            self.db.flush()
 
-        self.db.commit()
         return user
 
-    def find_user_by_email(self, email: str) -> Optional[User]:
-        db_user = self.db.query(UserModel).filter(UserModel.email == email).first()
-        if not db_user:
-            return None
+    def insert_users(self, users: List[User]) -> List[User]:
+        inserted_ids: Set[UUID] = set()
+        for start in range(0, len(users), BULK_CHUNK_SIZE):
+            chunk = users[start:start + BULK_CHUNK_SIZE]
+            insert_ignoring_conflicts(
+                self.db, UserModel, [_to_row(user) for user in chunk]
+            )
 
-        return self._map_to_domain(db_user)
+            chunk_ids = [user.id for user in chunk]
+            result = self.db.execute(
+                select(UserModel.id).where(UserModel.id.in_(chunk_ids))
+            )
+            inserted_ids.update(result.scalars())
 
-    def find_user_by_id(self, user_id: UUID) -> Optional[User]:
-        db_user = self.db.query(UserModel).filter(UserModel.id == user_id).first()
-        if not db_user:
-            return None
+        return [user for user in users if user.id in inserted_ids]
 
-        return self._map_to_domain(db_user)
+    def find_user_by_email(
+        self, email: str, shape: UserShape = UserShape.WITH_CART
+    ) -> Optional[User]:
+        return self._find_user(UserModel.email == email, shape)
+
+    def find_user_by_id(
+        self, user_id: UUID, shape: UserShape = UserShape.WITH_CART
+    ) -> Optional[User]:
+        return self._find_user(UserModel.id == user_id, shape)
+
+    def user_exists(self, user_id: UUID) -> bool:
+        return self.db.execute(
+            select(exists().where(UserModel.id == user_id))
+        ).scalar()
 
     def find_cart_items_for_user_id(self, user_id: UUID) -> List[CartItem]:
-        db_cart_items = self.db.query(CartItemModel).filter(
-            CartItemModel.user_id == user_id
-        ).all()
+        columns = CartItemModel.__table__.c
+        rows = self.db.execute(
+            select(columns.user_id, columns.item_id, columns.quantity)
+            .where(columns.user_id == user_id)
+        )
+        return [CartItem(**row._mapping) for row in rows]
+
+    def find_cart_lines_for_user_id(self, user_id: UUID) -> List[CartLine]:
+        cart = CartItemModel.__table__.c
+        items = ItemModel.__table__.c
+        rows = self.db.execute(
+            select(cart.item_id, cart.quantity, items.name, items.price)
+            .join_from(CartItemModel, ItemModel, items.id == cart.item_id)
+            .where(cart.user_id == user_id)
+        )
+        return [CartLine(**row._mapping) for row in rows]
+
+    def add_cart_item(self, cart_item: CartItem) -> bool:
+        row = {
+            "user_id": cart_item.user_id,
+            "item_id": cart_item.item_id,
+            "quantity": cart_item.quantity,
+        }
+        return insert_ignoring_conflicts(self.db, CartItemModel, [row]) == 1
+
+    def update_cart_item_quantity(
+        self,
+        user_id: UUID,
+        item_id: UUID,
+        quantity: int,
+        expected: Optional[int] = None,
+    ) -> bool:
+        statement = update(CartItemModel).where(
+            CartItemModel.user_id == user_id, CartItemModel.item_id == item_id
+        )
+        if expected is not None:
+            # A concurrent update holds the row lock until it commits; the
+            # condition is then checked against the quantity it left behind
+            statement = statement.where(CartItemModel.quantity == expected)
+        result = self.db.execute(statement.values(quantity=quantity))
+        return result.rowcount == 1
+
+    def remove_cart_item(self, user_id: UUID, item_id: UUID) -> Optional[CartItem]:
+        quantity = self.db.execute(
+            delete(CartItemModel)
+            .where(CartItemModel.user_id == user_id, CartItemModel.item_id == item_id)
+            .returning(CartItemModel.quantity)
+        ).scalar()
+        if quantity is None:
+            return None
+        return CartItem(user_id=user_id, item_id=item_id, quantity=quantity)
+
+    def _find_user(
+        self, condition: ColumnElement[bool], shape: UserShape
+    ) -> Optional[User]:
+        if shape is UserShape.PROFILE:
+            # Plain columns, so there is no ORM instance to lazy load a cart
+            row = self.db.execute(
+                select(*UserModel.__table__.c).where(condition)
+            ).first()
+            return None if row is None else User(**row._mapping)
+
+        # The cart comes in one extra IN query instead of a lazy load per
+        # user; populate_existing refreshes instances already in the session
+        db_user = self.db.execute(
+            select(UserModel)
+            .where(condition)
+            .options(selectinload(UserModel.cart_items))
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
+        if db_user is None:
+            return None
 
-        return [
-            CartItem(
-                user_id=item.user_id,
-                item_id=item.item_id,
-                quantity=item.quantity
-            )
-            for item in db_cart_items
-        ]
+        return self._map_to_domain(db_user)
 
     def _map_to_domain(self, db_user: UserModel) -> User:
         cart_items = [
@@ -93,4 +171,15 @@ class SQLUserRepository(UserRepository):
             hashed_password=db_user.hashed_password,
             shipping_address=db_user.shipping_address,
             cart_items=cart_items
-        )
\ No newline at end of file
+        )
+
+
+def _to_row(user: User) -> Dict[str, Any]:
+    return {
+        "id": user.id,
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "hashed_password": user.hashed_password,
+        "shipping_address": user.shipping_address,
+    }
@@ -0,0 +1,25 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from be_task_ca.domain.unit_of_work import UnitOfWork
+
+
+class SQLUnitOfWork(UnitOfWork):
+    """
+    The transaction of a request's session.
+
+    SQL repositories flush their writes without committing, so a request
+    that writes several times still pays for a single commit.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def begin(self) -> None:
+        # The session opens its transaction on first use
+        pass
+
+    async def commit(self) -> None:
+        await self.db.commit()
+
+    async def rollback(self) -> None:
+        await self.db.rollback()
@@ -1,15 +1,73 @@
+from pathlib import Path
 from typing import Optional, Literal
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from be_task_ca.domain.user.repositories import UserRepository
-from be_task_ca.domain.item.repositories import ItemRepository
+from be_task_ca.config import (
+    get_admission_cheap_limit,
+    get_admission_cheap_paths,
+    get_admission_limit,
+    get_admission_queue_size,
+    get_admission_queue_timeout,
+    get_admission_retry_after,
+    get_item_cache_size,
+    get_item_cache_ttl,
+    get_memory_journal_dir,
+    get_memory_journal_fsync,
+    get_memory_journal_fsync_batch_size,
+    get_memory_journal_fsync_interval,
+    get_memory_journal_snapshot_every,
+    get_memory_shared_dir,
+    get_memory_shared_size,
+    get_password_hash_bulk_workers,
+    get_password_hash_cost,
+    get_password_hash_scheme,
+    get_password_hash_workers,
+)
+from be_task_ca.domain.unit_of_work import UnitOfWork
+from be_task_ca.domain.user.passwords import PasswordHasher
+from be_task_ca.domain.user.repositories import AsyncUserRepository, UserRepository
+from be_task_ca.domain.item.repositories import AsyncItemRepository, ItemRepository
+from be_task_ca.infrastructure.api.admission import (
+    AdmissionController,
+    ConcurrencyLimiter,
+)
 from be_task_ca.infrastructure.database.repositories.user_repository import SQLUserRepository
 from be_task_ca.infrastructure.database.repositories.item_repository import SQLItemRepository
+from be_task_ca.infrastructure.database.repositories.async_item_repository import (
+    AsyncSQLItemRepository,
+)
+from be_task_ca.infrastructure.database.repositories.async_user_repository import (
+    AsyncSQLUserRepository,
+)
+from be_task_ca.infrastructure.database.unit_of_work import SQLUnitOfWork
+from be_task_ca.infrastructure.in_memory.async_repositories import (
+    AsyncInMemoryItemRepository,
+    AsyncInMemoryUserRepository,
+)
 from be_task_ca.infrastructure.in_memory.user_repository import InMemoryUserRepository
 from be_task_ca.infrastructure.in_memory.item_repository import InMemoryItemRepository
+from be_task_ca.infrastructure.in_memory.journal import FsyncPolicy, Journal
+from be_task_ca.infrastructure.in_memory.shared_log import SharedLog
+from be_task_ca.infrastructure.in_memory.shared_repositories import (
+    SharedInMemoryItemRepository,
+    SharedInMemoryUserRepository,
+)
+from be_task_ca.infrastructure.in_memory.unit_of_work import InMemoryUnitOfWork
+from be_task_ca.infrastructure.item_cache import CachingItemRepository, ItemCache
+from be_task_ca.infrastructure.security.passwords import (
+    PooledPasswordHasher,
+    create_kdf,
+)
 
-_in_memory_user_repository = None
-_in_memory_item_repository = None
+# Plain or shared with other processes, both kinds are in-memory repositories
+_in_memory_user_repository: Optional[InMemoryUserRepository] = None
+_in_memory_item_repository: Optional[InMemoryItemRepository] = None
+_password_hasher = None
+_bulk_password_hasher = None
+_admission_controller = None
+_item_cache = None
 
 
 def get_user_repository(repository_type: Literal["sql", "memory"] = "sql",
@@ -24,15 +82,28 @@ def get_user_repository(repository_type: Literal["sql", "memory"] = "sql",
     Returns:
         Implementation of UserRepository
     """
-    global _in_memory_user_repository
-
     if repository_type == "sql":
         if db_session is None:
             raise ValueError("Database session is required for SQL repositories")
         return SQLUserRepository(db_session)
 
+    return _get_in_memory_user_repository()
+
+
+def _get_in_memory_user_repository() -> InMemoryUserRepository:
+    global _in_memory_user_repository
+
     if _in_memory_user_repository is None:
-        _in_memory_user_repository = InMemoryUserRepository()
+        shared_log = _open_shared_log("users")
+        if shared_log is not None:
+            _in_memory_user_repository = SharedInMemoryUserRepository(
+                shared_log, item_repository=_get_in_memory_item_repository()
+            )
+        else:
+            _in_memory_user_repository = InMemoryUserRepository(
+                _open_journal("users"),
+                item_repository=_get_in_memory_item_repository(),
+            )
     return _in_memory_user_repository
 
 
@@ -48,13 +119,240 @@ def get_item_repository(repository_type: Literal["sql", "memory"] = "sql",
     Returns:
         Implementation of ItemRepository
     """
-    global _in_memory_item_repository
-
     if repository_type == "sql":
         if db_session is None:
             raise ValueError("Database session is required for SQL repositories")
         return SQLItemRepository(db_session)
 
+    return _get_in_memory_item_repository()
+
+
+def _get_in_memory_item_repository() -> InMemoryItemRepository:
+    global _in_memory_item_repository
+
     if _in_memory_item_repository is None:
-        _in_memory_item_repository = InMemoryItemRepository()
-    return _in_memory_item_repository
\ No newline at end of file
+        shared_log = _open_shared_log("items")
+        if shared_log is not None:
+            _in_memory_item_repository = SharedInMemoryItemRepository(shared_log)
+        else:
+            _in_memory_item_repository = InMemoryItemRepository(_open_journal("items"))
+    return _in_memory_item_repository
+
+
+def get_async_user_repository(repository_type: Literal["sql", "memory"] = "sql",
+                              db_session: Optional[AsyncSession] = None
+                              ) -> AsyncUserRepository:
+    """
+    Get an async user repository implementation.
+
+    Args:
+        repository_type: "sql" or "memory"
+        db_session: SQLAlchemy async session (required for SQL repositories)
+
+    Returns:
+        Implementation of AsyncUserRepository
+    """
+    if repository_type == "sql":
+        if db_session is None:
+            raise ValueError("Database session is required for SQL repositories")
+        return AsyncSQLUserRepository(db_session)
+
+    return AsyncInMemoryUserRepository(_get_in_memory_user_repository())
+
+
+def get_async_item_repository(repository_type: Literal["sql", "memory"] = "sql",
+                              db_session: Optional[AsyncSession] = None,
+                              item_cache: Optional[ItemCache] = None
+                              ) -> AsyncItemRepository:
+    """
+    Get an async item repository implementation.
+
+    Args:
+        repository_type: "sql" or "memory"
+        db_session: SQLAlchemy async session (required for SQL repositories)
+        item_cache: Cache to put in front of SQL repositories, if any
+
+    Returns:
+        Implementation of AsyncItemRepository, behind `item_cache` for SQL
+        repositories when one is given
+    """
+    if repository_type == "sql":
+        if db_session is None:
+            raise ValueError("Database session is required for SQL repositories")
+        repository = AsyncSQLItemRepository(db_session)
+        if item_cache is None:
+            return repository
+        caching = CachingItemRepository(repository, item_cache)
+        # The session commits the request, so the items it wrote are dropped
+        # from the cache once other requests can read them
+        event.listen(
+            db_session.sync_session, "after_commit", lambda _: caching.committed()
+        )
+        return caching
+
+    return AsyncInMemoryItemRepository(_get_in_memory_item_repository())
+
+
+def get_item_cache() -> Optional[ItemCache]:
+    """
+    Get the item cache shared by all requests.
+
+    Returns:
+        ItemCache with the configured size and TTL, or None when
+        ITEM_CACHE_SIZE is 0
+    """
+    global _item_cache
+
+    if _item_cache is None and get_item_cache_size() > 0:
+        _item_cache = ItemCache(get_item_cache_size(), get_item_cache_ttl())
+    return _item_cache
+
+
+def get_unit_of_work(repository_type: Literal["sql", "memory"] = "sql",
+                     db_session: Optional[AsyncSession] = None) -> UnitOfWork:
+    """
+    Get the unit of work for one request.
+
+    Args:
+        repository_type: "sql" or "memory"
+        db_session: SQLAlchemy async session of the request (required for SQL)
+
+    Returns:
+        Implementation of UnitOfWork committing the request's writes at once
+    """
+    if repository_type == "sql":
+        if db_session is None:
+            raise ValueError("Database session is required for SQL repositories")
+        return SQLUnitOfWork(db_session)
+
+    return InMemoryUnitOfWork()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """
+    Get the password hasher shared by all requests.
+
+    Returns:
+        PasswordHasher running the configured KDF on a bounded thread pool
+    """
+    global _password_hasher
+
+    if _password_hasher is None:
+        kdf = create_kdf(get_password_hash_scheme(), get_password_hash_cost())
+        _password_hasher = PooledPasswordHasher(kdf, get_password_hash_workers())
+    return _password_hasher
+
+
+def get_bulk_password_hasher() -> PasswordHasher:
+    """
+    Get the password hasher for bulk signups.
+
+    Returns:
+        PasswordHasher with threads of its own, so a large batch never
+        queues ahead of single signups in the shared hasher
+    """
+    global _bulk_password_hasher
+
+    if _bulk_password_hasher is None:
+        kdf = create_kdf(get_password_hash_scheme(), get_password_hash_cost())
+        _bulk_password_hasher = PooledPasswordHasher(
+            kdf, get_password_hash_bulk_workers()
+        )
+    return _bulk_password_hasher
+
+
+def close_password_hasher() -> None:
+    """Wait for running hashes and stop the password hashers' threads."""
+    global _password_hasher, _bulk_password_hasher
+
+    for hasher in (_password_hasher, _bulk_password_hasher):
+        if hasher is not None:
+            hasher.close()
+
+    _password_hasher = None
+    _bulk_password_hasher = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """
+    Get the admission controller shared by all requests.
+
+    Returns:
+        AdmissionController with the configured limits for regular and
+        cheap routes
+    """
+    global _admission_controller
+
+    if _admission_controller is None:
+        queue_size = get_admission_queue_size()
+        queue_timeout = get_admission_queue_timeout()
+        _admission_controller = AdmissionController(
+            ConcurrencyLimiter(get_admission_limit(), queue_size, queue_timeout),
+            ConcurrencyLimiter(get_admission_cheap_limit(), queue_size, queue_timeout),
+            cheap_paths=get_admission_cheap_paths(),
+            retry_after=get_admission_retry_after(),
+        )
+    return _admission_controller
+
+
+def close_in_memory_repositories() -> None:
+    """
+    Snapshot and close the journals of the in-memory repositories.
+
+    The repositories are dropped, so the next use restores them from disk.
+    """
+    global _in_memory_user_repository, _in_memory_item_repository
+
+    for repository in (_in_memory_user_repository, _in_memory_item_repository):
+        if repository is not None:
+            repository.close()
+
+    _in_memory_user_repository = None
+    _in_memory_item_repository = None
+
+
+def _open_journal(name: str) -> Optional[Journal]:
+    """
+    Build the write-ahead log of an in-memory repository.
+
+    Args:
+        name: File name prefix of the journal within the configured directory
+
+    Returns:
+        The journal, or None when MEMORY_JOURNAL_DIR is not set
+    """
+    directory = get_memory_journal_dir()
+    if directory is None:
+        return None
+
+    return Journal(
+        Path(directory) / name,
+        fsync=FsyncPolicy(get_memory_journal_fsync()),
+        fsync_batch_size=get_memory_journal_fsync_batch_size(),
+        fsync_interval=get_memory_journal_fsync_interval(),
+        snapshot_every=get_memory_journal_snapshot_every(),
+    )
+
+
+def _open_shared_log(name: str) -> Optional[SharedLog]:
+    """
+    Open the log an in-memory repository shares with the other worker
+    processes on this node.
+
+    Args:
+        name: File name of the log within the configured directory
+
+    Returns:
+        The shared log, or None when MEMORY_SHARED_DIR is not set
+
+    Raises:
+        ValueError: When MEMORY_JOURNAL_DIR is set as well, since every
+            worker would write a journal of its own
+    """
+    directory = get_memory_shared_dir()
+    if directory is None:
+        return None
+    if get_memory_journal_dir() is not None:
+        raise ValueError("MEMORY_SHARED_DIR cannot be combined with MEMORY_JOURNAL_DIR")
+
+    return SharedLog(Path(directory) / name, get_memory_shared_size() * 1024 * 1024)
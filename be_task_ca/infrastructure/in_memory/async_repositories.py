@@ -0,0 +1,182 @@
+from itertools import islice
+from typing import (
+    AsyncContextManager,
+    AsyncIterator,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+)
+from uuid import UUID
+
+from be_task_ca.domain.item.entities import Item
+from be_task_ca.domain.item.queries import ItemPosition, ItemQuery
+from be_task_ca.domain.item.repositories import AsyncItemRepository
+from be_task_ca.domain.user.entities import CartItem, CartLine, User
+from be_task_ca.domain.user.queries import UserShape
+from be_task_ca.domain.user.repositories import AsyncUserRepository
+from be_task_ca.infrastructure.in_memory.item_repository import InMemoryItemRepository
+from be_task_ca.infrastructure.in_memory.unit_of_work import lock_replicas
+from be_task_ca.infrastructure.in_memory.user_repository import InMemoryUserRepository
+
+
+class AsyncInMemoryItemRepository(AsyncItemRepository):
+    """
+    Async port over an `InMemoryItemRepository`.
+
+    The wrapped repository never waits on I/O, so its methods are called
+    directly on the event loop. When it is shared with other processes,
+    the file locks it takes are waited for first without blocking the loop,
+    so the call finds them held and never waits in `flock`.
+    """
+
+    def __init__(self, repository: InMemoryItemRepository):
+        self.repository = repository
+
+    async def save_item(self, item: Item) -> Item:
+        async with self._locked(exclusive=True):
+            return self.repository.save_item(item)
+
+    async def insert_items(self, items: List[Item]) -> List[Item]:
+        async with self._locked(exclusive=True):
+            return self.repository.insert_items(items)
+
+    async def get_all_items(self, fields: Optional[Sequence[str]] = None) -> List[Item]:
+        async with self._locked():
+            return self.repository.get_all_items(fields)
+
+    async def get_items_page(
+        self,
+        limit: int,
+        after: Optional[UUID] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Item]:
+        async with self._locked():
+            return self.repository.get_items_page(limit, after, fields)
+
+    async def query_items(
+        self,
+        query: ItemQuery,
+        limit: int,
+        after: Optional[ItemPosition] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Item]:
+        async with self._locked():
+            return self.repository.query_items(query, limit, after, fields)
+
+    async def iter_all_items(
+        self, batch_size: int = 1000, fields: Optional[Sequence[str]] = None
+    ) -> AsyncIterator[Item]:
+        items = self.repository.iter_all_items(batch_size, fields)
+        while True:
+            # Each batch reads one page, under a lock of its own
+            async with self._locked():
+                batch = list(islice(items, batch_size))
+            for item in batch:
+                yield item
+            if len(batch) < batch_size:
+                return
+
+    async def find_item_by_name(self, name: str) -> Optional[Item]:
+        async with self._locked():
+            return self.repository.find_item_by_name(name)
+
+    async def search_items(
+        self, terms: List[str], limit: int, fields: Optional[Sequence[str]] = None
+    ) -> List[Item]:
+        async with self._locked():
+            return self.repository.search_items(terms, limit, fields)
+
+    async def find_existing_item_names(self, names: Iterable[str]) -> Set[str]:
+        async with self._locked():
+            return self.repository.find_existing_item_names(names)
+
+    async def find_item_by_id(self, id: UUID) -> Optional[Item]:
+        async with self._locked():
+            return self.repository.find_item_by_id(id)
+
+    async def find_items_by_ids(
+        self, ids: Iterable[UUID], fields: Optional[Sequence[str]] = None
+    ) -> List[Item]:
+        async with self._locked():
+            return self.repository.find_items_by_ids(ids, fields)
+
+    async def reserve_stock(self, item_id: UUID, quantity: int) -> bool:
+        async with self._locked(exclusive=True):
+            return self.repository.reserve_stock(item_id, quantity)
+
+    async def release_stock(self, item_id: UUID, quantity: int) -> bool:
+        async with self._locked(exclusive=True):
+            return self.repository.release_stock(item_id, quantity)
+
+    async def get_catalog_version(self) -> int:
+        async with self._locked():
+            return self.repository.get_catalog_version()
+
+    def _locked(self, exclusive: bool = False) -> AsyncContextManager[None]:
+        return lock_replicas([self.repository], exclusive)
+
+
+class AsyncInMemoryUserRepository(AsyncUserRepository):
+    """Async port over an `InMemoryUserRepository`, locked like the item one."""
+
+    def __init__(self, repository: InMemoryUserRepository):
+        self.repository = repository
+
+    async def save_user(self, user: User) -> User:
+        async with self._locked(exclusive=True):
+            return self.repository.save_user(user)
+
+    async def insert_users(self, users: List[User]) -> List[User]:
+        async with self._locked(exclusive=True):
+            return self.repository.insert_users(users)
+
+    async def find_user_by_email(
+        self, email: str, shape: UserShape = UserShape.WITH_CART
+    ) -> Optional[User]:
+        async with self._locked():
+            return self.repository.find_user_by_email(email, shape)
+
+    async def find_user_by_id(
+        self, user_id: UUID, shape: UserShape = UserShape.WITH_CART
+    ) -> Optional[User]:
+        async with self._locked():
+            return self.repository.find_user_by_id(user_id, shape)
+
+    async def user_exists(self, user_id: UUID) -> bool:
+        async with self._locked():
+            return self.repository.user_exists(user_id)
+
+    async def find_cart_items_for_user_id(self, user_id: UUID) -> List[CartItem]:
+        async with self._locked():
+            return self.repository.find_cart_items_for_user_id(user_id)
+
+    async def find_cart_lines_for_user_id(self, user_id: UUID) -> List[CartLine]:
+        async with self._locked():
+            return self.repository.find_cart_lines_for_user_id(user_id)
+
+    async def add_cart_item(self, cart_item: CartItem) -> bool:
+        async with self._locked(exclusive=True):
+            return self.repository.add_cart_item(cart_item)
+
+    async def update_cart_item_quantity(
+        self,
+        user_id: UUID,
+        item_id: UUID,
+        quantity: int,
+        expected: Optional[int] = None,
+    ) -> bool:
+        async with self._locked(exclusive=True):
+            return self.repository.update_cart_item_quantity(
+                user_id, item_id, quantity, expected
+            )
+
+    async def remove_cart_item(
+        self, user_id: UUID, item_id: UUID
+    ) -> Optional[CartItem]:
+        async with self._locked(exclusive=True):
+            return self.repository.remove_cart_item(user_id, item_id)
+
+    def _locked(self, exclusive: bool = False) -> AsyncContextManager[None]:
+        return lock_replicas([self.repository], exclusive)
@@ -0,0 +1,431 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+from uuid import UUID
+
+T = TypeVar("T")
+
+KeyFunction = Callable[[T], Optional[Hashable]]
+# Block and offset of an element within a SortedList
+Position = Tuple[int, int]
+
+
+class DuplicateKeyError(ValueError):
+    def __init__(self, index_name: str, key: Hashable):
+        super().__init__(f"Duplicate key for unique index '{index_name}': {key!r}")
+        self.index_name = index_name
+        self.key = key
+
+
+class HashIndex(Generic[T]):
+    """
+    Hash index from a derived key to the primary keys of the rows holding it.
+
+    Rows whose key is None are not indexed, which mirrors how SQL unique
+    constraints treat NULL values.
+    """
+
+    def __init__(self, name: str, key: KeyFunction, unique: bool = False):
+        self.name = name
+        self.key = key
+        self.unique = unique
+        self._entries: Dict[Hashable, Set[UUID]] = {}
+
+    def lookup(self, value: Hashable) -> Set[UUID]:
+        return self._entries.get(value, set())
+
+    def check(self, pk: UUID, row: T) -> None:
+        if not self.unique:
+            return
+
+        value = self.key(row)
+        if value is None:
+            return
+
+        owners = self._entries.get(value)
+        if owners and pk not in owners:
+            raise DuplicateKeyError(self.name, value)
+
+    def add(self, pk: UUID, row: T) -> None:
+        value = self.key(row)
+        if value is not None:
+            self._entries.setdefault(value, set()).add(pk)
+
+    def remove(self, pk: UUID, row: T) -> None:
+        value = self.key(row)
+        owners = self._entries.get(value) if value is not None else None
+        if not owners:
+            return
+
+        owners.discard(pk)
+        if not owners:
+            del self._entries[value]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SortedList:
+    """
+    Sorted sequence stored as a list of blocks of at most `2 * load` values,
+    in the style of the sortedcontainers package.
+
+    Inserting or removing a value bisects the block maxima and then moves
+    at most one block's elements, so it costs O(log n + load) however many
+    values there are, where `insort` into one flat list moves O(n).
+    Positions are (block, offset) pairs, which compare in sequence order.
+    """
+
+    def __init__(self, load: int = 1000):
+        self.load = load
+        self._blocks: List[List[Any]] = []
+        self._maxes: List[Any] = []
+        self._len = 0
+
+    def add(self, value: Any) -> None:
+        if not self._blocks:
+            self._blocks.append([value])
+            self._maxes.append(value)
+        else:
+            i = min(bisect_right(self._maxes, value), len(self._blocks) - 1)
+            block = self._blocks[i]
+            insort(block, value)
+            self._maxes[i] = block[-1]
+            if len(block) > 2 * self.load:
+                self._blocks.insert(i + 1, block[self.load:])
+                del block[self.load:]
+                self._maxes.insert(i, block[-1])
+        self._len += 1
+
+    def discard(self, value: Any) -> bool:
+        i, j = self.bisect_left(value)
+        if i == len(self._blocks) or self._blocks[i][j] != value:
+            return False
+
+        block = self._blocks[i]
+        del block[j]
+        if block:
+            self._maxes[i] = block[-1]
+        else:
+            del self._blocks[i]
+            del self._maxes[i]
+        self._len -= 1
+        return True
+
+    def bisect_left(
+        self, value: Any, key: Optional[Callable[[Any], Any]] = None
+    ) -> Position:
+        """Position of the first element not less than `value`."""
+        i = bisect_left(self._maxes, value, key=key)
+        if i == len(self._blocks):
+            return self.end
+        return i, bisect_left(self._blocks[i], value, key=key)
+
+    def bisect_right(
+        self, value: Any, key: Optional[Callable[[Any], Any]] = None
+    ) -> Position:
+        """Position of the first element greater than `value`."""
+        i = bisect_right(self._maxes, value, key=key)
+        if i == len(self._blocks):
+            return self.end
+        return i, bisect_right(self._blocks[i], value, key=key)
+
+    @property
+    def start(self) -> Position:
+        return 0, 0
+
+    @property
+    def end(self) -> Position:
+        return len(self._blocks), 0
+
+    def iterate(
+        self, start: Position, stop: Position, reverse: bool = False
+    ) -> Iterator[Any]:
+        """Yield the elements from `start` up to, not including, `stop`."""
+        if start >= stop:
+            return
+        (first, offset), (last, stop_offset) = start, stop
+        blocks = range(first, min(last, len(self._blocks) - 1) + 1)
+        for i in reversed(blocks) if reverse else blocks:
+            # Sliced, so a block split while the caller holds the iterator
+            # cannot make it skip or repeat elements of this block
+            chunk = self._blocks[i][
+                offset if i == first else 0:stop_offset if i == last else None
+            ]
+            yield from reversed(chunk) if reverse else chunk
+
+    def __iter__(self) -> Iterator[Any]:
+        return self.iterate(self.start, self.end)
+
+    def __len__(self) -> int:
+        return self._len
+
+
+class SortedIndex(Generic[T]):
+    """
+    Ordered index of (key, primary key) pairs supporting keyset scans.
+
+    Entries are kept in a `SortedList` and found with bisect, so ordered
+    reads start in O(log n) from any position instead of sorting every row,
+    and writes stay cheap as the table grows.
+    """
+
+    def __init__(self, name: str, key: KeyFunction):
+        self.name = name
+        self.key = key
+        self._entries = SortedList()
+
+    def check(self, pk: UUID, row: T) -> None:
+        pass
+
+    def add(self, pk: UUID, row: T) -> None:
+        value = self.key(row)
+        if value is not None:
+            self._entries.add((value, pk))
+
+    def remove(self, pk: UUID, row: T) -> None:
+        value = self.key(row)
+        if value is not None:
+            self._entries.discard((value, pk))
+
+    def scan(
+        self,
+        after: Optional[Tuple[Any, UUID]] = None,
+        low: Any = None,
+        high: Any = None,
+        reverse: bool = False,
+    ) -> Iterator[UUID]:
+        """
+        Yield primary keys in key order, starting strictly after `after`.
+
+        `low` and `high` are inclusive key bounds found with bisect, so a
+        range read never visits entries outside of it. With `reverse` keys
+        are yielded from the highest down and `after` is passed going down.
+        """
+        entries = self._entries
+        start = entries.start
+        if low is not None:
+            start = entries.bisect_left(low, key=_entry_key)
+        stop = entries.end
+        if high is not None:
+            stop = entries.bisect_right(high, key=_entry_key)
+
+        if reverse:
+            if after is not None:
+                stop = min(stop, entries.bisect_left(after))
+        elif after is not None:
+            start = max(start, entries.bisect_right(after))
+
+        for _, pk in entries.iterate(start, stop, reverse):
+            yield pk
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class InvertedIndex(Generic[T]):
+    """
+    Full-text index from terms to the rows containing them.
+
+    `key` maps a row to its terms and their weights. Terms are also kept in
+    a sorted list, so every term sharing a prefix can be found with bisect
+    for autocomplete-style queries.
+    """
+
+    EXACT_MATCH_BOOST = 2.0
+
+    def __init__(self, name: str, key: Callable[[T], Dict[str, float]]):
+        self.name = name
+        self.key = key
+        self._postings: Dict[str, Dict[UUID, float]] = {}
+        self._terms = SortedList()
+
+    def check(self, pk: UUID, row: T) -> None:
+        pass
+
+    def add(self, pk: UUID, row: T) -> None:
+        for term, weight in self.key(row).items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = {}
+                self._terms.add(term)
+            posting[pk] = weight
+
+    def remove(self, pk: UUID, row: T) -> None:
+        for term in self.key(row):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+
+            posting.pop(pk, None)
+            if not posting:
+                del self._postings[term]
+                self._terms.discard(term)
+
+    def search(self, terms: List[str], limit: int) -> List[UUID]:
+        """
+        Return the best `limit` rows containing every term, as a prefix.
+
+        A row scores the weight of its best matching term for each query
+        term, doubled when the term matches exactly rather than by prefix.
+        """
+        if not terms:
+            return []
+
+        per_term = sorted((self._prefix_matches(term) for term in terms), key=len)
+        scores = per_term[0]
+        for matches in per_term[1:]:
+            scores = {
+                pk: score + matches[pk] for pk, score in scores.items() if pk in matches
+            }
+            if not scores:
+                return []
+
+        best = heapq.nsmallest(
+            limit, scores.items(), key=lambda entry: (-entry[1], entry[0])
+        )
+        return [pk for pk, _ in best]
+
+    def _prefix_matches(self, prefix: str) -> Dict[UUID, float]:
+        matches: Dict[UUID, float] = {}
+        start = self._terms.bisect_left(prefix)
+        for term in self._terms.iterate(start, self._terms.end):
+            if not term.startswith(prefix):
+                break
+            boost = self.EXACT_MATCH_BOOST if term == prefix else 1.0
+            for pk, weight in self._postings[term].items():
+                score = weight * boost
+                if score > matches.get(pk, 0.0):
+                    matches[pk] = score
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+
+Index = Union[HashIndex[T], SortedIndex[T], InvertedIndex[T]]
+
+
+def _entry_key(entry: Tuple[Any, UUID]) -> Any:
+    return entry[0]
+
+
+class IndexedTable(Generic[T]):
+    """
+    Primary-key keyed row store that keeps its secondary indexes in sync.
+
+    Every write goes through `put`, which validates all unique indexes before
+    touching any of them, so a rejected row leaves the table unchanged.
+    """
+
+    def __init__(self, primary_key: Callable[[T], UUID]):
+        self.primary_key = primary_key
+        self.rows: Dict[UUID, T] = {}
+        self._indexes: Dict[str, Index] = {}
+
+    def add_index(self, name: str, key: KeyFunction, unique: bool = False) -> None:
+        self._register(HashIndex(name, key, unique))
+
+    def add_sorted_index(self, name: str, key: KeyFunction) -> None:
+        self._register(SortedIndex(name, key))
+
+    def add_inverted_index(
+        self, name: str, key: Callable[[T], Dict[str, float]]
+    ) -> None:
+        self._register(InvertedIndex(name, key))
+
+    def has_index(self, name: str) -> bool:
+        return name in self._indexes
+
+    def put(self, row: T) -> None:
+        pk = self.primary_key(row)
+        previous = self.rows.get(pk)
+
+        for index in self._indexes.values():
+            index.check(pk, row)
+
+        for index in self._indexes.values():
+            if previous is not None:
+                if index.key(previous) == index.key(row):
+                    continue
+                index.remove(pk, previous)
+            index.add(pk, row)
+
+        self.rows[pk] = row
+
+    def insert_many(self, rows: Iterable[T]) -> List[T]:
+        """Insert new rows, skipping those whose primary or unique keys are taken."""
+        inserted = []
+        for row in rows:
+            if self.primary_key(row) in self.rows:
+                continue
+            try:
+                self.put(row)
+            except DuplicateKeyError:
+                continue
+            inserted.append(row)
+        return inserted
+
+    def delete(self, pk: UUID) -> Optional[T]:
+        row = self.rows.pop(pk, None)
+        if row is not None:
+            for index in self._indexes.values():
+                index.remove(pk, row)
+        return row
+
+    def find(self, index_name: str, value: Hashable) -> List[T]:
+        index = self._get_index(index_name, HashIndex)
+        return [self.rows[pk] for pk in index.lookup(value)]
+
+    def find_one(self, index_name: str, value: Hashable) -> Optional[T]:
+        for pk in self._get_index(index_name, HashIndex).lookup(value):
+            return self.rows[pk]
+        return None
+
+    def scan(
+        self,
+        index_name: str,
+        after: Optional[Tuple[Any, UUID]] = None,
+        low: Any = None,
+        high: Any = None,
+        reverse: bool = False,
+    ) -> Iterator[T]:
+        index = self._get_index(index_name, SortedIndex)
+        for pk in index.scan(after, low, high, reverse):
+            yield self.rows[pk]
+
+    def search(self, index_name: str, terms: List[str], limit: int) -> List[T]:
+        index = self._get_index(index_name, InvertedIndex)
+        return [self.rows[pk] for pk in index.search(terms, limit)]
+
+    def _register(self, index: Index) -> None:
+        if index.name in self._indexes:
+            raise ValueError(f"Index '{index.name}' is already registered")
+
+        for pk, row in self.rows.items():
+            index.check(pk, row)
+            index.add(pk, row)
+
+        self._indexes[index.name] = index
+
+    def _get_index(self, name: str, kind: type) -> Any:
+        index = self._indexes.get(name)
+        if index is None:
+            raise KeyError(f"Unknown index '{name}'")
+        if not isinstance(index, kind):
+            raise TypeError(f"Index '{name}' is not a {kind.__name__}")
+        return index
@@ -1,16 +1,317 @@
-from typing import Dict, List, Optional
+import dataclasses
+import heapq
+import time
+from concurrent.futures import Future
+from itertools import islice
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+)
 from uuid import UUID
 
 from be_task_ca.domain.item.entities import Item
+from be_task_ca.domain.item.exceptions import DuplicateItemNameError
+from be_task_ca.domain.item.queries import ItemPosition, ItemQuery, ItemSort
 from be_task_ca.domain.item.repositories import ItemRepository
+from be_task_ca.domain.item.search import tokenize
+from be_task_ca.infrastructure.in_memory.indexes import (
+    DuplicateKeyError,
+    IndexedTable,
+    KeyFunction,
+)
+from be_task_ca.infrastructure.in_memory.journal import Journal, Record
+from be_task_ca.infrastructure.in_memory.unit_of_work import (
+    Undo,
+    current_unit_of_work,
+    has_uncommitted_writes,
+    record_write,
+    uncommitted_writes,
+)
 
 
 class InMemoryItemRepository(ItemRepository):
-    def __init__(self):
-        self.items: Dict[UUID, Item] = {}
+    def __init__(self, journal: Optional[Journal] = None):
+        self._table: IndexedTable[Item] = IndexedTable(lambda item: item.id)
+        self._table.add_index("name", lambda item: item.name, unique=True)
+        self._table.add_sorted_index("id", lambda item: item.id)
+        self._table.add_sorted_index("price", lambda item: item.price)
+        self._table.add_inverted_index("search", _search_terms)
+        self.items: Dict[UUID, Item] = self._table.rows
+        # Seeded from the clock so versions keep increasing across restarts
+        # and clients never revalidate against a previous process's data
+        self.catalog_version = time.time_ns()
+
+        self._journal = journal
+        if journal is not None:
+            self._restore(journal)
 
     def save_item(self, item: Item) -> Item:
-        stored_item = Item(
+        stored_item = self._copy(item)
+        previous = self.items.get(item.id)
+        try:
+            self._table.put(stored_item)
+        except DuplicateKeyError as error:
+            raise DuplicateItemNameError(item.name) from error
+        self.catalog_version += 1
+        record = _item_to_record(stored_item)
+        if previous is not None:
+            # Stock is journaled as the change to the replaced row, so stock
+            # moved by requests that commit before this one is not undone
+            record["delta"] = stored_item.quantity - previous.quantity
+        self._write(
+            "save_item",
+            record,
+            lambda: self._restore_item(stored_item, previous),
+        )
+        return item
+
+    def insert_items(self, items: List[Item]) -> List[Item]:
+        inserted = self._table.insert_many(self._copy(item) for item in items)
+        inserted_ids = {item.id for item in inserted}
+        if inserted:
+            self.catalog_version += 1
+            self._write(
+                "insert_items",
+                [_item_to_record(item) for item in inserted],
+                lambda: self._delete_items(inserted_ids),
+            )
+        return [item for item in items if item.id in inserted_ids]
+
+    def get_all_items(self, fields: Optional[Sequence[str]] = None) -> List[Item]:
+        return [self._project(item, fields) for item in self.items.values()]
+
+    def get_items_page(
+        self,
+        limit: int,
+        after: Optional[UUID] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Item]:
+        position = (after, after) if after is not None else None
+        page = islice(self._table.scan("id", position), limit)
+        return [self._project(item, fields) for item in page]
+
+    def query_items(
+        self,
+        query: ItemQuery,
+        limit: int,
+        after: Optional[ItemPosition] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Item]:
+        if query.sorts_by_price:
+            candidates = self._scan_prices(query, after)
+        elif query.has_price_range:
+            # Range scan on price, then order the much smaller match set by id
+            after_id = after[1] if after is not None else None
+            candidates = heapq.nsmallest(
+                limit,
+                (
+                    item for item in self._scan_prices(query)
+                    if query.matches(item) and (after_id is None or item.id > after_id)
+                ),
+                key=lambda item: item.id,
+            )
+        else:
+            candidates = self._table.scan("id", after)
+
+        matches = (item for item in candidates if query.matches(item))
+        return [self._project(item, fields) for item in islice(matches, limit)]
+
+    def iter_all_items(
+        self, batch_size: int = 1000, fields: Optional[Sequence[str]] = None
+    ) -> Iterator[Item]:
+        # Walk the id index page by page so concurrent saves cannot break the
+        # iteration the way mutating `self.items` during a dict scan would
+        after = None
+        while True:
+            page = self.get_items_page(batch_size, after, fields)
+            yield from page
+            if len(page) < batch_size:
+                return
+            after = page[-1].id
+
+    def find_item_by_name(self, name: str) -> Optional[Item]:
+        return self._table.find_one("name", name)
+
+    def search_items(
+        self, terms: List[str], limit: int, fields: Optional[Sequence[str]] = None
+    ) -> List[Item]:
+        return [
+            self._project(item, fields)
+            for item in self._table.search("search", terms, limit)
+        ]
+
+    def find_existing_item_names(self, names: Iterable[str]) -> Set[str]:
+        return {name for name in names if self._table.find_one("name", name)}
+
+    def find_item_by_id(self, id: UUID) -> Optional[Item]:
+        return self.items.get(id)
+
+    def find_items_by_ids(
+        self, ids: Iterable[UUID], fields: Optional[Sequence[str]] = None
+    ) -> List[Item]:
+        return [
+            self._project(self.items[id], fields) for id in ids if id in self.items
+        ]
+
+    def reserve_stock(self, item_id: UUID, quantity: int) -> bool:
+        # Check and decrement happen with no await in between, so requests
+        # served concurrently on the event loop cannot interleave here
+        item = self.items.get(item_id)
+        if item is None or item.quantity < quantity:
+            return False
+        if self._inserted_by_another_request(item_id):
+            return False
+        self._move_stock(item, -quantity)
+        return True
+
+    def release_stock(self, item_id: UUID, quantity: int) -> bool:
+        item = self.items.get(item_id)
+        if item is None:
+            return False
+        self._move_stock(item, quantity)
+        return True
+
+    def get_catalog_version(self) -> int:
+        return self.catalog_version
+
+    def register_index(self, name: str, key: KeyFunction, unique: bool = False) -> None:
+        self._table.add_index(name, key, unique)
+
+    def find_items_by_index(self, name: str, value: Hashable) -> List[Item]:
+        return self._table.find(name, value)
+
+    def close(self) -> None:
+        """Snapshot the journal so the next start has no log to replay."""
+        if self._journal is None:
+            return
+        if self._journal.records_since_snapshot:
+            self._journal.write_snapshot(self._snapshot())
+        self._journal.close()
+
+    def _move_stock(self, item: Item, delta: int) -> None:
+        # Journaled as the delta, not the row: the row may hold stock moved
+        # by requests that have not committed yet and may still roll back
+        self._adjust_quantity(item.id, delta)
+        self._write(
+            "move_stock",
+            {"id": str(item.id), "delta": delta},
+            lambda: self._adjust_quantity(item.id, -delta),
+        )
+
+    def _inserted_by_another_request(self, id: UUID) -> bool:
+        # Such a row is journaled when that request commits, so stock moved
+        # on it and committed earlier would have no row to replay onto
+        key = str(id)
+        current = current_unit_of_work()
+        for unit_of_work, (operation, data) in uncommitted_writes(self):
+            if unit_of_work is current:
+                continue
+            if operation == "save_item" and "delta" not in data and data["id"] == key:
+                return True
+            if operation == "insert_items" and any(row["id"] == key for row in data):
+                return True
+        return False
+
+    def _restore_item(self, stored_item: Item, previous: Optional[Item]) -> None:
+        if previous is None:
+            self._table.delete(stored_item.id)
+        else:
+            # Stock moved since by other requests is journaled as deltas on
+            # top of the previous row, so it is carried over
+            current = self.items.get(stored_item.id, stored_item)
+            moved = current.quantity - stored_item.quantity
+            try:
+                self._table.put(
+                    dataclasses.replace(previous, quantity=previous.quantity + moved)
+                )
+            except DuplicateKeyError:
+                # Another request has taken the old name since; its write wins
+                pass
+        self.catalog_version += 1
+
+    def _delete_items(self, ids: Iterable[UUID]) -> None:
+        for id in ids:
+            self._table.delete(id)
+        self.catalog_version += 1
+
+    def _adjust_quantity(self, id: UUID, delta: int) -> None:
+        # Stored items may have been handed out by reads, so they are
+        # replaced rather than changed in place
+        item = self.items.get(id)
+        if item is not None:
+            self._table.put(dataclasses.replace(item, quantity=item.quantity + delta))
+            self.catalog_version += 1
+
+    def _write(self, operation: str, data: Any, undo: Undo) -> None:
+        record_write(self, operation, data, self._log, undo)
+
+    def _log(self, records: List[Record]) -> Optional["Future[None]"]:
+        # Records are appended once the change is applied and validated, but
+        # before the write is acknowledged to the caller
+        if self._journal is None:
+            return None
+        # A snapshot is a copy of the whole table, so it waits until no
+        # request holds writes that may still be rolled back
+        if has_uncommitted_writes(self):
+            return self._journal.submit(records)
+        return self._journal.submit(records, self._snapshot)
+
+    def _snapshot(self) -> List[Dict[str, Any]]:
+        return [_item_to_record(item) for item in self.items.values()]
+
+    def _restore(self, journal: Journal) -> None:
+        state, records = journal.recover()
+        for record in state or []:
+            self._table.put(_item_from_record(record))
+
+        for operation, data in records:
+            self._apply(operation, data)
+
+    def _apply(self, operation: str, data: Any) -> None:
+        if operation == "save_item":
+            self._put_saved(data)
+        elif operation == "move_stock":
+            self._adjust_quantity(UUID(data["id"]), data["delta"])
+        elif operation == "insert_items":
+            self._table.insert_many(map(_item_from_record, data))
+        else:
+            raise ValueError(f"Unknown journal operation '{operation}'")
+
+    def _put_saved(self, record: Dict[str, Any]) -> None:
+        fields = dict(record)
+        delta = fields.pop("delta", None)
+        item = _item_from_record(fields)
+        current = self.items.get(item.id)
+        if delta is not None and current is not None:
+            item = dataclasses.replace(item, quantity=current.quantity + delta)
+        self._table.put(item)
+
+    def _scan_prices(
+        self, query: ItemQuery, after: Optional[ItemPosition] = None
+    ) -> Iterator[Item]:
+        return self._table.scan(
+            "price",
+            after,
+            low=query.min_price,
+            high=query.max_price,
+            reverse=query.sort is ItemSort.PRICE_DESC,
+        )
+
+    def _project(self, item: Item, fields: Optional[Sequence[str]]) -> Item:
+        if fields is None:
+            return item
+        values = {name: getattr(item, name) for name in fields if name != "id"}
+        return Item(id=item.id, **values)
+
+    def _copy(self, item: Item) -> Item:
+        return Item(
             id=item.id,
             name=item.name,
             description=item.description,
@@ -18,17 +319,24 @@ class InMemoryItemRepository(ItemRepository):
             quantity=item.quantity
         )
 
-        self.items[item.id] = stored_item
-        return item
 
-    def get_all_items(self) -> List[Item]:
-        return list(self.items.values())
+def _item_to_record(item: Item) -> Dict[str, Any]:
+    return {
+        "id": str(item.id),
+        "name": item.name,
+        "description": item.description,
+        "price": item.price,
+        "quantity": item.quantity,
+    }
 
-    def find_item_by_name(self, name: str) -> Optional[Item]:
-        for item in self.items.values():
-            if item.name == name:
-                return item
-        return None
 
-    def find_item_by_id(self, id: UUID) -> Optional[Item]:
-        return self.items.get(id)
\ No newline at end of file
+def _item_from_record(record: Dict[str, Any]) -> Item:
+    return Item(**{**record, "id": UUID(record["id"])})
+
+
+def _search_terms(item: Item) -> Dict[str, float]:
+    # Name matches rank above description matches, like the 'A' and 'B'
+    # weights of the PostgreSQL search vector
+    terms = dict.fromkeys(tokenize(item.description), 0.4)
+    terms.update(dict.fromkeys(tokenize(item.name), 1.0))
+    return terms
@@ -0,0 +1,232 @@
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+Record = Tuple[str, Any]
+
+
+class FsyncPolicy(str, Enum):
+    """
+    When journal writes are forced to disk.
+
+    Every record is written to the OS as soon as it is appended, so a crash
+    of the process never loses acknowledged writes. The policy only decides
+    how much a power loss or kernel crash can take with it.
+    """
+
+    ALWAYS = "always"
+    BATCH = "batch"
+    INTERVAL = "interval"
+
+
+class Journal:
+    """
+    Append-only write-ahead log with compacting snapshots.
+
+    Records are JSON lines in `<path>.wal`, each tagged with a sequence
+    number. A snapshot in `<path>.snapshot.json` holds the full state up to
+    a sequence number; once it is safely on disk the log is truncated, so
+    recovery only ever replays the records written since the last snapshot.
+
+    Writes go through one writer thread, in the order they were submitted,
+    so serializing records, writing them and syncing the file never run on
+    the thread that submits them.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        fsync: FsyncPolicy = FsyncPolicy.BATCH,
+        fsync_batch_size: int = 64,
+        fsync_interval: float = 1.0,
+        snapshot_every: int = 10000,
+    ):
+        self.path = Path(path)
+        self.fsync = FsyncPolicy(fsync)
+        self.fsync_batch_size = fsync_batch_size
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+
+        self._wal_path = self.path.with_name(self.path.name + ".wal")
+        self._snapshot_path = self.path.with_name(self.path.name + ".snapshot.json")
+        self._lock = threading.Lock()
+        self._sequence = 0
+        # Counted as records are submitted, so it includes those still queued
+        self._submitted_lock = threading.Lock()
+        self._records_since_snapshot = 0
+        self._writer = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="journal-writer"
+        )
+        self._unsynced = 0
+        self._file = None
+        self._stopped = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    def recover(self) -> Tuple[Optional[Any], List[Record]]:
+        """
+        Open the journal and return the last snapshot state and the records
+        appended after it, in order. Must be called before `append`.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        state = None
+        snapshot_sequence = 0
+        if self._snapshot_path.exists():
+            with self._snapshot_path.open(encoding="utf-8") as snapshot_file:
+                snapshot = json.load(snapshot_file)
+            state = snapshot["state"]
+            snapshot_sequence = self._sequence = snapshot["sequence"]
+
+        records: List[Record] = []
+        valid_size = 0
+        if self._wal_path.exists():
+            for sequence, operation, data, end in self._read_wal():
+                valid_size = end
+                # Records older than the snapshot are left behind when a
+                # crash hits between writing a snapshot and truncating the log
+                if sequence > snapshot_sequence:
+                    records.append((operation, data))
+                    self._sequence = sequence
+
+        self._file = open(self._wal_path, "ab")
+        # Drop a record torn by a crash in the middle of a write
+        self._file.truncate(valid_size)
+        self._records_since_snapshot = len(records)
+
+        if self.fsync is FsyncPolicy.INTERVAL:
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, name="journal-fsync", daemon=True
+            )
+            self._flusher.start()
+
+        return state, records
+
+    def append(self, operation: str, data: Any) -> None:
+        self.append_many([(operation, data)])
+
+    def append_many(self, records: Iterable[Record]) -> None:
+        """Append records in one write and wait until they are written."""
+        self.submit(list(records)).result()
+
+    def submit(
+        self, records: List[Record], snapshot: Optional[Callable[[], Any]] = None
+    ) -> "Future[None]":
+        """
+        Queue records to be appended in one write, so they are synced at most
+        once, and return a future that completes once they are written.
+
+        When these records make a snapshot due, `snapshot` is called right
+        away to capture the state they leave behind; the state is written
+        after them on the writer thread.
+        """
+        with self._submitted_lock:
+            self._records_since_snapshot += len(records)
+            state = None
+            if snapshot is not None and self.snapshot_due:
+                state = snapshot()
+                self._records_since_snapshot = 0
+        return self._writer.submit(self._write, records, state)
+
+    def _write(self, records: List[Record], state: Optional[Any]) -> None:
+        self._append(records)
+        if state is not None:
+            self._write_snapshot(state)
+
+    def _append(self, records: List[Record]) -> None:
+        with self._lock:
+            lines = []
+            for operation, data in records:
+                self._sequence += 1
+                lines.append(json.dumps(
+                    {"seq": self._sequence, "op": operation, "data": data},
+                    separators=(",", ":"),
+                ))
+            self._file.write("".join(line + "\n" for line in lines).encode("utf-8"))
+            self._file.flush()
+            self._unsynced += len(lines)
+
+            if self.fsync is FsyncPolicy.ALWAYS or (
+                self.fsync is FsyncPolicy.BATCH
+                and self._unsynced >= self.fsync_batch_size
+            ):
+                self._sync()
+
+    @property
+    def records_since_snapshot(self) -> int:
+        return self._records_since_snapshot
+
+    @property
+    def snapshot_due(self) -> bool:
+        return self._records_since_snapshot >= self.snapshot_every
+
+    def write_snapshot(self, state: Any) -> None:
+        """Persist `state` as of the last submitted record and compact the log."""
+        with self._submitted_lock:
+            self._records_since_snapshot = 0
+            written = self._writer.submit(self._write_snapshot, state)
+        written.result()
+
+    def _write_snapshot(self, state: Any) -> None:
+        with self._lock:
+            temporary_path = self._snapshot_path.with_suffix(".tmp")
+            with temporary_path.open("w", encoding="utf-8") as snapshot_file:
+                json.dump({"sequence": self._sequence, "state": state}, snapshot_file)
+                snapshot_file.flush()
+                os.fsync(snapshot_file.fileno())
+            os.replace(temporary_path, self._snapshot_path)
+            _fsync_directory(self.path.parent)
+
+            self._file.truncate(0)
+            self._sync()
+
+    def sync(self) -> None:
+        with self._lock:
+            self._sync()
+
+    def close(self) -> None:
+        self._writer.shutdown(wait=True)
+        self._stopped.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            if self._file is not None and not self._file.closed:
+                self._sync()
+                self._file.close()
+
+    def _sync(self) -> None:
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def _flush_periodically(self) -> None:
+        while not self._stopped.wait(self.fsync_interval):
+            with self._lock:
+                if self._unsynced and not self._file.closed:
+                    self._sync()
+
+    def _read_wal(self) -> Iterator[Tuple[int, str, Any, int]]:
+        end = 0
+        with self._wal_path.open("rb") as wal_file:
+            for line in wal_file:
+                if not line.endswith(b"\n"):
+                    return
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    return
+                end += len(line)
+                yield record["seq"], record["op"], record["data"], end
+
+
+def _fsync_directory(directory: Path) -> None:
+    # Makes the rename of a new snapshot durable; not supported on Windows
+    if os.name == "nt":
+        return
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
@@ -0,0 +1,331 @@
+import asyncio
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from be_task_ca.infrastructure.in_memory.journal import Record
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+MAGIC = b"BTCASHL2"
+HEADER = struct.Struct("<8sQQQQQQQ")
+FRAME_LENGTH = struct.Struct("<I")
+# Versions of successive generations never overlap, whatever the file size
+GENERATION_SPAN = 1 << 40
+# Seconds the event loop sleeps before trying a lock another process holds
+# again, doubling up to the maximum
+LOCK_RETRY_DELAY = 0.0005
+LOCK_RETRY_MAX_DELAY = 0.02
+
+# The version after a frame and the frame's records
+Frame = Tuple[int, List[Record]]
+
+
+class SharedLogFullError(Exception):
+    """The shared log cannot hold even a snapshot of the current state."""
+
+
+class _Header(NamedTuple):
+    magic: bytes
+    epoch: int
+    generation: int
+    # Where the generation's frames start, where they must end and how many
+    # bytes of them are used
+    start: int
+    end: int
+    used: int
+    # The same for the previous generation, which is kept until the next one
+    previous_start: int
+    previous_used: int
+
+
+class SharedLog:
+    """
+    Log of writes in a memory-mapped file that every process on a node
+    opens, so they all replay the same writes in the same order.
+
+    A frame is a length followed by a JSON list of records. Writers hold an
+    exclusive `flock` on the file while they catch up and append; readers
+    hold a shared one while they catch up. Each generation of frames takes
+    one half of the file. When it is full, the writer starts a new
+    generation in the other half with a snapshot of the state the log
+    held, followed by the records it appends. Processes that are one
+    generation behind finish reading the previous one and skip the
+    snapshot; the others replay the new generation from it.
+
+    The file is grown, never shrunk, to the size it is opened with; other
+    processes remap it when they next take the lock. The header's epoch is
+    set when the file is created, so versions derived from the log keep
+    increasing across restarts.
+    """
+
+    def __init__(self, path: Path, capacity: int):
+        if fcntl is None:
+            raise RuntimeError("The shared in-memory store needs fcntl (Unix)")
+        if capacity <= HEADER.size:
+            raise ValueError(f"capacity must be larger than {HEADER.size} bytes")
+        self.path = Path(path)
+        self.capacity = capacity
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._exclusive = False
+        self._fd: Optional[int] = None
+        self._map: Optional[mmap.mmap] = None
+        self._pid: Optional[int] = None
+        # Generation and offset of the next frame this process has not read
+        self._generation: Optional[int] = None
+        self._offset = 0
+        self._open()
+
+    @contextmanager
+    def locked(self, exclusive: bool = False, blocking: bool = True) -> Iterator[None]:
+        """
+        Hold the file lock, re-entrantly within this process. An exclusive
+        lock cannot be taken while a shared one is held. Unless `blocking`,
+        raises BlockingIOError at once when another process holds the lock.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked after opening: the lock and the mapping belong to
+                # the parent
+                self._reopen()
+            if self._depth == 0:
+                operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+                if not blocking:
+                    operation |= fcntl.LOCK_NB
+                fcntl.flock(self._fd, operation)
+                self._exclusive = exclusive
+                if os.fstat(self._fd).st_size != self.capacity:
+                    # Grown by a process opened with a larger size
+                    self._map_file()
+            elif exclusive and not self._exclusive:
+                raise RuntimeError("Cannot upgrade a shared lock on the shared log")
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def read(self) -> List[Record]:
+        """Records appended by other processes since the last call, in order."""
+        return [record for _, records in self.read_frames() for record in records]
+
+    def read_frames(self) -> List[Frame]:
+        """Like `read`, frame by frame, each with the version after it."""
+        self._check_locked()
+        header = self._header()
+        frames: List[Frame] = []
+        skip_snapshot = False
+        if header.generation != self._generation:
+            if self._generation == header.generation - 1:
+                # The rest of the previous generation is still there, and the
+                # snapshot that starts the new one holds nothing beyond it
+                frames = self._read(
+                    header, self._generation, header.previous_start,
+                    header.previous_used,
+                )
+                skip_snapshot = True
+            self._generation = header.generation
+            self._offset = 0
+
+        new_frames = self._read(header, header.generation, header.start, header.used)
+        if skip_snapshot and new_frames:
+            version, records = new_frames[0]
+            new_frames[0] = (version, records[1:])
+        return frames + new_frames
+
+    def records(self) -> List[Record]:
+        """Every record of the current generation, from its snapshot on."""
+        self._check_locked()
+        header = self._header()
+        return [
+            record
+            for _, records in self._frames(header.start, 0, header.used)
+            for record in records
+        ]
+
+    def append(self, records: List[Record], snapshot: Callable[[], Any]) -> None:
+        """
+        Append `records`, which this process has already applied. When they
+        do not fit, a new generation starts with `snapshot()`, which must be
+        the state the log holds without them. Needs the exclusive lock and a
+        caught-up reader.
+        """
+        self._check_locked(exclusive=True)
+        header = self._header()
+        if header.generation != self._generation or header.used != self._offset:
+            raise RuntimeError("Appending to the shared log without catching up")
+
+        frame = self._frame(records)
+        if header.start + header.used + len(frame) > header.end:
+            frame = self._frame([("snapshot", snapshot()), *records])
+            start, end = self._other_half(header.start)
+            if start + len(frame) > end:
+                raise SharedLogFullError(
+                    f"{self.path} cannot hold the data, raise its size"
+                )
+            header = header._replace(
+                generation=header.generation + 1,
+                start=start,
+                end=end,
+                used=0,
+                previous_start=header.start,
+                previous_used=header.used,
+            )
+
+        position = header.start + header.used
+        self._map[position:position + len(frame)] = frame
+        # The header is written last, so a crash mid-frame leaves it unseen
+        header = header._replace(used=header.used + len(frame))
+        HEADER.pack_into(self._map, 0, *header)
+        self._generation = header.generation
+        self._offset = header.used
+
+    @property
+    def version(self) -> int:
+        """Increases with every append, also across generations and restarts."""
+        self._check_locked()
+        header = self._header()
+        return self._version(header.epoch, header.generation, header.used)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                os.close(self._fd)
+                self._map = None
+                self._fd = None
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._pid = os.getpid()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            # Only ever grown, so processes still opened with a smaller size
+            # keep mapping the whole file
+            if os.fstat(self._fd).st_size < self.capacity:
+                os.ftruncate(self._fd, self.capacity)
+            self._map_file()
+            if self._header().magic != MAGIC:
+                start, end = HEADER.size, self._middle()
+                HEADER.pack_into(
+                    self._map, 0, MAGIC, time.time_ns(), 0, start, end, 0, start, 0
+                )
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _reopen(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+        self._map = None
+        self._depth = 0
+        self._open()
+
+    def _map_file(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        self.capacity = os.fstat(self._fd).st_size
+        self._map = mmap.mmap(self._fd, self.capacity)
+
+    def _header(self) -> _Header:
+        return _Header(*HEADER.unpack_from(self._map, 0))
+
+    def _other_half(self, start: int) -> Tuple[int, int]:
+        # Where the generation after the one at `start` goes. The file may
+        # have grown meanwhile, but the halves never overlap: the first
+        # half ends where the second one starts, and the middle only moves
+        # up
+        if start == HEADER.size:
+            return self._middle(), self.capacity
+        return HEADER.size, start
+
+    def _middle(self) -> int:
+        return HEADER.size + (self.capacity - HEADER.size) // 2
+
+    def _read(
+        self, header: _Header, generation: int, start: int, used: int
+    ) -> List[Frame]:
+        frames: List[Frame] = []
+        for offset, records in self._frames(start, self._offset, used):
+            frames.append((self._version(header.epoch, generation, offset), records))
+            self._offset = offset
+        return frames
+
+    def _frames(
+        self, start: int, offset: int, used: int
+    ) -> Iterator[Tuple[int, List[Record]]]:
+        # Yields the offset after each frame, relative to `start`
+        while offset < used:
+            payload_start = start + offset + FRAME_LENGTH.size
+            (length,) = FRAME_LENGTH.unpack_from(self._map, start + offset)
+            payload = self._map[payload_start:payload_start + length]
+            offset += FRAME_LENGTH.size + length
+            yield offset, [tuple(record) for record in json.loads(payload)]
+
+    def _version(self, epoch: int, generation: int, offset: int) -> int:
+        return epoch + generation * GENERATION_SPAN + offset
+
+    def _frame(self, records: List[Record]) -> bytes:
+        payload = json.dumps(records, separators=(",", ":")).encode("utf-8")
+        return FRAME_LENGTH.pack(len(payload)) + payload
+
+    def _check_locked(self, exclusive: bool = False) -> None:
+        if self._depth == 0 or (exclusive and not self._exclusive):
+            raise RuntimeError("The shared log must be locked first")
+
+
+@asynccontextmanager
+async def lock_all(locks: Iterable[Tuple[SharedLog, bool]]) -> AsyncIterator[None]:
+    """
+    Hold the file locks of several logs from the event loop, each shared or
+    exclusive as paired with it.
+
+    `flock` would block the whole loop while another process holds a lock,
+    so the locks are tried without blocking, in the order of their paths.
+    When one is taken elsewhere, those already held are let go and all are
+    tried again after a pause that grows, so no lock is held while waiting.
+    The body must not await, as other requests of the process would then
+    run while it holds the locks.
+    """
+    modes: Dict[Path, Tuple[SharedLog, bool]] = {}
+    for log, exclusive in locks:
+        held = modes.get(log.path)
+        modes[log.path] = (log, exclusive or (held is not None and held[1]))
+    ordered = [modes[path] for path in sorted(modes, key=str)]
+
+    delay = LOCK_RETRY_DELAY
+    while True:
+        with ExitStack() as stack:
+            try:
+                for log, exclusive in ordered:
+                    stack.enter_context(log.locked(exclusive, blocking=False))
+            except BlockingIOError:
+                pass
+            else:
+                yield
+                return
+        await asyncio.sleep(delay)
+        delay = min(2 * delay, LOCK_RETRY_MAX_DELAY)
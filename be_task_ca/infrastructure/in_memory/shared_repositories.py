@@ -0,0 +1,366 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+from uuid import UUID, uuid4
+
+from be_task_ca.domain.item.entities import Item
+from be_task_ca.domain.item.queries import ItemPosition, ItemQuery
+from be_task_ca.domain.item.repositories import ItemRepository
+from be_task_ca.domain.unit_of_work import WriteConflictError
+from be_task_ca.domain.user.entities import CartItem, CartLine, User
+from be_task_ca.domain.user.queries import UserShape
+from be_task_ca.infrastructure.in_memory.item_repository import InMemoryItemRepository
+from be_task_ca.infrastructure.in_memory.journal import Record
+from be_task_ca.infrastructure.in_memory.shared_log import SharedLog
+from be_task_ca.infrastructure.in_memory.unit_of_work import (
+    ReplicatedRepository,
+    Undo,
+    has_uncommitted_writes,
+    record_write,
+    uncommitted_writes,
+)
+from be_task_ca.infrastructure.in_memory.user_repository import InMemoryUserRepository
+
+
+class SharedLogReplica(ReplicatedRepository, ABC):
+    """
+    Keeps an in-memory repository in step with the other processes that
+    share its `SharedLog`.
+
+    Every read first replays the writes other processes committed. Writes
+    catch up and apply under the log's exclusive lock, so each one sees the
+    latest committed state, and are appended when their unit of work
+    commits; other processes never see writes that roll back, nor the
+    partial writes of a process that dies mid-request. Within the process,
+    writes are visible before they commit, as in the other in-memory
+    repositories.
+
+    A write another process commits first may conflict with one still
+    uncommitted here. Catching up then fails the unit of work of the
+    uncommitted one, undoing it before the other write is applied.
+    """
+
+    _shared: SharedLog
+    # Provided by the in-memory repository the replica is mixed into
+    _apply: Callable[[str, Any], None]
+
+    @property
+    def commit_order(self) -> str:
+        return str(self._shared.path)
+
+    def commit_lock(self) -> ContextManager[None]:
+        return self._writing()
+
+    def file_locks(self, exclusive: bool) -> List[Tuple[SharedLog, bool]]:
+        return [(self._shared, exclusive)]
+
+    def _sync(self) -> None:
+        with self._shared.locked():
+            self._catch_up()
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        with self._shared.locked(exclusive=True):
+            self._catch_up()
+            yield
+
+    def _catch_up(self) -> None:
+        frames = self._shared.read_frames()
+        if not frames:
+            return
+        pending = uncommitted_writes(self)
+        for version, records in frames:
+            for record in records:
+                for unit_of_work, write in pending:
+                    if unit_of_work.error is None and self._conflicts(record, write):
+                        unit_of_work.fail(WriteConflictError(
+                            "A write by another process conflicts with this one"
+                        ))
+                self._apply(*record)
+            self._applied(version, records)
+
+    def _write(self, operation: str, data: Any, undo: Undo) -> None:
+        try:
+            record_write(self, operation, data, self._publish, undo)
+        except Exception:
+            undo()
+            raise
+
+    def _publish(self, records: List[Record]) -> None:
+        # Runs under the exclusive lock the write or the commit already holds
+        with self._writing():
+            self._shared.append(records, self._compacted)
+            self._applied(self._shared.version, records)
+
+    def _compacted(self) -> Any:
+        # Rebuilt from the log rather than taken from memory, which also
+        # holds the uncommitted writes of this process
+        return self._committed_state(self._shared.records())
+
+    def _conflicts(self, record: Record, write: Record) -> bool:
+        """Whether `record`, committed elsewhere, conflicts with `write`."""
+        if record[0] == "snapshot":
+            return True
+        return not set(self._written_keys(*record)).isdisjoint(
+            self._written_keys(*write)
+        )
+
+    def _applied(self, version: int, records: List[Record]) -> None:
+        """Called once `records` are applied, with the log's version after them."""
+
+    @abstractmethod
+    def _written_keys(self, operation: str, data: Any) -> List[str]:
+        """Keys of the rows and unique values a write touched."""
+
+    @abstractmethod
+    def _committed_state(self, records: List[Record]) -> Any:
+        """The snapshot of the state `records` build up from nothing."""
+
+
+class SharedInMemoryItemRepository(SharedLogReplica, InMemoryItemRepository):
+    """
+    `InMemoryItemRepository` whose items all processes on the node share.
+
+    The catalog version is the log's version after the last committed
+    write, so it is the same in every process that has read that write.
+    """
+
+    def __init__(self, shared: SharedLog):
+        super().__init__()
+        self._shared = shared
+        with shared.locked():
+            self._catalog_version = shared.version
+            self._catch_up()
+
+    def save_item(self, item: Item) -> Item:
+        with self._writing():
+            return super().save_item(item)
+
+    def insert_items(self, items: List[Item]) -> List[Item]:
+        with self._writing():
+            return super().insert_items(items)
+
+    def get_all_items(self, fields: Optional[Sequence[str]] = None) -> List[Item]:
+        self._sync()
+        return super().get_all_items(fields)
+
+    def get_items_page(
+        self,
+        limit: int,
+        after: Optional[UUID] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Item]:
+        self._sync()
+        return super().get_items_page(limit, after, fields)
+
+    def query_items(
+        self,
+        query: ItemQuery,
+        limit: int,
+        after: Optional[ItemPosition] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Item]:
+        self._sync()
+        return super().query_items(query, limit, after, fields)
+
+    def find_item_by_name(self, name: str) -> Optional[Item]:
+        self._sync()
+        return super().find_item_by_name(name)
+
+    def search_items(
+        self, terms: List[str], limit: int, fields: Optional[Sequence[str]] = None
+    ) -> List[Item]:
+        self._sync()
+        return super().search_items(terms, limit, fields)
+
+    def find_existing_item_names(self, names: Iterable[str]) -> Set[str]:
+        self._sync()
+        return super().find_existing_item_names(names)
+
+    def find_item_by_id(self, id: UUID) -> Optional[Item]:
+        self._sync()
+        return super().find_item_by_id(id)
+
+    def find_items_by_ids(
+        self, ids: Iterable[UUID], fields: Optional[Sequence[str]] = None
+    ) -> List[Item]:
+        self._sync()
+        return super().find_items_by_ids(ids, fields)
+
+    def reserve_stock(self, item_id: UUID, quantity: int) -> bool:
+        with self._writing():
+            return super().reserve_stock(item_id, quantity)
+
+    def release_stock(self, item_id: UUID, quantity: int) -> bool:
+        with self._writing():
+            return super().release_stock(item_id, quantity)
+
+    def get_catalog_version(self) -> int:
+        self._sync()
+        if has_uncommitted_writes(self):
+            # Reads show item writes that may still roll back, so the catalog
+            # gets a version no other state is served with
+            return uuid4().int
+        return self._catalog_version
+
+    def find_items_by_index(self, name: str, value: Hashable) -> List[Item]:
+        self._sync()
+        return super().find_items_by_index(name, value)
+
+    def close(self) -> None:
+        self._shared.close()
+
+    def _apply(self, operation: str, data: Any) -> None:
+        if operation == "snapshot":
+            # Starts a new generation of the log, from the full state
+            self._delete_items(list(self.items))
+            operation = "insert_items"
+        super()._apply(operation, data)
+
+    def _conflicts(self, record: Record, write: Record) -> bool:
+        if record[0] == write[0] == "move_stock":
+            # Stock moves add up in any order; only one that takes the stock
+            # below zero conflicts, with the reservations still uncommitted
+            item = self.items.get(UUID(record[1]["id"]))
+            return (
+                record[1]["id"] == write[1]["id"]
+                and write[1]["delta"] < 0
+                and item is not None
+                and item.quantity + record[1]["delta"] < 0
+            )
+        return super()._conflicts(record, write)
+
+    def _applied(self, version: int, records: List[Record]) -> None:
+        self._catalog_version = version
+
+    def _written_keys(self, operation: str, data: Any) -> List[str]:
+        if operation == "insert_items":
+            return [key for record in data for key in _item_keys(record)]
+        if operation == "save_item":
+            return _item_keys(data)
+        return [data["id"]]
+
+    def _committed_state(self, records: List[Record]) -> Any:
+        state = InMemoryItemRepository()
+        for operation, data in records:
+            state._apply("insert_items" if operation == "snapshot" else operation, data)
+        return state._snapshot()
+
+
+class SharedInMemoryUserRepository(SharedLogReplica, InMemoryUserRepository):
+    """`InMemoryUserRepository` whose users all processes on the node share."""
+
+    def __init__(
+        self, shared: SharedLog, item_repository: Optional[ItemRepository] = None
+    ):
+        super().__init__(item_repository=item_repository)
+        self._shared = shared
+        self._sync()
+
+    def save_user(self, user: User) -> User:
+        with self._writing():
+            return super().save_user(user)
+
+    def insert_users(self, users: List[User]) -> List[User]:
+        with self._writing():
+            return super().insert_users(users)
+
+    def find_user_by_email(
+        self, email: str, shape: UserShape = UserShape.WITH_CART
+    ) -> Optional[User]:
+        self._sync()
+        return super().find_user_by_email(email, shape)
+
+    def find_user_by_id(
+        self, user_id: UUID, shape: UserShape = UserShape.WITH_CART
+    ) -> Optional[User]:
+        self._sync()
+        return super().find_user_by_id(user_id, shape)
+
+    def user_exists(self, user_id: UUID) -> bool:
+        self._sync()
+        return super().user_exists(user_id)
+
+    def find_cart_items_for_user_id(self, user_id: UUID) -> List[CartItem]:
+        self._sync()
+        return super().find_cart_items_for_user_id(user_id)
+
+    def find_cart_lines_for_user_id(self, user_id: UUID) -> List[CartLine]:
+        self._sync()
+        return super().find_cart_lines_for_user_id(user_id)
+
+    def add_cart_item(self, cart_item: CartItem) -> bool:
+        with self._writing():
+            return super().add_cart_item(cart_item)
+
+    def update_cart_item_quantity(
+        self,
+        user_id: UUID,
+        item_id: UUID,
+        quantity: int,
+        expected: Optional[int] = None,
+    ) -> bool:
+        # Compared against the line as every process has written it so far
+        with self._writing():
+            return super().update_cart_item_quantity(
+                user_id, item_id, quantity, expected
+            )
+
+    def remove_cart_item(self, user_id: UUID, item_id: UUID) -> Optional[CartItem]:
+        with self._writing():
+            return super().remove_cart_item(user_id, item_id)
+
+    def find_users_by_index(self, name: str, value: Hashable) -> List[User]:
+        self._sync()
+        return super().find_users_by_index(name, value)
+
+    def file_locks(self, exclusive: bool) -> List[Tuple[SharedLog, bool]]:
+        locks = super().file_locks(exclusive)
+        if isinstance(self._item_repository, SharedLogReplica):
+            # Cart lines are read with the items they hold
+            locks.extend(self._item_repository.file_locks(False))
+        return locks
+
+    def close(self) -> None:
+        self._shared.close()
+
+    def _apply(self, operation: str, data: Any) -> None:
+        if operation == "snapshot":
+            self._delete_users(list(self.users))
+            operation = "insert_users"
+        super()._apply(operation, data)
+
+    def _written_keys(self, operation: str, data: Any) -> List[str]:
+        # A user's record holds the cart, so cart lines are keyed by the user
+        if operation == "insert_users":
+            return [key for record in data for key in _user_keys(record)]
+        if operation == "save_user":
+            return _user_keys(data)
+        return [data["user_id"]]
+
+    def _committed_state(self, records: List[Record]) -> Any:
+        state = InMemoryUserRepository()
+        for operation, data in records:
+            state._apply("insert_users" if operation == "snapshot" else operation, data)
+        return state._snapshot()
+
+
+def _item_keys(record: Dict[str, Any]) -> List[str]:
+    return [record["id"], f"name:{record['name']}"]
+
+
+def _user_keys(record: Dict[str, Any]) -> List[str]:
+    return [record["id"], f"email:{record['email']}"]
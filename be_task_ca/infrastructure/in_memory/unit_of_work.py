@@ -0,0 +1,209 @@
+import asyncio
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from contextlib import ExitStack
+from contextvars import ContextVar
+from typing import (
+    Any,
+    AsyncContextManager,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from be_task_ca.domain.unit_of_work import UnitOfWork
+from be_task_ca.infrastructure.in_memory.journal import Record
+from be_task_ca.infrastructure.in_memory.shared_log import SharedLog, lock_all
+
+# Returns a future when the records are written in the background
+Log = Callable[[List[Record]], Optional["Future[None]"]]
+Undo = Callable[[], None]
+
+_current: ContextVar[Optional["InMemoryUnitOfWork"]] = ContextVar(
+    "in_memory_unit_of_work", default=None
+)
+_open: Set["InMemoryUnitOfWork"] = set()
+
+
+class ReplicatedRepository(ABC):
+    """
+    Repository whose writes other processes apply once they are committed.
+
+    A unit of work commits while it holds the commit lock of every such
+    repository it wrote to, so it publishes all of its writes or none.
+    Callers on the event loop take the `file_locks` first with
+    `lock_replicas`, which waits for other processes without blocking.
+    """
+
+    @property
+    @abstractmethod
+    def commit_order(self) -> str:
+        """Key that orders the commit locks the same way in every process."""
+
+    @abstractmethod
+    def commit_lock(self) -> ContextManager[None]:
+        """
+        Lock out writes by other processes and catch up with theirs, failing
+        uncommitted units of work that conflict with them.
+        """
+
+    @abstractmethod
+    def file_locks(self, exclusive: bool) -> List[Tuple[SharedLog, bool]]:
+        """
+        The logs the repository locks to read, or with `exclusive` to write,
+        each with whether it needs the lock exclusively.
+        """
+
+
+class InMemoryUnitOfWork(UnitOfWork):
+    """
+    Buffers the journal records of one request until it commits, then
+    appends each repository's records in a single journal write. Commit
+    waits for the write without blocking the event loop.
+
+    Writes are applied to the in-memory repositories right away, so the
+    request reads its own writes, and each one leaves an undo action that
+    reverts only that write. Concurrent requests see each other's
+    uncommitted writes; stock changes, including those of saved items, are
+    journaled and rolled back as deltas, so reservations made meanwhile by
+    other requests are kept in memory and in the journal alike. Items a
+    request inserted cannot have stock reserved by others until it commits.
+
+    A unit of work that conflicts with a write another process committed
+    is failed as soon as that write is seen: its writes are undone right
+    away and its commit raises.
+    """
+
+    def __init__(self):
+        self._writes: List[Tuple[object, Record, Log]] = []
+        self._undo: List[Undo] = []
+        self.active = False
+        self.error: Optional[Exception] = None
+
+    async def begin(self) -> None:
+        # Set in the request's context, so tasks it starts share the unit
+        _current.set(self)
+        self.active = True
+        self.error = None
+        _open.add(self)
+
+    async def commit(self) -> None:
+        replicas = {
+            id(repository): repository
+            for repository, _, _ in self._writes
+            if isinstance(repository, ReplicatedRepository)
+        }
+        async with lock_replicas(replicas.values(), exclusive=True):
+            written = self._commit_locked(
+                sorted(replicas.values(), key=lambda r: r.commit_order)
+            )
+        for future in written:
+            if future is not None:
+                await asyncio.wrap_future(future)
+
+    async def rollback(self) -> None:
+        self._rollback()
+
+    def fail(self, error: Exception) -> None:
+        """Undo the writes made so far now, and make the commit raise `error`."""
+        undo = self._undo
+        self._writes = []
+        self._undo = []
+        self.error = error
+        for action in reversed(undo):
+            action()
+
+    def touches(self, repository: object) -> bool:
+        return any(owner is repository for owner, _, _ in self._writes)
+
+    def _commit_locked(
+        self, replicas: List[ReplicatedRepository]
+    ) -> List[Optional["Future[None]"]]:
+        with ExitStack() as locks:
+            for replica in replicas:
+                locks.enter_context(replica.commit_lock())
+            if self.error is not None:
+                error = self.error
+                self._rollback()
+                raise error
+
+            batches: Dict[int, Tuple[Log, List[Record]]] = {}
+            for repository, record, log in self._writes:
+                batches.setdefault(id(repository), (log, []))[1].append(record)
+            self._finish()
+            return [log(records) for log, records in batches.values()]
+
+    def _rollback(self) -> None:
+        undo = self._undo
+        self._finish()
+        for action in reversed(undo):
+            action()
+
+    def _record(
+        self, repository: object, operation: str, data: Any, log: Log, undo: Undo
+    ) -> None:
+        self._writes.append((repository, (operation, data), log))
+        self._undo.append(undo)
+
+    def _finish(self) -> None:
+        self._writes = []
+        self._undo = []
+        self.active = False
+        _open.discard(self)
+
+
+def record_write(
+    repository: object, operation: str, data: Any, log: Log, undo: Undo
+) -> None:
+    """
+    Journal a write with `log`, or hold it back until the unit of work of the
+    current request commits; `undo` reverts the write on rollback.
+    """
+    unit_of_work = current_unit_of_work()
+    if unit_of_work is None:
+        written = log([(operation, data)])
+        if written is not None:
+            written.result()
+    else:
+        unit_of_work._record(repository, operation, data, log, undo)
+
+
+def current_unit_of_work() -> Optional[InMemoryUnitOfWork]:
+    """The unit of work the current request's writes are held back in, if any."""
+    unit_of_work = _current.get()
+    return unit_of_work if unit_of_work is not None and unit_of_work.active else None
+
+
+def lock_replicas(
+    repositories: Iterable[object], exclusive: bool = False
+) -> AsyncContextManager[None]:
+    """
+    Take the file locks the replicated ones among `repositories` need to
+    read, or with `exclusive` to write, without blocking the event loop.
+    """
+    return lock_all(
+        lock
+        for repository in repositories
+        if isinstance(repository, ReplicatedRepository)
+        for lock in repository.file_locks(exclusive)
+    )
+
+
+def has_uncommitted_writes(repository: object) -> bool:
+    """Whether a snapshot of `repository` now would capture uncommitted state."""
+    return any(unit_of_work.touches(repository) for unit_of_work in _open)
+
+
+def uncommitted_writes(repository: object) -> List[Tuple[InMemoryUnitOfWork, Record]]:
+    """The writes to `repository` still open, each with its unit of work."""
+    return [
+        (unit_of_work, record)
+        for unit_of_work in _open
+        for owner, record, _ in unit_of_work._writes
+        if owner is repository
+    ]
@@ -1,14 +1,48 @@
-from typing import Dict, List, Optional
+from concurrent.futures import Future
+from typing import Any, Dict, Hashable, Iterable, List, Optional
 from uuid import UUID
 
-from be_task_ca.domain.user.entities import User, CartItem
+from be_task_ca.domain.item.repositories import ItemRepository
+from be_task_ca.domain.user.entities import CartLine, User, CartItem
+from be_task_ca.domain.user.exceptions import DuplicateEmailError
+from be_task_ca.domain.user.queries import UserShape
 from be_task_ca.domain.user.repositories import UserRepository
+from be_task_ca.infrastructure.in_memory.indexes import (
+    DuplicateKeyError,
+    IndexedTable,
+    KeyFunction,
+)
+from be_task_ca.infrastructure.in_memory.journal import Journal, Record
+from be_task_ca.infrastructure.in_memory.unit_of_work import (
+    Undo,
+    has_uncommitted_writes,
+    record_write,
+)
 
 
 class InMemoryUserRepository(UserRepository):
-    def __init__(self):
-        self.users: Dict[UUID, User] = {}
-        self.cart_items: Dict[UUID, List[CartItem]] = {}
+    """
+    Users and their carts held in process.
+
+    Cart lines are joined with the catalog through `item_repository`, which
+    holds the items the carts refer to.
+    """
+
+    def __init__(
+        self,
+        journal: Optional[Journal] = None,
+        item_repository: Optional[ItemRepository] = None,
+    ):
+        self._item_repository = item_repository
+        self._table: IndexedTable[User] = IndexedTable(lambda user: user.id)
+        self._table.add_index("email", lambda user: user.email, unique=True)
+        self.users: Dict[UUID, User] = self._table.rows
+        # Cart lines per user, keyed by item id in the order they were added
+        self.cart_items: Dict[UUID, Dict[UUID, CartItem]] = {}
+
+        self._journal = journal
+        if journal is not None:
+            self._restore(journal)
 
     def save_user(self, user: User) -> User:
         stored_user = User(
@@ -20,37 +54,295 @@ class InMemoryUserRepository(UserRepository):
             shipping_address=user.shipping_address
         )
 
-        self.users[user.id] = stored_user
+        previous = self.users.get(user.id)
+        previous_cart = self._copy_cart(user.id)
+        try:
+            self._table.put(stored_user)
+        except DuplicateKeyError as error:
+            raise DuplicateEmailError(user.email) from error
 
         # Store cart items separately
         if user.cart_items:
-            self.cart_items[user.id] = [
-                CartItem(
+            self.cart_items[user.id] = {
+                item.item_id: CartItem(
                     user_id=item.user_id,
                     item_id=item.item_id,
                     quantity=item.quantity
                 )
                 for item in user.cart_items
-            ]
+            }
 
+        self._write(
+            "save_user",
+            self._to_record(stored_user),
+            lambda: self._restore_user(user.id, previous, previous_cart),
+        )
         return user
 
-    def find_user_by_email(self, email: str) -> Optional[User]:
-        for user in self.users.values():
-            if user.email == email:
-                return self._get_user_with_cart_items(user)
-        return None
+    def insert_users(self, users: List[User]) -> List[User]:
+        inserted = self._table.insert_many(
+            User(
+                id=user.id,
+                email=user.email,
+                first_name=user.first_name,
+                last_name=user.last_name,
+                hashed_password=user.hashed_password,
+                shipping_address=user.shipping_address
+            )
+            for user in users
+        )
+        inserted_ids = {user.id for user in inserted}
+        if inserted:
+            self._write(
+                "insert_users",
+                [self._to_record(user) for user in inserted],
+                lambda: self._delete_users(inserted_ids),
+            )
+        return [user for user in users if user.id in inserted_ids]
+
+    def find_user_by_email(
+        self, email: str, shape: UserShape = UserShape.WITH_CART
+    ) -> Optional[User]:
+        user = self._table.find_one("email", email)
+        if not user:
+            return None
+        return self._load_user(user, shape)
 
-    def find_user_by_id(self, user_id: UUID) -> Optional[User]:
+    def find_user_by_id(
+        self, user_id: UUID, shape: UserShape = UserShape.WITH_CART
+    ) -> Optional[User]:
         user = self.users.get(user_id)
         if not user:
             return None
-        return self._get_user_with_cart_items(user)
+        return self._load_user(user, shape)
+
+    def user_exists(self, user_id: UUID) -> bool:
+        return user_id in self.users
 
     def find_cart_items_for_user_id(self, user_id: UUID) -> List[CartItem]:
-        return self.cart_items.get(user_id, [])
+        return list(self.cart_items.get(user_id, {}).values())
+
+    def find_cart_lines_for_user_id(self, user_id: UUID) -> List[CartLine]:
+        if self._item_repository is None:
+            raise ValueError("Cart lines need the repository of the carts' items")
+
+        cart = self.cart_items.get(user_id, {})
+        items = self._item_repository.find_items_by_ids(cart, ["name", "price"])
+        return [
+            CartLine(
+                item_id=item.id,
+                quantity=cart[item.id].quantity,
+                name=item.name,
+                price=item.price
+            )
+            for item in items
+        ]
+
+    def add_cart_item(self, cart_item: CartItem) -> bool:
+        cart = self.cart_items.setdefault(cart_item.user_id, {})
+        if cart_item.item_id in cart:
+            return False
+
+        cart[cart_item.item_id] = CartItem(
+            user_id=cart_item.user_id,
+            item_id=cart_item.item_id,
+            quantity=cart_item.quantity
+        )
+        self._write(
+            "add_cart_item",
+            _cart_item_to_record(cart_item),
+            lambda: self._pop_cart_item(cart_item.user_id, cart_item.item_id),
+        )
+        return True
+
+    def update_cart_item_quantity(
+        self,
+        user_id: UUID,
+        item_id: UUID,
+        quantity: int,
+        expected: Optional[int] = None,
+    ) -> bool:
+        cart_item = self.cart_items.get(user_id, {}).get(item_id)
+        if cart_item is None:
+            return False
+        if expected is not None and cart_item.quantity != expected:
+            return False
+
+        previous_quantity = cart_item.quantity
+        cart_item.quantity = quantity
+        self._write(
+            "update_cart_item_quantity",
+            _cart_item_to_record(cart_item),
+            lambda: self._set_cart_item_quantity(user_id, item_id, previous_quantity),
+        )
+        return True
+
+    def remove_cart_item(self, user_id: UUID, item_id: UUID) -> Optional[CartItem]:
+        cart = self.cart_items.get(user_id, {})
+        cart_item = cart.pop(item_id, None)
+        if cart_item is None:
+            return None
+
+        if not cart:
+            del self.cart_items[user_id]
+        self._write(
+            "remove_cart_item",
+            _cart_item_to_record(cart_item),
+            lambda: self._put_cart_item(cart_item),
+        )
+        return cart_item
+
+    def register_index(self, name: str, key: KeyFunction, unique: bool = False) -> None:
+        self._table.add_index(name, key, unique)
+
+    def find_users_by_index(self, name: str, value: Hashable) -> List[User]:
+        return [
+            self._load_user(user, UserShape.WITH_CART)
+            for user in self._table.find(name, value)
+        ]
 
-    def _get_user_with_cart_items(self, user: User) -> User:
+    def close(self) -> None:
+        """Snapshot the journal so the next start has no log to replay."""
+        if self._journal is None:
+            return
+        if self._journal.records_since_snapshot:
+            self._journal.write_snapshot(self._snapshot())
+        self._journal.close()
+
+    def _copy_cart(self, user_id: UUID) -> Optional[Dict[UUID, CartItem]]:
+        cart = self.cart_items.get(user_id)
+        if cart is None:
+            return None
+        return {
+            item_id: CartItem(
+                user_id=item.user_id, item_id=item.item_id, quantity=item.quantity
+            )
+            for item_id, item in cart.items()
+        }
+
+    def _restore_user(
+        self,
+        user_id: UUID,
+        previous: Optional[User],
+        previous_cart: Optional[Dict[UUID, CartItem]],
+    ) -> None:
+        if previous is None:
+            self._table.delete(user_id)
+        else:
+            try:
+                self._table.put(previous)
+            except DuplicateKeyError:
+                # Another request has taken the old email since; its write wins
+                pass
+
+        if previous_cart is None:
+            self.cart_items.pop(user_id, None)
+        else:
+            self.cart_items[user_id] = previous_cart
+
+    def _delete_users(self, user_ids: Iterable[UUID]) -> None:
+        for user_id in user_ids:
+            self._table.delete(user_id)
+            self.cart_items.pop(user_id, None)
+
+    def _pop_cart_item(self, user_id: UUID, item_id: UUID) -> None:
+        cart = self.cart_items.get(user_id, {})
+        cart.pop(item_id, None)
+        if not cart:
+            self.cart_items.pop(user_id, None)
+
+    def _put_cart_item(self, cart_item: CartItem) -> None:
+        self.cart_items.setdefault(cart_item.user_id, {})[cart_item.item_id] = cart_item
+
+    def _set_cart_item_quantity(
+        self, user_id: UUID, item_id: UUID, quantity: int
+    ) -> None:
+        # Looked up by key, the line may have been replaced since it was read
+        cart_item = self.cart_items.get(user_id, {}).get(item_id)
+        if cart_item is not None:
+            cart_item.quantity = quantity
+
+    def _write(self, operation: str, data: Any, undo: Undo) -> None:
+        record_write(self, operation, data, self._log, undo)
+
+    def _log(self, records: List[Record]) -> Optional["Future[None]"]:
+        if self._journal is None:
+            return None
+        if has_uncommitted_writes(self):
+            return self._journal.submit(records)
+        return self._journal.submit(records, self._snapshot)
+
+    def _snapshot(self) -> List[Dict[str, Any]]:
+        return [self._to_record(user) for user in self.users.values()]
+
+    def _restore(self, journal: Journal) -> None:
+        state, records = journal.recover()
+        for record in state or []:
+            self._apply_record(record)
+
+        for operation, data in records:
+            self._apply(operation, data)
+
+    def _apply(self, operation: str, data: Any) -> None:
+        if operation == "save_user":
+            self._apply_record(data)
+        elif operation == "insert_users":
+            for record in data:
+                self._apply_record(record)
+        elif operation == "add_cart_item":
+            self._put_cart_item(_cart_item_from_record(data))
+        elif operation == "update_cart_item_quantity":
+            cart_item = _cart_item_from_record(data)
+            self._set_cart_item_quantity(
+                cart_item.user_id, cart_item.item_id, cart_item.quantity
+            )
+        elif operation == "remove_cart_item":
+            cart_item = _cart_item_from_record(data)
+            self._pop_cart_item(cart_item.user_id, cart_item.item_id)
+        else:
+            raise ValueError(f"Unknown journal operation '{operation}'")
+
+    def _to_record(self, user: User) -> Dict[str, Any]:
+        # Records hold the stored user together with its cart as it is after
+        # the write, so replaying one restores both
+        return {
+            "id": str(user.id),
+            "email": user.email,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "hashed_password": user.hashed_password,
+            "shipping_address": user.shipping_address,
+            "cart_items": [
+                {"item_id": str(item.item_id), "quantity": item.quantity}
+                for item in self.cart_items.get(user.id, {}).values()
+            ],
+        }
+
+    def _apply_record(self, record: Dict[str, Any]) -> None:
+        user_id = UUID(record["id"])
+        self._table.put(User(
+            id=user_id,
+            email=record["email"],
+            first_name=record["first_name"],
+            last_name=record["last_name"],
+            hashed_password=record["hashed_password"],
+            shipping_address=record["shipping_address"]
+        ))
+
+        cart_items = {
+            UUID(item["item_id"]): CartItem(
+                user_id=user_id,
+                item_id=UUID(item["item_id"]),
+                quantity=item["quantity"]
+            )
+            for item in record["cart_items"]
+        }
+        if cart_items:
+            self.cart_items[user_id] = cart_items
+        else:
+            self.cart_items.pop(user_id, None)
+
+    def _load_user(self, user: User, shape: UserShape) -> User:
         result = User(
             id=user.id,
             email=user.email,
@@ -60,6 +352,23 @@ class InMemoryUserRepository(UserRepository):
             shipping_address=user.shipping_address
         )
 
-        result.cart_items = self.cart_items.get(user.id, [])
+        if shape is UserShape.WITH_CART:
+            result.cart_items = self.find_cart_items_for_user_id(user.id)
+
+        return result
+
+
+def _cart_item_to_record(cart_item: CartItem) -> Dict[str, Any]:
+    return {
+        "user_id": str(cart_item.user_id),
+        "item_id": str(cart_item.item_id),
+        "quantity": cart_item.quantity,
+    }
+
 
-        return result
\ No newline at end of file
+def _cart_item_from_record(record: Dict[str, Any]) -> CartItem:
+    return CartItem(
+        user_id=UUID(record["user_id"]),
+        item_id=UUID(record["item_id"]),
+        quantity=record["quantity"]
+    )
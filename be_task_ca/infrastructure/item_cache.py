@@ -0,0 +1,268 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+from uuid import UUID
+
+from be_task_ca.domain.item.entities import Item
+from be_task_ca.domain.item.queries import ItemPosition, ItemQuery
+from be_task_ca.domain.item.repositories import AsyncItemRepository
+
+
+class ItemCache:
+    """
+    Bounded least-recently-used cache of items, each kept for `ttl` seconds.
+
+    Items are stored once by id, with an index from name to id, so
+    dropping an item by id also stops it from being found by its name.
+    The counters are cumulative since the cache was built.
+
+    A read that may end in `put` starts with a `token`. An item invalidated
+    after the token was taken is not stored, as the read may have returned
+    it from before the write that invalidated it.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[UUID, Tuple[float, Item]]" = OrderedDict()
+        self._ids_by_name: Dict[str, UUID] = {}
+        # When each recently invalidated item was last invalidated; tokens
+        # older than the invalidations already forgotten are not trusted
+        self._sequence = 0
+        self._invalidated: "OrderedDict[UUID, int]" = OrderedDict()
+        self._forgotten = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, item_id: UUID) -> Optional[Item]:
+        with self._lock:
+            return self._get(item_id)
+
+    def get_by_name(self, name: str) -> Optional[Item]:
+        with self._lock:
+            item_id = self._ids_by_name.get(name)
+            if item_id is None:
+                self.misses += 1
+                return None
+            return self._get(item_id)
+
+    def token(self) -> int:
+        with self._lock:
+            return self._sequence
+
+    def put(self, item: Item, token: Optional[int] = None) -> None:
+        with self._lock:
+            if token is not None and self._invalidated_since(item.id, token):
+                return
+            self._remove(item.id)
+            self._items[item.id] = (self._clock() + self.ttl, item)
+            self._ids_by_name[item.name] = item.id
+            while len(self._items) > self.max_size:
+                self._remove(next(iter(self._items)))
+                self.evictions += 1
+
+    def invalidate(self, item_id: UUID) -> None:
+        with self._lock:
+            self._sequence += 1
+            self._invalidated[item_id] = self._sequence
+            self._invalidated.move_to_end(item_id)
+            if len(self._invalidated) > self.max_size:
+                _, self._forgotten = self._invalidated.popitem(last=False)
+            if self._remove(item_id):
+                self.invalidations += 1
+
+    def report(self) -> Dict[str, Any]:
+        """The counters together with the cache's current size and limits."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "size": len(self._items),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+            }
+
+    def _get(self, item_id: UUID) -> Optional[Item]:
+        entry = self._items.get(item_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, item = entry
+        if expires_at <= self._clock():
+            self._remove(item_id)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._items.move_to_end(item_id)
+        self.hits += 1
+        return item
+
+    def _invalidated_since(self, item_id: UUID, token: int) -> bool:
+        if token < self._forgotten:
+            return True
+        return self._invalidated.get(item_id, 0) > token
+
+    def _remove(self, item_id: UUID) -> bool:
+        entry = self._items.pop(item_id, None)
+        if entry is None:
+            return False
+        name = entry[1].name
+        if self._ids_by_name.get(name) == item_id:
+            del self._ids_by_name[name]
+        return True
+
+
+class CachingItemRepository(AsyncItemRepository):
+    """
+    Read-through cache in front of another `AsyncItemRepository`.
+
+    `find_item_by_id` and `find_item_by_name` are answered from the shared
+    `ItemCache` when they can; every other call goes to the wrapped
+    repository. Once the request commits, `committed` drops the items it
+    wrote from the cache; a stock reservation that fails changes nothing
+    and leaves its item cached.
+
+    One instance serves one request. Until it commits, items the request
+    wrote are read from the wrapped repository and not cached, so writes
+    that roll back never reach the cache. Concurrent requests keep reading
+    the cached committed items meanwhile, and an item they read before the
+    commit is not cached after it.
+    """
+
+    def __init__(self, repository: AsyncItemRepository, cache: ItemCache):
+        self.repository = repository
+        self.cache = cache
+        self._written_ids: Set[UUID] = set()
+        self._written_names: Set[str] = set()
+
+    async def save_item(self, item: Item) -> Item:
+        self._written(item)
+        return await self.repository.save_item(item)
+
+    async def insert_items(self, items: List[Item]) -> List[Item]:
+        for item in items:
+            self._written(item)
+        return await self.repository.insert_items(items)
+
+    async def get_all_items(self, fields: Optional[Sequence[str]] = None) -> List[Item]:
+        return await self.repository.get_all_items(fields)
+
+    async def get_items_page(
+        self,
+        limit: int,
+        after: Optional[UUID] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Item]:
+        return await self.repository.get_items_page(limit, after, fields)
+
+    async def query_items(
+        self,
+        query: ItemQuery,
+        limit: int,
+        after: Optional[ItemPosition] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Item]:
+        return await self.repository.query_items(query, limit, after, fields)
+
+    def iter_all_items(
+        self, batch_size: int = 1000, fields: Optional[Sequence[str]] = None
+    ) -> AsyncIterator[Item]:
+        return self.repository.iter_all_items(batch_size, fields)
+
+    async def find_item_by_name(self, name: str) -> Optional[Item]:
+        if name in self._written_names:
+            return await self.repository.find_item_by_name(name)
+
+        item = self.cache.get_by_name(name)
+        if item is None:
+            token = self.cache.token()
+            item = await self.repository.find_item_by_name(name)
+            self._store(item, token)
+        return item
+
+    async def search_items(
+        self, terms: List[str], limit: int, fields: Optional[Sequence[str]] = None
+    ) -> List[Item]:
+        return await self.repository.search_items(terms, limit, fields)
+
+    async def find_existing_item_names(self, names: Iterable[str]) -> Set[str]:
+        return await self.repository.find_existing_item_names(names)
+
+    async def find_item_by_id(self, id: UUID) -> Optional[Item]:
+        if id in self._written_ids:
+            return await self.repository.find_item_by_id(id)
+
+        item = self.cache.get(id)
+        if item is None:
+            token = self.cache.token()
+            item = await self.repository.find_item_by_id(id)
+            self._store(item, token)
+        return item
+
+    async def find_items_by_ids(
+        self, ids: Iterable[UUID], fields: Optional[Sequence[str]] = None
+    ) -> List[Item]:
+        return await self.repository.find_items_by_ids(ids, fields)
+
+    async def reserve_stock(self, item_id: UUID, quantity: int) -> bool:
+        changed = await self.repository.reserve_stock(item_id, quantity)
+        if changed:
+            self._written_ids.add(item_id)
+        return changed
+
+    async def release_stock(self, item_id: UUID, quantity: int) -> bool:
+        changed = await self.repository.release_stock(item_id, quantity)
+        if changed:
+            self._written_ids.add(item_id)
+        return changed
+
+    async def get_catalog_version(self) -> int:
+        return await self.repository.get_catalog_version()
+
+    def committed(self) -> None:
+        """Drop the items the request wrote, now that its writes are visible."""
+        for item_id in self._written_ids:
+            self.cache.invalidate(item_id)
+        self._written_ids.clear()
+        self._written_names.clear()
+
+    def _written(self, item: Item) -> None:
+        self._written_ids.add(item.id)
+        self._written_names.add(item.name)
+
+    def _store(self, item: Optional[Item], token: int) -> None:
+        # What this request wrote is not committed yet, so it stays out
+        if item is None or item.id in self._written_ids:
+            return
+        if item.name in self._written_names:
+            return
+        self.cache.put(item, token)
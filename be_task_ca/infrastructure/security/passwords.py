@@ -0,0 +1,151 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Type
+
+from be_task_ca.domain.user.passwords import PasswordHasher
+
+SALT_SIZE = 16
+
+
+class PasswordKdf(ABC):
+    """
+    Synchronous key derivation function producing self-describing hashes.
+
+    Hashes start with the scheme name followed by the cost parameters, so
+    they stay verifiable after the configured cost changes.
+    """
+
+    scheme: str
+
+    @abstractmethod
+    def hash(self, password: str) -> str:
+        pass
+
+    @classmethod
+    @abstractmethod
+    def verify(cls, password: str, hashed_password: str) -> bool:
+        pass
+
+
+class ScryptKdf(PasswordKdf):
+    scheme = "scrypt"
+
+    def __init__(self, n: int = 2**14, r: int = 8, p: int = 1):
+        self.n = n
+        self.r = r
+        self.p = p
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(SALT_SIZE)
+        digest = _scrypt(password, salt, self.n, self.r, self.p)
+        parameters = (self.scheme, self.n, self.r, self.p)
+        return "$".join([*map(str, parameters), _encode(salt), _encode(digest)])
+
+    @classmethod
+    def verify(cls, password: str, hashed_password: str) -> bool:
+        _, n, r, p, salt, expected = hashed_password.split("$")
+        digest = _scrypt(password, _decode(salt), int(n), int(r), int(p))
+        return hmac.compare_digest(digest, _decode(expected))
+
+
+class Pbkdf2Kdf(PasswordKdf):
+    scheme = "pbkdf2_sha256"
+
+    def __init__(self, iterations: int = 600000):
+        self.iterations = iterations
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(SALT_SIZE)
+        digest = _pbkdf2(password, salt, self.iterations)
+        parameters = (self.scheme, self.iterations, _encode(salt), _encode(digest))
+        return "$".join(map(str, parameters))
+
+    @classmethod
+    def verify(cls, password: str, hashed_password: str) -> bool:
+        _, iterations, salt, expected = hashed_password.split("$")
+        digest = _pbkdf2(password, _decode(salt), int(iterations))
+        return hmac.compare_digest(digest, _decode(expected))
+
+
+KDFS: Dict[str, Type[PasswordKdf]] = {
+    kdf.scheme: kdf for kdf in (ScryptKdf, Pbkdf2Kdf)
+}
+
+
+def create_kdf(scheme: str, cost: int) -> PasswordKdf:
+    """Build the KDF for `scheme`; `cost` is scrypt's N or PBKDF2's iterations."""
+    if scheme == ScryptKdf.scheme:
+        return ScryptKdf(n=cost)
+    if scheme == Pbkdf2Kdf.scheme:
+        return Pbkdf2Kdf(iterations=cost)
+    raise ValueError(f"Unknown password hash scheme '{scheme}'")
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    scheme, _, _ = hashed_password.partition("$")
+    kdf = KDFS.get(scheme)
+    if kdf is not None:
+        try:
+            return kdf.verify(password, hashed_password)
+        except ValueError:
+            # Malformed hash, including bad base64 and out of range costs
+            return False
+
+    # Accounts created before salted hashes were introduced hold a bare
+    # SHA-512 hex digest
+    legacy = hashlib.sha512(password.encode("UTF-8")).hexdigest()
+    return hmac.compare_digest(legacy, hashed_password)
+
+
+class PooledPasswordHasher(PasswordHasher):
+    """
+    Runs a KDF on a bounded thread pool so hashing never blocks the event loop.
+
+    hashlib releases the GIL while deriving keys, so threads hash in
+    parallel, and at most `max_workers` hashes run at once however many
+    signups arrive together; the rest wait in the pool's queue.
+    """
+
+    def __init__(self, kdf: PasswordKdf, max_workers: int):
+        self.kdf = kdf
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hasher"
+        )
+
+    async def hash(self, password: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.kdf.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, verify_password, password, hashed_password
+        )
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    # scrypt needs 128 * n * r bytes; leave headroom above OpenSSL's default cap
+    return hashlib.scrypt(
+        password.encode("UTF-8"), salt=salt, n=n, r=r, p=p,
+        maxmem=256 * n * r, dklen=32,
+    )
+
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password.encode("UTF-8"), salt, iterations)
+
+
+def _encode(value: bytes) -> str:
+    return base64.b64encode(value).decode("ascii")
+
+
+def _decode(value: str) -> bytes:
+    return base64.b64decode(value)
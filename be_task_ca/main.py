@@ -1,26 +1,52 @@
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 
+from be_task_ca.infrastructure.api.admission import AdmissionMiddleware
+from be_task_ca.infrastructure.api.server_timing import ServerTimingMiddleware
+from be_task_ca.infrastructure.api.unit_of_work import UnitOfWorkMiddleware
 from be_task_ca.infrastructure.api.routes.user_routes import user_router
 from be_task_ca.infrastructure.api.routes.item_routes import item_router
-from be_task_ca.infrastructure.database.config import SessionLocal
-from be_task_ca.config import get_repository_type
+from be_task_ca.infrastructure.api.routes.internal_routes import internal_router
+from be_task_ca.infrastructure.container import get_app_container
+from be_task_ca.infrastructure.database.config import (
+    dispose_async_engines,
+    get_async_engine,
+    get_replica_engines,
+    warm_up,
+)
+from be_task_ca.infrastructure.factory import (
+    close_in_memory_repositories,
+    close_password_hasher,
+    get_admission_controller,
+)
+from be_task_ca.config import get_db_pool_size, get_db_pool_warmup
 
 
 app = FastAPI()
 app.include_router(user_router)
 app.include_router(item_router)
+app.include_router(internal_router)
 
-@app.middleware("http")
-async def db_session_middleware(request: Request, call_next):
-    response = Response("Internal server error", status_code=500)
-    try:
-        if get_repository_type() == "sql":
-            request.state.db = SessionLocal()
-        response = await call_next(request)
-    finally:
-        if get_repository_type() == "sql" and hasattr(request.state, "db"):
-            request.state.db.close()
-    return response
+@app.on_event("startup")
+async def build_container():
+    if get_app_container().repository_type == "sql":
+        # Connections past the pool size would be closed again on return
+        connections = min(get_db_pool_warmup(), get_db_pool_size())
+        for engine in [get_async_engine(), *get_replica_engines()]:
+            await warm_up(engine, connections)
+
+@app.on_event("shutdown")
+async def close_repositories():
+    close_password_hasher()
+    close_in_memory_repositories()
+    # Pooled connections belong to this event loop and cannot outlive it
+    await dispose_async_engines()
+
+app.add_middleware(UnitOfWorkMiddleware, get_container=get_app_container)
+# Outside the unit of work, so the commit counts towards the request's timing
+app.add_middleware(ServerTimingMiddleware)
+
+# Added last so it runs first: shed requests never open a session
+app.add_middleware(AdmissionMiddleware, get_controller=get_admission_controller)
 
 @app.get("/")
 async def root():
@@ -2,19 +2,26 @@ import pytest
 import uuid
 from fastapi import HTTPException
 
-from be_task_ca.application.item.usecases import create_item, get_all, model_to_schema
+from be_task_ca.application.item.usecases import (
+    create_item, create_items_bulk, get_all, get_item, model_to_schema, stream_all
+)
 from be_task_ca.application.dto.item_dto import CreateItemRequest
 from be_task_ca.domain.item.entities import Item
+from be_task_ca.domain.item.queries import ItemQuery, ItemSort
+from be_task_ca.infrastructure.in_memory.async_repositories import (
+    AsyncInMemoryItemRepository,
+)
 from be_task_ca.infrastructure.in_memory.item_repository import InMemoryItemRepository
 
 
 @pytest.fixture
 def item_repository():
     """Fixture that provides a clean in-memory item repository for each test"""
-    return InMemoryItemRepository()
+    return AsyncInMemoryItemRepository(InMemoryItemRepository())
 
 
-def test_create_item_success(item_repository):
+@pytest.mark.anyio
+async def test_create_item_success(item_repository):
     # Arrange
     item_request = CreateItemRequest(
         name="Test Item",
@@ -23,7 +30,7 @@ def test_create_item_success(item_repository):
         quantity=5
     )
 
-    response = create_item(item_request, item_repository)
+    response = await create_item(item_request, item_repository)
 
     assert response.id is not None
     assert response.name == "Test Item"
@@ -31,19 +38,20 @@ def test_create_item_success(item_repository):
     assert response.price == 10.99
     assert response.quantity == 5
 
-    saved_item = item_repository.find_item_by_name("Test Item")
+    saved_item = await item_repository.find_item_by_name("Test Item")
     assert saved_item is not None
     assert saved_item.price == 10.99
 
 
-def test_create_item_duplicate_name(item_repository):
+@pytest.mark.anyio
+async def test_create_item_duplicate_name(item_repository):
     item_request = CreateItemRequest(
         name="Test Item",
         description="This is a test item",
         price=10.99,
         quantity=5
     )
-    create_item(item_request, item_repository)  # Create first item
+    await create_item(item_request, item_repository)  # Create first item
 
     duplicate_request = CreateItemRequest(
         name="Test Item",  # Same name as first item
@@ -53,19 +61,33 @@ def test_create_item_duplicate_name(item_repository):
     )
 
     with pytest.raises(HTTPException) as excinfo:
-        create_item(duplicate_request, item_repository)
+        await create_item(duplicate_request, item_repository)
 
     assert excinfo.value.status_code == 409
     assert "already exists" in excinfo.value.detail
 
 
-def test_get_all_items_empty(item_repository):
-    response = get_all(item_repository)
+@pytest.mark.anyio
+async def test_get_item(item_repository):
+    item = await item_repository.save_item(Item(name="Lamp", price=20.0, quantity=3))
+
+    response = await get_item(item.id, item_repository)
+
+    assert response == model_to_schema(item)
+    with pytest.raises(HTTPException) as excinfo:
+        await get_item(uuid.uuid4(), item_repository)
+    assert excinfo.value.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_get_all_items_empty(item_repository):
+    response = await get_all(item_repository)
 
     assert len(response.items) == 0
 
 
-def test_get_all_items_with_items(item_repository):
+@pytest.mark.anyio
+async def test_get_all_items_with_items(item_repository):
     items = [
         CreateItemRequest(name="Item 1", description="Description 1", price=10.0, quantity=5),
         CreateItemRequest(name="Item 2", description="Description 2", price=20.0, quantity=10),
@@ -73,9 +95,9 @@ def test_get_all_items_with_items(item_repository):
     ]
 
     for item_request in items:
-        create_item(item_request, item_repository)
+        await create_item(item_request, item_repository)
 
-    response = get_all(item_repository)
+    response = await get_all(item_repository)
 
     # Assert
     assert len(response.items) == 3
@@ -99,4 +121,141 @@ def test_model_to_schema_conversion():
     assert schema.name == "Test Item"
     assert schema.description == "Test Description"
     assert schema.price == 15.99
-    assert schema.quantity == 7
\ No newline at end of file
+    assert schema.quantity == 7
+
+@pytest.mark.anyio
+async def test_get_all_paginates_with_cursor(item_repository):
+    for i in range(5):
+        await create_item(
+            CreateItemRequest(name=f"Item {i}", price=10.0, quantity=1), item_repository
+        )
+
+    first_page = await get_all(item_repository, limit=2)
+    second_page = await get_all(item_repository, limit=2, cursor=first_page.next_cursor)
+    last_page = await get_all(item_repository, limit=2, cursor=second_page.next_cursor)
+
+    assert len(first_page.items) == 2
+    assert len(second_page.items) == 2
+    assert len(last_page.items) == 1
+    assert last_page.next_cursor is None
+
+    ids = [item.id for page in (first_page, second_page, last_page) for item in page.items]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 5
+
+
+@pytest.mark.anyio
+async def test_get_all_exact_page_has_no_next_cursor(item_repository):
+    for i in range(2):
+        await create_item(
+            CreateItemRequest(name=f"Item {i}", price=10.0, quantity=1), item_repository
+        )
+
+    response = await get_all(item_repository, limit=2)
+
+    assert len(response.items) == 2
+    assert response.next_cursor is None
+
+
+@pytest.mark.anyio
+async def test_get_all_invalid_cursor(item_repository):
+    with pytest.raises(HTTPException) as excinfo:
+        await get_all(item_repository, limit=2, cursor="not-a-cursor")
+
+    assert excinfo.value.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_create_items_bulk_reports_conflicts(item_repository):
+    await create_item(CreateItemRequest(name="Existing", price=1.0, quantity=1), item_repository)
+
+    response = await create_items_bulk([
+        CreateItemRequest(name="New 1", price=1.0, quantity=1),
+        CreateItemRequest(name="Existing", price=2.0, quantity=1),
+        CreateItemRequest(name="New 2", price=3.0, quantity=1),
+        CreateItemRequest(name="New 1", price=4.0, quantity=1),
+    ], item_repository)
+
+    assert response.created == 2
+    assert response.conflicts == 2
+    assert [result.status for result in response.results] == [
+        "created", "conflict", "created", "conflict"
+    ]
+    assert response.results[0].id == (await item_repository.find_item_by_name("New 1")).id
+    assert (await item_repository.find_item_by_name("New 1")).price == 1.0
+    assert (await item_repository.find_item_by_name("Existing")).price == 1.0
+
+
+@pytest.mark.anyio
+async def test_get_all_with_fields_returns_only_requested_fields(item_repository):
+    await create_item(
+        CreateItemRequest(name="Lamp", description="Bright", price=10.0, quantity=1),
+        item_repository
+    )
+
+    response = await get_all(item_repository, limit=10, fields=["name", "price"])
+
+    assert response.dict(exclude_unset=True)["items"] == [
+        {"id": response.items[0].id, "name": "Lamp", "price": 10.0}
+    ]
+    assert [line async for line in stream_all(item_repository, ["name"])] == [
+        f'{{"id": "{response.items[0].id}", "name": "Lamp"}}\n'
+    ]
+
+
+@pytest.mark.anyio
+async def test_get_all_with_unknown_field(item_repository):
+    with pytest.raises(HTTPException) as excinfo:
+        await get_all(item_repository, fields=["name", "password"])
+
+    assert excinfo.value.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_get_all_sorted_by_price_paginates_with_cursor(item_repository):
+    for price in (5.0, 1.0, 3.0, 1.0, 4.0):
+        await create_item(
+            CreateItemRequest(name=f"Item {uuid.uuid4()}", price=price, quantity=1),
+            item_repository
+        )
+    query = ItemQuery(max_price=4.0, sort=ItemSort.PRICE_DESC)
+
+    first_page = await get_all(item_repository, limit=2, fields=["name"], query=query)
+    second_page = await get_all(
+        item_repository, limit=2, cursor=first_page.next_cursor, fields=["name"],
+        query=query
+    )
+
+    assert len(first_page.items) == 2
+    assert len(second_page.items) == 2
+    assert second_page.next_cursor is None
+    prices = [
+        (await item_repository.find_item_by_id(item.id)).price
+        for item in first_page.items + second_page.items
+    ]
+    assert prices == [4.0, 3.0, 1.0, 1.0]
+
+
+@pytest.mark.anyio
+async def test_get_all_rejects_inverted_price_range(item_repository):
+    with pytest.raises(HTTPException) as excinfo:
+        await get_all(item_repository, query=ItemQuery(min_price=5.0, max_price=1.0))
+
+    assert excinfo.value.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_get_all_rejects_cursor_of_another_sort(item_repository):
+    for i in range(3):
+        await create_item(
+            CreateItemRequest(name=f"Item {i}", price=1.0, quantity=1), item_repository
+        )
+    cursor = (await get_all(item_repository, limit=1)).next_cursor
+
+    with pytest.raises(HTTPException) as excinfo:
+        await get_all(
+            item_repository, limit=1, cursor=cursor,
+            query=ItemQuery(sort=ItemSort.PRICE)
+        )
+
+    assert excinfo.value.status_code == 400
@@ -1,27 +1,49 @@
+import asyncio
 import pytest
 import uuid
 from fastapi import HTTPException
 
 from be_task_ca.application.user.usecases import (
-    create_user, add_item_to_cart, list_items_in_cart, cart_item_model_to_schema
+    create_user, create_users_bulk, add_item_to_cart, list_items_in_cart,
+    cart_item_model_to_schema, update_cart_item_quantity, remove_item_from_cart,
+    view_cart
+)
+from be_task_ca.application.dto.user_dto import (
+    CreateUserRequest, AddToCartRequest, UpdateCartItemRequest
 )
-from be_task_ca.application.dto.user_dto import CreateUserRequest, AddToCartRequest
 from be_task_ca.domain.user.entities import User, CartItem
 from be_task_ca.domain.item.entities import Item
 from be_task_ca.infrastructure.in_memory.user_repository import InMemoryUserRepository
 from be_task_ca.infrastructure.in_memory.item_repository import InMemoryItemRepository
+from be_task_ca.infrastructure.in_memory.async_repositories import (
+    AsyncInMemoryItemRepository,
+    AsyncInMemoryUserRepository,
+)
+from be_task_ca.infrastructure.security.passwords import (
+    PooledPasswordHasher, ScryptKdf, verify_password
+)
 
 
 @pytest.fixture
-def user_repository():
+def item_repository():
+    """Fixture that provides a clean in-memory item repository for each test"""
+    return AsyncInMemoryItemRepository(InMemoryItemRepository())
+
+
+@pytest.fixture
+def user_repository(item_repository):
     """Fixture that provides a clean in-memory user repository for each test"""
-    return InMemoryUserRepository()
+    return AsyncInMemoryUserRepository(
+        InMemoryUserRepository(item_repository=item_repository.repository)
+    )
 
 
 @pytest.fixture
-def item_repository():
-    """Fixture that provides a clean in-memory item repository for each test"""
-    return InMemoryItemRepository()
+def password_hasher():
+    """Fixture that provides a password hasher cheap enough for tests"""
+    hasher = PooledPasswordHasher(ScryptKdf(n=2**10), max_workers=1)
+    yield hasher
+    hasher.close()
 
 
 @pytest.fixture
@@ -45,12 +67,13 @@ def sample_item(item_repository):
         price=29.99,
         quantity=10
     )
-    item_repository.save_item(item)
+    item_repository.repository.save_item(item)
     return item
 
 
-def test_create_user_success(user_repository, sample_user_request):
-    response = create_user(sample_user_request, user_repository)
+@pytest.mark.anyio
+async def test_create_user_success(user_repository, sample_user_request, password_hasher):
+    response = await create_user(sample_user_request, user_repository, password_hasher)
 
     assert response.id is not None
     assert response.first_name == "John"
@@ -58,14 +81,16 @@ def test_create_user_success(user_repository, sample_user_request):
     assert response.email == "john.doe@example.com"
     assert response.shipping_address == "123 Main St"
 
-    saved_user = user_repository.find_user_by_email("john.doe@example.com")
+    saved_user = await user_repository.find_user_by_email("john.doe@example.com")
     assert saved_user is not None
     assert saved_user.first_name == "John"
-    assert saved_user.hashed_password is not None  # Password should be hashed
+    assert saved_user.hashed_password.startswith("scrypt$")
+    assert verify_password("password123", saved_user.hashed_password)
 
 
-def test_create_user_duplicate_email(user_repository, sample_user_request):
-    create_user(sample_user_request, user_repository)  # Create first user
+@pytest.mark.anyio
+async def test_create_user_duplicate_email(user_repository, sample_user_request, password_hasher):
+    await create_user(sample_user_request, user_repository, password_hasher)  # Create first user
 
     duplicate_request = CreateUserRequest(
         first_name="Jane",
@@ -76,32 +101,34 @@ def test_create_user_duplicate_email(user_repository, sample_user_request):
     )
 
     with pytest.raises(HTTPException) as excinfo:
-        create_user(duplicate_request, user_repository)
+        await create_user(duplicate_request, user_repository, password_hasher)
 
     assert excinfo.value.status_code == 409
     assert "already exists" in excinfo.value.detail
 
 
-def test_add_item_to_cart_success(user_repository, item_repository, sample_user_request, sample_item):
-    user_response = create_user(sample_user_request, user_repository)
+@pytest.mark.anyio
+async def test_add_item_to_cart_success(user_repository, item_repository, sample_user_request, sample_item, password_hasher):
+    user_response = await create_user(sample_user_request, user_repository, password_hasher)
     cart_request = AddToCartRequest(
         item_id=sample_item.id,
         quantity=2
     )
 
-    response = add_item_to_cart(user_response.id, cart_request, user_repository, item_repository)
+    response = await add_item_to_cart(user_response.id, cart_request, user_repository, item_repository)
 
     assert len(response.items) == 1
     assert response.items[0].item_id == sample_item.id
     assert response.items[0].quantity == 2
 
-    user = user_repository.find_user_by_id(user_response.id)
+    user = await user_repository.find_user_by_id(user_response.id)
     assert len(user.cart_items) == 1
     assert user.cart_items[0].item_id == sample_item.id
     assert user.cart_items[0].quantity == 2
 
 
-def test_add_item_to_cart_user_not_found(user_repository, item_repository, sample_item):
+@pytest.mark.anyio
+async def test_add_item_to_cart_user_not_found(user_repository, item_repository, sample_item):
     random_user_id = uuid.uuid4()
     cart_request = AddToCartRequest(
         item_id=sample_item.id,
@@ -109,14 +136,15 @@ def test_add_item_to_cart_user_not_found(user_repository, item_repository, sampl
     )
 
     with pytest.raises(HTTPException) as excinfo:
-        add_item_to_cart(random_user_id, cart_request, user_repository, item_repository)
+        await add_item_to_cart(random_user_id, cart_request, user_repository, item_repository)
 
     assert excinfo.value.status_code == 404
     assert "User does not exist" in excinfo.value.detail
 
 
-def test_add_item_to_cart_item_not_found(user_repository, item_repository, sample_user_request):
-    user_response = create_user(sample_user_request, user_repository)
+@pytest.mark.anyio
+async def test_add_item_to_cart_item_not_found(user_repository, item_repository, sample_user_request, password_hasher):
+    user_response = await create_user(sample_user_request, user_repository, password_hasher)
     random_item_id = uuid.uuid4()
     cart_request = AddToCartRequest(
         item_id=random_item_id,
@@ -124,54 +152,58 @@ def test_add_item_to_cart_item_not_found(user_repository, item_repository, sampl
     )
 
     with pytest.raises(HTTPException) as excinfo:
-        add_item_to_cart(user_response.id, cart_request, user_repository, item_repository)
+        await add_item_to_cart(user_response.id, cart_request, user_repository, item_repository)
 
     assert excinfo.value.status_code == 404
     assert "Item does not exist" in excinfo.value.detail
 
 
-def test_add_item_to_cart_insufficient_quantity(user_repository, item_repository, sample_user_request, sample_item):
-    user_response = create_user(sample_user_request, user_repository)
+@pytest.mark.anyio
+async def test_add_item_to_cart_insufficient_quantity(user_repository, item_repository, sample_user_request, sample_item, password_hasher):
+    user_response = await create_user(sample_user_request, user_repository, password_hasher)
     cart_request = AddToCartRequest(
         item_id=sample_item.id,
         quantity=sample_item.quantity + 1  # Request more than available
     )
 
     with pytest.raises(HTTPException) as excinfo:
-        add_item_to_cart(user_response.id, cart_request, user_repository, item_repository)
+        await add_item_to_cart(user_response.id, cart_request, user_repository, item_repository)
 
     assert excinfo.value.status_code == 409
     assert "Not enough items in stock" in excinfo.value.detail
 
 
-def test_add_item_to_cart_already_in_cart(user_repository, item_repository, sample_user_request, sample_item):
-    user_response = create_user(sample_user_request, user_repository)
+@pytest.mark.anyio
+async def test_add_item_to_cart_already_in_cart(user_repository, item_repository, sample_user_request, sample_item, password_hasher):
+    user_response = await create_user(sample_user_request, user_repository, password_hasher)
     cart_request = AddToCartRequest(
         item_id=sample_item.id,
         quantity=2
     )
 
-    add_item_to_cart(user_response.id, cart_request, user_repository, item_repository)
+    await add_item_to_cart(user_response.id, cart_request, user_repository, item_repository)
 
     # Try to add same item again
     # Act & Assert
     with pytest.raises(HTTPException) as excinfo:
-        add_item_to_cart(user_response.id, cart_request, user_repository, item_repository)
+        await add_item_to_cart(user_response.id, cart_request, user_repository, item_repository)
 
     assert excinfo.value.status_code == 409
     assert "Item already in cart" in excinfo.value.detail
 
 
-def test_list_items_in_cart_empty(user_repository, sample_user_request):
-    user_response = create_user(sample_user_request, user_repository)
+@pytest.mark.anyio
+async def test_list_items_in_cart_empty(user_repository, sample_user_request, password_hasher):
+    user_response = await create_user(sample_user_request, user_repository, password_hasher)
 
-    response = list_items_in_cart(user_response.id, user_repository)
+    response = await list_items_in_cart(user_response.id, user_repository)
 
     assert len(response.items) == 0
 
 
-def test_list_items_in_cart_with_items(user_repository, item_repository, sample_user_request, sample_item):
-    user_response = create_user(sample_user_request, user_repository)
+@pytest.mark.anyio
+async def test_list_items_in_cart_with_items(user_repository, item_repository, sample_user_request, sample_item, password_hasher):
+    user_response = await create_user(sample_user_request, user_repository, password_hasher)
 
     second_item = Item(
         name="Second Item",
@@ -179,9 +211,9 @@ def test_list_items_in_cart_with_items(user_repository, item_repository, sample_
         price=19.99,
         quantity=5
     )
-    item_repository.save_item(second_item)
+    await item_repository.save_item(second_item)
 
-    add_item_to_cart(
+    await add_item_to_cart(
         user_response.id,
         AddToCartRequest(item_id=sample_item.id, quantity=2),
         user_repository,
@@ -189,12 +221,12 @@ def test_list_items_in_cart_with_items(user_repository, item_repository, sample_
     )
 
     # Manually add second item (since add_item_to_cart won't allow adding a second item)
-    user = user_repository.find_user_by_id(user_response.id)
+    user = await user_repository.find_user_by_id(user_response.id)
     cart_item = CartItem(user_id=user.id, item_id=second_item.id, quantity=3)
     user.cart_items.append(cart_item)
-    user_repository.save_user(user)
+    await user_repository.save_user(user)
 
-    response = list_items_in_cart(user_response.id, user_repository)
+    response = await list_items_in_cart(user_response.id, user_repository)
 
     assert len(response.items) == 2
     item_ids = {item.item_id for item in response.items}
@@ -218,4 +250,200 @@ def test_cart_item_model_to_schema():
     schema = cart_item_model_to_schema(cart_item)
 
     assert schema.item_id == item_id
-    assert schema.quantity == 4
\ No newline at end of file
+    assert schema.quantity == 4
+
+
+@pytest.mark.anyio
+async def test_create_users_bulk_reports_conflicts(user_repository, password_hasher):
+    def request(email):
+        return CreateUserRequest(
+            first_name="Bulk", last_name="User", email=email, password="secret"
+        )
+
+    await create_user(request("taken@example.com"), user_repository, password_hasher)
+
+    response = await create_users_bulk([
+        request("new1@example.com"),
+        request("taken@example.com"),
+        request("new2@example.com"),
+        request("new1@example.com"),
+    ], user_repository, password_hasher)
+
+    assert response.created == 2
+    assert response.conflicts == 2
+    assert [result.status for result in response.results] == [
+        "created", "conflict", "created", "conflict"
+    ]
+    created = await user_repository.find_user_by_email("new1@example.com")
+    assert response.results[0].id == created.id
+    assert verify_password("secret", created.hashed_password)
+
+
+@pytest.mark.anyio
+async def test_update_cart_item_quantity(
+    user_repository, item_repository, sample_user_request, sample_item, password_hasher
+):
+    user_response = await create_user(sample_user_request, user_repository, password_hasher)
+    await add_item_to_cart(
+        user_response.id,
+        AddToCartRequest(item_id=sample_item.id, quantity=1),
+        user_repository,
+        item_repository,
+    )
+
+    response = await update_cart_item_quantity(
+        user_response.id,
+        sample_item.id,
+        UpdateCartItemRequest(quantity=3),
+        user_repository,
+        item_repository,
+    )
+
+    assert [(line.item_id, line.quantity) for line in response.items] == [
+        (sample_item.id, 3)
+    ]
+    assert (await item_repository.find_item_by_id(sample_item.id)).quantity == 7
+
+    with pytest.raises(HTTPException) as excinfo:
+        await update_cart_item_quantity(
+            user_response.id,
+            sample_item.id,
+            UpdateCartItemRequest(quantity=sample_item.quantity + 1),
+            user_repository,
+            item_repository,
+        )
+    assert excinfo.value.status_code == 409
+
+
+class InterleavingUserRepository(AsyncInMemoryUserRepository):
+    """Yields to other tasks after every cart read, so requests interleave."""
+
+    async def find_cart_items_for_user_id(self, user_id):
+        cart_items = await super().find_cart_items_for_user_id(user_id)
+        await asyncio.sleep(0)
+        return cart_items
+
+
+@pytest.mark.anyio
+async def test_concurrent_quantity_updates_keep_stock_consistent(
+    item_repository, sample_item
+):
+    user_repository = InterleavingUserRepository(
+        InMemoryUserRepository(item_repository=item_repository.repository)
+    )
+    user = await user_repository.save_user(User(email="race@example.com"))
+    await add_item_to_cart(
+        user.id,
+        AddToCartRequest(item_id=sample_item.id, quantity=2),
+        user_repository,
+        item_repository,
+    )
+
+    # Both read the line at 2 before either writes
+    await asyncio.gather(*(
+        update_cart_item_quantity(
+            user.id,
+            sample_item.id,
+            UpdateCartItemRequest(quantity=quantity),
+            user_repository,
+            item_repository,
+        )
+        for quantity in (5, 4)
+    ))
+
+    [line] = await user_repository.find_cart_items_for_user_id(user.id)
+    item = await item_repository.find_item_by_id(sample_item.id)
+    assert item.quantity == sample_item.quantity - line.quantity
+
+
+@pytest.mark.anyio
+async def test_remove_item_from_cart(
+    user_repository, item_repository, sample_user_request, sample_item, password_hasher
+):
+    user_response = await create_user(sample_user_request, user_repository, password_hasher)
+    await add_item_to_cart(
+        user_response.id,
+        AddToCartRequest(item_id=sample_item.id, quantity=1),
+        user_repository,
+        item_repository,
+    )
+
+    response = await remove_item_from_cart(
+        user_response.id, sample_item.id, user_repository, item_repository
+    )
+
+    assert response.items == []
+    assert (await item_repository.find_item_by_id(sample_item.id)).quantity == 10
+    with pytest.raises(HTTPException) as excinfo:
+        await remove_item_from_cart(
+            user_response.id, sample_item.id, user_repository, item_repository
+        )
+    assert excinfo.value.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_view_cart_includes_items_and_totals(
+    user_repository, item_repository, sample_user_request, password_hasher
+):
+    user_response = await create_user(sample_user_request, user_repository, password_hasher)
+    for name, price, quantity in [("Pen", 0.1, 3), ("Ink", 0.2, 1)]:
+        item = Item(name=name, price=price, quantity=10)
+        item_repository.repository.save_item(item)
+        await add_item_to_cart(
+            user_response.id,
+            AddToCartRequest(item_id=item.id, quantity=quantity),
+            user_repository,
+            item_repository,
+        )
+
+    cart = await view_cart(user_response.id, user_repository)
+
+    assert [(line.name, line.unit_price, line.line_total) for line in cart.items] == [
+        ("Pen", 0.1, 0.3), ("Ink", 0.2, 0.2)
+    ]
+    assert cart.total == 0.5
+
+
+@pytest.mark.anyio
+async def test_add_item_to_cart_reserves_stock(
+    user_repository, item_repository, sample_user_request, sample_item, password_hasher
+):
+    user_response = await create_user(sample_user_request, user_repository, password_hasher)
+    cart_request = AddToCartRequest(item_id=sample_item.id, quantity=4)
+
+    await add_item_to_cart(user_response.id, cart_request, user_repository, item_repository)
+    with pytest.raises(HTTPException) as excinfo:
+        await add_item_to_cart(
+            user_response.id, cart_request, user_repository, item_repository
+        )
+
+    assert excinfo.value.detail == "Item already in cart"
+    # The second reservation was handed back when its line was rejected
+    assert (await item_repository.find_item_by_id(sample_item.id)).quantity == 6
+
+
+@pytest.mark.anyio
+async def test_concurrent_adds_never_oversell(user_repository, item_repository):
+    item = Item(name="Flash Sale", price=1.0, quantity=100)
+    item_repository.repository.save_item(item)
+    users = [User(email=f"buyer{i}@example.com") for i in range(300)]
+    for user in users:
+        user_repository.repository.save_user(user)
+
+    async def add(user):
+        try:
+            await add_item_to_cart(
+                user.id,
+                AddToCartRequest(item_id=item.id, quantity=1),
+                user_repository,
+                item_repository,
+            )
+            return True
+        except HTTPException as error:
+            assert error.status_code == 409
+            return False
+
+    results = await asyncio.gather(*(add(user) for user in users))
+
+    assert results.count(True) == 100
+    assert (await item_repository.find_item_by_id(item.id)).quantity == 0
@@ -1,4 +1,7 @@
 import os
+import re
+from contextlib import contextmanager
+
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -7,7 +10,9 @@ import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 
 from be_task_ca.config import use_in_memory_repositories, use_sql_repositories
+from be_task_ca.infrastructure.container import reset_app_container
 from be_task_ca.infrastructure.database.config import Base
+from be_task_ca.infrastructure.database.instrumentation import track_queries
 
 TEST_DATABASE_URL = os.environ.get(
     "TEST_DATABASE_URL",
@@ -55,7 +60,14 @@ def db_session(test_engine):
     connection = test_engine.connect()
     transaction = connection.begin()
 
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=connection)
+    # Commits and rollbacks inside the test act on savepoints, so the outer
+    # transaction can still undo everything afterwards
+    TestingSessionLocal = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=connection,
+        join_transaction_mode="create_savepoint",
+    )
     session = TestingSessionLocal()
 
     try:
@@ -71,11 +83,14 @@ def use_sql_db():
     """Switch to SQL repositories for tests."""
     prev_type = os.environ.get("REPOSITORY_TYPE")
     use_sql_repositories()
+    # The app's composition root reads the repository type once
+    reset_app_container()
     yield
     if prev_type:
         os.environ["REPOSITORY_TYPE"] = prev_type
     else:
         use_in_memory_repositories()
+    reset_app_container()
 
 
 @pytest.fixture
@@ -83,8 +98,48 @@ def use_memory_db():
     """Switch to in-memory repositories for tests."""
     prev_type = os.environ.get("REPOSITORY_TYPE")
     use_in_memory_repositories()
+    reset_app_container()
     yield
     if prev_type:
         os.environ["REPOSITORY_TYPE"] = prev_type
     else:
-        use_sql_repositories()
\ No newline at end of file
+        use_sql_repositories()
+    reset_app_container()
+
+@pytest.fixture
+def anyio_backend():
+    """Run async tests on asyncio, the event loop the application is served on."""
+    return "asyncio"
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fail when the SQL statements run inside the block exceed a budget:
+
+        with query_budget(2):
+            repository.find_user_by_id(user_id)
+    """
+    @contextmanager
+    def query_budget(limit: int):
+        with track_queries() as stats:
+            yield stats
+        assert stats.count <= limit, f"Ran {stats.count} queries, budget is {limit}"
+
+    return query_budget
+
+
+@pytest.fixture
+def endpoint_query_budget():
+    """
+    Fail when a response reports more SQL statements than a budget.
+
+    The app runs on the test client's own thread, so its statements are
+    read from the Server-Timing header rather than tracked here.
+    """
+    def endpoint_query_budget(response, limit: int) -> None:
+        timing = response.headers["Server-Timing"]
+        count = int(re.search(r'db;.*desc="(\d+) queries"', timing).group(1))
+        assert count <= limit, f"Ran {count} queries, budget is {limit}"
+
+    return endpoint_query_budget
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from be_task_ca.infrastructure.api.admission import (
+    AdmissionController,
+    ConcurrencyLimiter,
+)
+
+
+@pytest.mark.anyio
+async def test_queued_request_gets_released_slot():
+    limiter = ConcurrencyLimiter(limit=1, queue_size=1, queue_timeout=5)
+    assert await limiter.acquire()
+
+    queued = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.waiting == 1
+
+    limiter.release()
+
+    assert await queued
+    assert limiter.active == 1
+    assert limiter.waiting == 0
+
+
+@pytest.mark.anyio
+async def test_sheds_when_queue_is_full():
+    limiter = ConcurrencyLimiter(limit=1, queue_size=1, queue_timeout=5)
+    assert await limiter.acquire()
+    queued = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    assert not await limiter.acquire()
+
+    limiter.release()
+    assert await queued
+
+
+@pytest.mark.anyio
+async def test_sheds_after_queue_timeout():
+    limiter = ConcurrencyLimiter(limit=1, queue_size=1, queue_timeout=0.01)
+    assert await limiter.acquire()
+
+    assert not await limiter.acquire()
+    assert limiter.waiting == 0
+
+    limiter.release()
+    assert limiter.active == 0
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_does_not_hold_a_slot():
+    limiter = ConcurrencyLimiter(limit=1, queue_size=2, queue_timeout=5)
+    assert await limiter.acquire()
+    cancelled = asyncio.create_task(limiter.acquire())
+    queued = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    limiter.release()
+
+    assert await queued
+    limiter.release()
+    assert limiter.active == 0
+
+
+def test_cheap_paths_use_their_own_limiter():
+    limiter = ConcurrencyLimiter(limit=1, queue_size=0, queue_timeout=0)
+    cheap_limiter = ConcurrencyLimiter(limit=10, queue_size=0, queue_timeout=0)
+    controller = AdmissionController(limiter, cheap_limiter, cheap_paths=["/"])
+
+    assert controller.limiter_for("/") is cheap_limiter
+    assert controller.limiter_for("/items/") is limiter
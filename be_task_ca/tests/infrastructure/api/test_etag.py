@@ -0,0 +1,20 @@
+from be_task_ca.infrastructure.api.etag import etag_matches, make_etag
+
+
+def test_make_etag_is_strong_and_varies():
+    etag = make_etag(1)
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert make_etag(1) == etag
+    assert make_etag(2) != etag
+    assert make_etag(1, "limit=10") != etag
+
+
+def test_etag_matches():
+    etag = make_etag(7)
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
@@ -0,0 +1,23 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from be_task_ca.infrastructure.api.server_timing import ServerTimingMiddleware
+
+
+def test_reports_statements_of_the_request():
+    engine = create_engine("sqlite://")
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware)
+
+    @app.get("/")
+    def query_twice():
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+        return {}
+
+    response = TestClient(app).get("/")
+
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert response.headers["Server-Timing"].endswith('desc="2 queries"')
@@ -0,0 +1,104 @@
+from typing import List
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from be_task_ca.domain.unit_of_work import WriteConflictError
+from be_task_ca.infrastructure.api.unit_of_work import UnitOfWorkMiddleware
+
+
+class RecordingContainer:
+    """Stands in for the app and request containers."""
+
+    read_your_writes_seconds = 5
+    wrote_to_primary = False
+
+    def __init__(self, events: List[str]):
+        self.events = events
+        self.conflict = False
+
+    def request_container(self, read_only: bool = False) -> "RecordingContainer":
+        return self
+
+    async def commit(self) -> None:
+        self.events.append("commit")
+        if self.conflict:
+            raise WriteConflictError("Lost to another write")
+
+    async def rollback(self) -> None:
+        self.events.append("rollback")
+
+    async def close(self) -> None:
+        self.events.append("close")
+
+
+@pytest.fixture
+def events():
+    return []
+
+
+@pytest.fixture
+def client(events):
+    app = FastAPI()
+    container = RecordingContainer(events)
+    app.add_middleware(UnitOfWorkMiddleware, get_container=lambda: container)
+
+    @app.post("/lose")
+    async def lose():
+        container.conflict = True
+        return {"written": True}
+
+    @app.post("/ok")
+    async def ok():
+        events.append("write")
+        return {}
+
+    @app.post("/conflict")
+    async def conflict():
+        events.append("write")
+        raise HTTPException(status_code=409)
+
+    @app.post("/crash")
+    async def crash():
+        events.append("write")
+        raise RuntimeError("boom")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            events.append("body")
+            yield b"chunk"
+
+        return StreamingResponse(chunks())
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_commits_successful_request(client, events):
+    assert client.post("/ok").status_code == 200
+    assert events == ["write", "commit", "close"]
+
+
+def test_rolls_back_error_response(client, events):
+    assert client.post("/conflict").status_code == 409
+    assert events == ["write", "rollback", "close"]
+
+
+def test_rolls_back_failed_request(client, events):
+    assert client.post("/crash").status_code == 500
+    assert events == ["write", "rollback", "close"]
+
+
+def test_conflicting_commit_answers_conflict(client, events):
+    response = client.post("/lose")
+
+    assert response.status_code == 409
+    assert response.json() == {"detail": "Lost to another write"}
+    assert events == ["commit", "close"]
+
+
+def test_commits_before_streaming_body(client, events):
+    assert client.get("/stream").content == b"chunk"
+    assert events == ["commit", "body", "close"]
@@ -0,0 +1,113 @@
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from be_task_ca.domain.item.entities import Item
+from be_task_ca.domain.item.queries import ItemQuery, ItemSort
+from be_task_ca.domain.user.entities import CartItem, User
+from be_task_ca.infrastructure.database.config import Base
+from be_task_ca.infrastructure.database.models import item_model, user_model  # noqa: F401
+from be_task_ca.infrastructure.database.repositories.async_item_repository import (
+    AsyncSQLItemRepository,
+)
+from be_task_ca.infrastructure.database.repositories.async_user_repository import (
+    AsyncSQLUserRepository,
+)
+from be_task_ca.infrastructure.database.unit_of_work import SQLUnitOfWork
+
+
+@pytest.fixture
+async def async_session():
+    """Async session on a private in-memory SQLite database via aiosqlite."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_save_and_find_item(async_session):
+    repository = AsyncSQLItemRepository(async_session)
+    item = Item(name="Lamp", description="Bright", price=10.0, quantity=2)
+
+    await repository.save_item(item)
+
+    assert await repository.find_item_by_id(item.id) == item
+    assert await repository.find_item_by_name("Lamp") == item
+    assert await repository.get_catalog_version() == 1
+
+
+@pytest.mark.anyio
+async def test_insert_and_list_items(async_session):
+    repository = AsyncSQLItemRepository(async_session)
+    await repository.save_item(Item(name="Existing"))
+    items = [Item(name=f"Item {i}", price=float(i), quantity=i % 2) for i in range(5)]
+
+    inserted = await repository.insert_items(items + [Item(name="Existing")])
+
+    assert [item.id for item in inserted] == [item.id for item in items]
+    assert await repository.find_existing_item_names(["Item 1", "Other"]) == {"Item 1"}
+
+    query = ItemQuery(min_price=1.0, in_stock=True, sort=ItemSort.PRICE_DESC)
+    results = await repository.query_items(query, 10, fields=["name", "price"])
+    assert [(item.name, item.quantity) for item in results] == [
+        ("Item 3", 0), ("Item 1", 0)
+    ]
+
+    streamed = [item async for item in repository.iter_all_items(batch_size=2)]
+    assert len(streamed) == 6
+
+
+@pytest.mark.anyio
+async def test_save_and_find_user_with_cart(async_session):
+    items = AsyncSQLItemRepository(async_session)
+    users = AsyncSQLUserRepository(async_session)
+    item = await items.save_item(Item(name="Lamp", price=1.0, quantity=5))
+    user = User(email="ada@example.com", first_name="Ada", last_name="Lovelace")
+    user.cart_items.append(CartItem(user_id=user.id, item_id=item.id, quantity=2))
+
+    await users.save_user(user)
+
+    found = await users.find_user_by_email("ada@example.com")
+    assert found.id == user.id
+    assert found.cart_items == user.cart_items
+    assert await users.find_cart_items_for_user_id(user.id) == user.cart_items
+    assert await users.find_user_by_id(item.id) is None
+
+
+@pytest.mark.anyio
+async def test_unit_of_work_commits_or_discards_all_writes(async_session):
+    items = AsyncSQLItemRepository(async_session)
+    users = AsyncSQLUserRepository(async_session)
+    unit_of_work = SQLUnitOfWork(async_session)
+    lamp = Item(name="Lamp", quantity=5)
+    await items.save_item(lamp)
+    await unit_of_work.commit()
+
+    user = User(email="user@example.com", first_name="Ada")
+    await users.save_user(user)
+    await items.reserve_stock(lamp.id, 2)
+    await users.add_cart_item(CartItem(user_id=user.id, item_id=lamp.id, quantity=2))
+    await unit_of_work.rollback()
+
+    assert (await items.find_item_by_id(lamp.id)).quantity == 5
+    assert not await users.user_exists(user.id)
+    assert await users.find_cart_items_for_user_id(user.id) == []
+
+
+@pytest.mark.anyio
+async def test_search_fallback_matches_word_prefixes(async_session):
+    repository = AsyncSQLItemRepository(async_session)
+    await repository.insert_items([
+        Item(name="Desk lamp", description="Bright"),
+        Item(name="Clamp", description="Holds lamps"),
+    ])
+
+    names = [item.name for item in await repository.search_items(["lamp"], 10)]
+
+    assert names == ["Clamp", "Desk lamp"]
+    assert await repository.search_items(["amp"], 10) == []
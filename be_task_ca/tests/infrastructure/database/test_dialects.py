@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from be_task_ca.domain.item.entities import Item
+from be_task_ca.domain.user.entities import CartItem, User
+from be_task_ca.infrastructure.database import dialects
+from be_task_ca.infrastructure.database.config import Base
+from be_task_ca.infrastructure.database.models import (  # noqa: F401
+    item_model,
+    user_model,
+)
+from be_task_ca.infrastructure.database.repositories.item_repository import (
+    SQLItemRepository,
+)
+from be_task_ca.infrastructure.database.repositories.user_repository import (
+    SQLUserRepository,
+)
+
+
+@pytest.fixture
+def session_without_on_conflict(monkeypatch):
+    """SQLite session that takes the path of backends without ON CONFLICT."""
+    monkeypatch.setattr(dialects, "ON_CONFLICT_INSERTS", {})
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        yield session
+
+    engine.dispose()
+
+
+def test_save_item_updates_or_inserts(session_without_on_conflict):
+    repository = SQLItemRepository(session_without_on_conflict)
+    item = Item(name="Lamp", price=10.0, quantity=2)
+
+    repository.save_item(item)
+    version = repository.get_catalog_version()
+    item.price = 12.0
+    repository.save_item(item)
+
+    assert repository.find_item_by_id(item.id) == item
+    assert repository.get_catalog_version() > version
+
+
+def test_inserts_skip_rows_with_taken_keys(session_without_on_conflict):
+    items = SQLItemRepository(session_without_on_conflict)
+    users = SQLUserRepository(session_without_on_conflict)
+    items.save_item(Item(name="Existing"))
+    new_items = [Item(name=f"Item {i}") for i in range(3)]
+
+    inserted = items.insert_items(
+        new_items + [Item(name="Existing"), Item(name="Item 0")]
+    )
+
+    assert [item.id for item in inserted] == [item.id for item in new_items]
+
+    ada = User(email="ada@example.com", first_name="Ada", last_name="Lovelace")
+    twin = User(email="ada@example.com", first_name="Ada", last_name="Byron")
+    assert users.insert_users([ada, twin]) == [ada]
+    ada.first_name = "Augusta"
+    users.save_user(ada)
+    assert users.find_user_by_id(ada.id).first_name == "Augusta"
+
+    cart_item = CartItem(user_id=ada.id, item_id=new_items[0].id, quantity=1)
+    assert users.add_cart_item(cart_item)
+    assert not users.add_cart_item(cart_item)
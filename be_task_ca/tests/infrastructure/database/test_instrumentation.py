@@ -0,0 +1,54 @@
+import logging
+
+from sqlalchemy import create_engine, text
+
+from be_task_ca.infrastructure.database import instrumentation
+from be_task_ca.infrastructure.database.instrumentation import (
+    SlowQueryLog,
+    instrument_engines,
+    track_queries,
+)
+
+
+def test_track_queries_counts_statements_of_the_block():
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        with track_queries() as stats:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+
+    assert stats.count == 2
+    assert stats.seconds > 0
+
+
+def test_nested_tracking_counts_separately():
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        with track_queries() as outer:
+            connection.execute(text("SELECT 1"))
+            with track_queries() as inner:
+                connection.execute(text("SELECT 2"))
+            connection.execute(text("SELECT 3"))
+
+    assert (outer.count, inner.count) == (2, 1)
+
+
+def test_slow_queries_are_logged(caplog, monkeypatch):
+    monkeypatch.setattr(instrumentation, "_slow_query_log", None)
+    instrument_engines(SlowQueryLog(threshold=0))
+    engine = create_engine("sqlite://")
+
+    with caplog.at_level(logging.WARNING, logger=instrumentation.__name__):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 42"))
+
+    assert any("SELECT 42" in record.getMessage() for record in caplog.records)
+
+
+def test_unsampled_and_fast_queries_are_not_logged(caplog):
+    with caplog.at_level(logging.WARNING, logger=instrumentation.__name__):
+        SlowQueryLog(threshold=0, sample_rate=0).observe("SELECT 1", 10.0)
+        SlowQueryLog(threshold=1).observe("SELECT 2", 0.5)
+
+    assert caplog.records == []
@@ -0,0 +1,79 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from be_task_ca.infrastructure.database.config import engine_options, warm_up
+from be_task_ca.infrastructure.database.pool_metrics import (
+    PoolMetrics,
+    metered_pool_class,
+)
+
+
+def test_histogram_is_cumulative():
+    metrics = PoolMetrics(buckets=(0.01, 0.1))
+    for seconds in (0.001, 0.01, 0.05, 3.0):
+        metrics.observe_checkout(seconds, waited=seconds > 1)
+
+    report = metrics.report(QueuePool(sqlite3.connect))
+
+    assert report["checkouts"] == 4
+    assert report["waits"] == 1
+    assert report["wait_seconds_histogram"] == [
+        {"le": "0.01", "count": 2},
+        {"le": "0.1", "count": 3},
+        {"le": "+Inf", "count": 4},
+    ]
+
+
+def test_metered_pool_counts_waits_and_timeouts():
+    metrics = PoolMetrics()
+    pool_class = metered_pool_class(QueuePool, metrics)
+    pool = pool_class(
+        lambda: sqlite3.connect(":memory:"), pool_size=1, max_overflow=0, timeout=0.01
+    )
+
+    connection = pool.connect()
+    with pytest.raises(exc.TimeoutError):
+        pool.connect()
+
+    report = metrics.report(pool)
+    assert report["checkouts"] == 1
+    assert report["timeouts"] == 1
+    assert report["checked_out"] == 1
+    assert report["overflow"] == 0
+
+    connection.close()
+    # The engine rebuilds disposed pools from the class, metrics included
+    pool.recreate().connect().close()
+    assert metrics.checkouts == 2
+
+
+def test_engine_options_from_environment(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "true")
+
+    options = engine_options("postgresql://localhost/shop", QueuePool)
+
+    assert options["poolclass"] is QueuePool
+    assert options["pool_size"] == 20
+    assert options["max_overflow"] == 0
+    assert options["pool_pre_ping"] is True
+    assert engine_options("sqlite:///shop.db", QueuePool) == {}
+
+
+@pytest.mark.anyio
+async def test_warm_up_fills_the_pool(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'shop.db'}",
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=3,
+    )
+
+    await warm_up(engine, 3)
+
+    assert engine.pool.checkedin() == 3
+    await engine.dispose()
@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from be_task_ca.domain.item.entities import Item
+from be_task_ca.domain.user.entities import CartItem, User
+from be_task_ca.domain.user.queries import UserShape
+from be_task_ca.infrastructure.database.config import Base
+from be_task_ca.infrastructure.database.models import item_model, user_model  # noqa: F401
+from be_task_ca.infrastructure.database.repositories.item_repository import (
+    SQLItemRepository,
+)
+from be_task_ca.infrastructure.database.repositories.user_repository import (
+    SQLUserRepository,
+)
+
+
+@pytest.fixture
+def session():
+    """Session on a private in-memory SQLite database, no server needed."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def user_with_cart(session):
+    items = SQLItemRepository(session).insert_items(
+        [Item(name=f"Item {i}", price=1.0, quantity=10) for i in range(5)]
+    )
+    user = User(email="user@example.com", first_name="Ada")
+    user.cart_items = [
+        CartItem(user_id=user.id, item_id=item.id, quantity=1) for item in items
+    ]
+    SQLUserRepository(session).save_user(user)
+    return user
+
+
+def test_user_with_cart_loads_in_two_queries(session, user_with_cart, query_budget):
+    repository = SQLUserRepository(session)
+    session.expunge_all()
+
+    with query_budget(2):
+        user = repository.find_user_by_id(user_with_cart.id)
+        assert len(user.cart_items) == 5
+
+
+def test_profile_loads_in_one_query(session, user_with_cart, query_budget):
+    repository = SQLUserRepository(session)
+
+    with query_budget(1):
+        repository.find_user_by_email("user@example.com", UserShape.PROFILE)
+
+
+def test_cart_lines_load_in_one_query(session, user_with_cart, query_budget):
+    repository = SQLUserRepository(session)
+
+    with query_budget(1):
+        assert len(repository.find_cart_lines_for_user_id(user_with_cart.id)) == 5
+
+
+def test_saving_a_cart_does_not_write_per_line(session, user_with_cart, query_budget):
+    repository = SQLUserRepository(session)
+
+    with query_budget(3):
+        repository.save_user(user_with_cart)
+
+
+def test_bulk_users_insert_in_two_queries(session, query_budget):
+    repository = SQLUserRepository(session)
+    users = [User(email=f"user{i}@example.com") for i in range(50)]
+
+    with query_budget(2):
+        assert len(repository.insert_users(users)) == 50
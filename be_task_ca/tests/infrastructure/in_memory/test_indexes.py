@@ -0,0 +1,234 @@
+import bisect
+import random
+
+import pytest
+import uuid
+
+from be_task_ca.domain.item.entities import Item
+from be_task_ca.infrastructure.in_memory.indexes import (
+    DuplicateKeyError,
+    IndexedTable,
+    SortedList,
+)
+
+
+@pytest.fixture
+def table():
+    table = IndexedTable(lambda item: item.id)
+    table.add_index("name", lambda item: item.name, unique=True)
+    return table
+
+
+def test_put_and_find_one(table):
+    item = Item(name="Item 1", price=10.0, quantity=5)
+    table.put(item)
+
+    assert table.find_one("name", "Item 1") is item
+    assert table.find_one("name", "Item 2") is None
+
+
+def test_put_rejects_duplicate_unique_key(table):
+    table.put(Item(name="Item 1"))
+
+    with pytest.raises(DuplicateKeyError) as excinfo:
+        table.put(Item(name="Item 1"))
+
+    assert excinfo.value.index_name == "name"
+    assert len(table.rows) == 1
+
+
+def test_put_same_row_again_is_not_a_duplicate(table):
+    item = Item(name="Item 1")
+    table.put(item)
+    table.put(Item(id=item.id, name="Item 1", price=2.0))
+
+    assert table.find_one("name", "Item 1").price == 2.0
+
+
+def test_update_moves_index_entry(table):
+    item = Item(name="Old name")
+    table.put(item)
+    table.put(Item(id=item.id, name="New name"))
+
+    assert table.find_one("name", "Old name") is None
+    assert table.find_one("name", "New name").id == item.id
+
+    # The old name is free to be used again
+    table.put(Item(name="Old name"))
+
+
+def test_rejected_put_leaves_indexes_untouched(table):
+    table.add_index("sku", lambda item: item.description, unique=True)
+    first = Item(name="Item 1", description="sku-1")
+    table.put(first)
+    table.put(Item(name="Item 2", description="sku-2"))
+
+    with pytest.raises(DuplicateKeyError):
+        table.put(Item(id=first.id, name="Item 3", description="sku-2"))
+
+    assert table.find_one("name", "Item 1").id == first.id
+    assert table.find_one("name", "Item 3") is None
+
+
+def test_none_keys_are_not_indexed(table):
+    table.put(Item(name=None))
+    table.put(Item(name=None))
+
+    assert len(table.rows) == 2
+    assert table.find("name", None) == []
+
+
+def test_non_unique_index(table):
+    table.add_index("quantity", lambda item: item.quantity)
+    table.put(Item(name="Item 1", quantity=5))
+    table.put(Item(name="Item 2", quantity=5))
+    table.put(Item(name="Item 3", quantity=1))
+
+    names = {item.name for item in table.find("quantity", 5)}
+    assert names == {"Item 1", "Item 2"}
+
+
+def test_add_index_backfills_existing_rows(table):
+    table.put(Item(name="Item 1", quantity=5))
+
+    table.add_index("quantity", lambda item: item.quantity)
+
+    assert [item.name for item in table.find("quantity", 5)] == ["Item 1"]
+
+
+def test_add_unique_index_over_conflicting_rows_fails(table):
+    table.put(Item(name="Item 1", quantity=5))
+    table.put(Item(name="Item 2", quantity=5))
+
+    with pytest.raises(DuplicateKeyError):
+        table.add_index("quantity", lambda item: item.quantity, unique=True)
+
+    assert not table.has_index("quantity")
+
+
+def test_delete_removes_index_entries(table):
+    item = Item(name="Item 1")
+    table.put(item)
+
+    assert table.delete(item.id) is item
+    assert table.find_one("name", "Item 1") is None
+    assert table.delete(uuid.uuid4()) is None
+
+
+def test_unknown_index(table):
+    with pytest.raises(KeyError):
+        table.find("missing", "value")
+
+
+def test_sorted_index_scan(table):
+    table.add_sorted_index("price", lambda item: item.price)
+    cheap = Item(name="Cheap", price=1.0)
+    middle = Item(name="Middle", price=5.0)
+    expensive = Item(name="Expensive", price=9.0)
+    for item in (expensive, cheap, middle):
+        table.put(item)
+
+    assert [item.name for item in table.scan("price")] == ["Cheap", "Middle", "Expensive"]
+    after_cheap = [item.name for item in table.scan("price", (cheap.price, cheap.id))]
+    assert after_cheap == ["Middle", "Expensive"]
+
+    table.put(Item(id=cheap.id, name="Cheap", price=10.0))
+    assert [item.name for item in table.scan("price")] == ["Middle", "Expensive", "Cheap"]
+
+
+def test_sorted_index_range_scan(table):
+    table.add_sorted_index("price", lambda item: item.price)
+    prices = (1.0, 3.0, 3.0, 5.0, 7.0)
+    items = [Item(name=f"Item {i}", price=price) for i, price in enumerate(prices)]
+    for item in items:
+        table.put(item)
+    first_three, second_three = sorted(items[1:3], key=lambda item: item.id)
+
+    in_range = [item.price for item in table.scan("price", low=3.0, high=5.0)]
+    assert in_range == [3.0, 3.0, 5.0]
+
+    after = (first_three.price, first_three.id)
+    assert [item.id for item in table.scan("price", after, low=3.0, high=5.0)] == [
+        second_three.id, items[3].id
+    ]
+
+    descending = table.scan("price", low=2.0, reverse=True)
+    assert [item.price for item in descending] == [7.0, 5.0, 3.0, 3.0]
+    before = (second_three.price, second_three.id)
+    assert [item.id for item in table.scan("price", before, reverse=True)] == [
+        first_three.id, items[0].id
+    ]
+
+
+def test_scan_requires_sorted_index(table):
+    with pytest.raises(TypeError):
+        list(table.scan("name"))
+
+
+def test_inverted_index_prefix_search(table):
+    table.add_inverted_index(
+        "search", lambda item: dict.fromkeys((item.name or "").lower().split(), 1.0)
+    )
+    table.put(Item(name="Red Apple"))
+    table.put(Item(name="Green Apple"))
+    table.put(Item(name="Applesauce"))
+    table.put(Item(name="Red Pepper"))
+
+    assert {item.name for item in table.search("search", ["app"], 10)} == {
+        "Red Apple", "Green Apple", "Applesauce"
+    }
+    assert [item.name for item in table.search("search", ["red", "app"], 10)] == [
+        "Red Apple"
+    ]
+    assert table.search("search", ["blue"], 10) == []
+
+
+def test_inverted_index_ranks_exact_matches_first(table):
+    table.add_inverted_index(
+        "search", lambda item: dict.fromkeys((item.name or "").lower().split(), 1.0)
+    )
+    table.put(Item(name="Applesauce"))
+    table.put(Item(name="Apple"))
+
+    results = table.search("search", ["apple"], 1)
+
+    assert [item.name for item in results] == ["Apple"]
+
+
+def test_inverted_index_follows_updates(table):
+    table.add_inverted_index(
+        "search", lambda item: dict.fromkeys((item.name or "").lower().split(), 1.0)
+    )
+    item = Item(name="Old Lamp")
+    table.put(item)
+    table.put(Item(id=item.id, name="New Lamp"))
+
+    assert table.search("search", ["old"], 10) == []
+    assert [found.id for found in table.search("search", ["new"], 10)] == [item.id]
+    assert [found.id for found in table.search("search", ["lamp"], 10)] == [item.id]
+
+
+def test_sorted_list_matches_flat_list_across_block_splits():
+    rng = random.Random(7)
+    values = SortedList(load=4)
+    expected = []
+
+    for _ in range(2000):
+        value = rng.randint(0, 100)
+        if rng.random() < 0.6:
+            values.add(value)
+            bisect.insort(expected, value)
+        elif value in expected:
+            expected.remove(value)
+            assert values.discard(value)
+        else:
+            assert not values.discard(value)
+
+        low, high = sorted((rng.randint(0, 100), rng.randint(0, 100)))
+        start, stop = values.bisect_left(low), values.bisect_right(high)
+        in_range = [value for value in expected if low <= value <= high]
+        assert list(values.iterate(start, stop)) == in_range
+        assert list(values.iterate(start, stop, reverse=True)) == in_range[::-1]
+
+    assert list(values) == expected
+    assert len(values) == len(expected)
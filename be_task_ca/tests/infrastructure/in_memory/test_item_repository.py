@@ -2,7 +2,9 @@ import pytest
 import uuid
 
 from be_task_ca.domain.item.entities import Item
+from be_task_ca.domain.item.queries import ItemQuery
 from be_task_ca.infrastructure.in_memory.item_repository import InMemoryItemRepository
+from be_task_ca.domain.item.exceptions import DuplicateItemNameError
 
 
 @pytest.fixture
@@ -84,4 +86,77 @@ def test_find_item_by_id_nonexistent(repository):
 
     found_item = repository.find_item_by_id(random_id)
 
-    assert found_item is None
\ No newline at end of file
+    assert found_item is None
+
+def test_save_item_with_duplicate_name(repository):
+    repository.save_item(Item(name="Test Item", price=15.0, quantity=3))
+
+    with pytest.raises(DuplicateItemNameError):
+        repository.save_item(Item(name="Test Item", price=20.0, quantity=1))
+
+    assert len(repository.get_all_items()) == 1
+
+
+def test_rename_item_updates_name_lookup(repository):
+    item = Item(name="Old Name", price=15.0, quantity=3)
+    repository.save_item(item)
+
+    item.name = "New Name"
+    repository.save_item(item)
+
+    assert repository.find_item_by_name("Old Name") is None
+    assert repository.find_item_by_name("New Name").id == item.id
+
+
+def test_register_index(repository):
+    repository.save_item(Item(name="Item 1", price=10.0, quantity=0))
+    repository.register_index("quantity", lambda item: item.quantity)
+    repository.save_item(Item(name="Item 2", price=20.0, quantity=0))
+    repository.save_item(Item(name="Item 3", price=30.0, quantity=4))
+
+    sold_out = repository.find_items_by_index("quantity", 0)
+
+    assert {item.name for item in sold_out} == {"Item 1", "Item 2"}
+
+
+def test_get_items_page(repository):
+    items = [Item(name=f"Item {i}", price=1.0, quantity=1) for i in range(3)]
+    for item in items:
+        repository.save_item(item)
+    ordered_ids = sorted(item.id for item in items)
+
+    first_page = repository.get_items_page(2)
+    second_page = repository.get_items_page(2, after=first_page[-1].id)
+
+    assert [item.id for item in first_page] == ordered_ids[:2]
+    assert [item.id for item in second_page] == ordered_ids[2:]
+
+
+def test_iter_all_items_tolerates_concurrent_saves(repository):
+    for i in range(4):
+        repository.save_item(Item(name=f"Item {i}", price=1.0, quantity=1))
+
+    streamed = []
+    for item in repository.iter_all_items(batch_size=2):
+        streamed.append(item)
+        if len(streamed) == 1:
+            repository.save_item(Item(name="Added while streaming"))
+
+    assert len(streamed) >= 4
+
+
+def test_query_items_by_id_within_price_range(repository):
+    items = [
+        Item(name=f"Item {i}", price=float(i), quantity=i % 2) for i in range(10)
+    ]
+    for item in items:
+        repository.save_item(item)
+    expected = sorted(
+        (item.id for item in items if 2 <= item.price <= 8 and item.quantity),
+    )
+    query = ItemQuery(min_price=2.0, max_price=8.0, in_stock=True)
+
+    first_page = repository.query_items(query, 2)
+    rest = repository.query_items(query, 10, query.position(first_page[-1]))
+
+    assert [item.id for item in first_page + rest] == expected
@@ -0,0 +1,140 @@
+import time
+
+import pytest
+
+from be_task_ca.domain.item.entities import Item
+from be_task_ca.domain.user.entities import CartItem, User
+from be_task_ca.infrastructure.in_memory.item_repository import InMemoryItemRepository
+from be_task_ca.infrastructure.in_memory.journal import FsyncPolicy, Journal
+from be_task_ca.infrastructure.in_memory.user_repository import InMemoryUserRepository
+
+
+@pytest.fixture
+def open_journal(tmp_path):
+    journals = []
+
+    def open_journal(name="items", **options):
+        journal = Journal(tmp_path / name, **options)
+        journals.append(journal)
+        return journal
+
+    yield open_journal
+
+    for journal in journals:
+        journal.close()
+
+
+def test_item_repository_recovers_from_log(open_journal):
+    repository = InMemoryItemRepository(open_journal())
+    item = Item(name="Lamp", description="Bright", price=10.0, quantity=2)
+    repository.save_item(item)
+    repository.save_item(Item(id=item.id, name="Lamp", price=12.0, quantity=1))
+    repository.insert_items([Item(name="Chair"), Item(name="Lamp")])
+
+    recovered = InMemoryItemRepository(open_journal())
+
+    assert recovered.find_item_by_id(item.id) == Item(
+        id=item.id, name="Lamp", price=12.0, quantity=1
+    )
+    assert recovered.find_item_by_name("Chair") is not None
+    assert len(recovered.get_all_items()) == 2
+
+
+def test_snapshot_compacts_log(open_journal, tmp_path):
+    repository = InMemoryItemRepository(open_journal(snapshot_every=3))
+    items = [Item(name=f"Item {i}", price=float(i)) for i in range(5)]
+    for item in items:
+        repository.save_item(item)
+
+    # The third write triggered a snapshot, only two records remain to replay
+    assert len((tmp_path / "items.wal").read_text().splitlines()) == 2
+    journal = open_journal(snapshot_every=3)
+    recovered = InMemoryItemRepository(journal)
+
+    assert journal.records_since_snapshot == 2
+    assert sorted(item.name for item in recovered.get_all_items()) == [
+        item.name for item in items
+    ]
+
+
+def test_close_writes_snapshot(open_journal, tmp_path):
+    repository = InMemoryItemRepository(open_journal())
+    repository.save_item(Item(name="Lamp"))
+    repository.close()
+
+    assert (tmp_path / "items.wal").read_text() == ""
+    assert InMemoryItemRepository(open_journal()).find_item_by_name("Lamp")
+
+
+def test_recovery_ignores_torn_record(open_journal, tmp_path):
+    repository = InMemoryItemRepository(open_journal(fsync=FsyncPolicy.ALWAYS))
+    repository.save_item(Item(name="Lamp"))
+    with (tmp_path / "items.wal").open("a") as wal_file:
+        wal_file.write('{"seq":2,"op":"save_item","data":{"id":')
+
+    recovered = InMemoryItemRepository(open_journal())
+    recovered.save_item(Item(name="Chair"))
+
+    restarted = InMemoryItemRepository(open_journal())
+    assert {item.name for item in restarted.get_all_items()} == {"Lamp", "Chair"}
+
+
+def test_interval_policy_syncs_in_background(open_journal, monkeypatch):
+    synced = []
+    monkeypatch.setattr(
+        "be_task_ca.infrastructure.in_memory.journal.os.fsync", synced.append
+    )
+    journal = open_journal(fsync=FsyncPolicy.INTERVAL, fsync_interval=0.01)
+    journal.recover()
+    journal.append("save_item", {})
+
+    deadline = time.monotonic() + 5
+    while not synced and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert synced
+
+
+def test_user_repository_recovers_users_and_carts(open_journal):
+    repository = InMemoryUserRepository(open_journal("users"))
+    user = User(email="user@example.com", first_name="Ada", hashed_password="hash")
+    repository.save_user(user)
+    item_id = Item().id
+    user.cart_items.append(CartItem(user_id=user.id, item_id=item_id, quantity=3))
+    repository.save_user(user)
+
+    recovered = InMemoryUserRepository(open_journal("users"))
+
+    found = recovered.find_user_by_email("user@example.com")
+    assert found.id == user.id
+    assert found.first_name == "Ada"
+    assert found.cart_items == [CartItem(user_id=user.id, item_id=item_id, quantity=3)]
+
+
+def test_user_repository_recovers_bulk_inserts(open_journal):
+    repository = InMemoryUserRepository(open_journal("users"))
+    users = [User(email=f"user{i}@example.com", first_name="Ada") for i in range(3)]
+    repository.insert_users(users)
+
+    recovered = InMemoryUserRepository(open_journal("users"))
+
+    assert [recovered.find_user_by_email(user.email).id for user in users] == [
+        user.id for user in users
+    ]
+
+
+def test_user_repository_recovers_cart_line_operations(open_journal):
+    repository = InMemoryUserRepository(open_journal("users"))
+    user = User(email="user@example.com", first_name="Ada")
+    repository.save_user(user)
+    kept, removed = Item().id, Item().id
+    repository.add_cart_item(CartItem(user_id=user.id, item_id=kept, quantity=1))
+    repository.add_cart_item(CartItem(user_id=user.id, item_id=removed, quantity=1))
+    repository.update_cart_item_quantity(user.id, kept, 4)
+    repository.remove_cart_item(user.id, removed)
+
+    recovered = InMemoryUserRepository(open_journal("users"))
+
+    assert recovered.find_cart_items_for_user_id(user.id) == [
+        CartItem(user_id=user.id, item_id=kept, quantity=4)
+    ]
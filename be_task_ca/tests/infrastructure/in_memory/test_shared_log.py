@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from be_task_ca.infrastructure.in_memory.shared_log import (
+    SharedLog,
+    SharedLogFullError,
+    lock_all,
+)
+
+
+def append(log, records, snapshot=lambda: []):
+    with log.locked(exclusive=True):
+        log.read()
+        log.append(records, snapshot)
+
+
+def read(log):
+    with log.locked():
+        return log.read()
+
+
+def test_other_processes_read_appended_records(tmp_path):
+    writer = SharedLog(tmp_path / "items", 4096)
+    reader = SharedLog(tmp_path / "items", 4096)
+
+    append(writer, [("save_item", {"name": "Lamp"})])
+    append(writer, [("save_item", {"name": "Chair"}), ("delete_items", ["1"])])
+
+    assert read(reader) == [
+        ("save_item", {"name": "Lamp"}),
+        ("save_item", {"name": "Chair"}),
+        ("delete_items", ["1"]),
+    ]
+    assert read(reader) == []
+    # The writer has applied its own records already
+    assert read(writer) == []
+
+
+def test_compacts_into_snapshot_when_full(tmp_path):
+    writer = SharedLog(tmp_path / "items", 256)
+    reader = SharedLog(tmp_path / "items", 256)
+    with reader.locked():
+        version = reader.version
+
+    for _ in range(10):
+        append(writer, [("save_item", {"name": "x" * 40})], lambda: ["state"])
+
+    records = read(reader)
+    assert records[0] == ("snapshot", ["state"])
+    assert all(operation == "save_item" for operation, _ in records[1:])
+    with reader.locked():
+        assert reader.version > version
+
+
+def test_raises_when_snapshot_does_not_fit(tmp_path):
+    log = SharedLog(tmp_path / "items", 128)
+
+    with pytest.raises(SharedLogFullError):
+        append(log, [("save_item", "x" * 100)], lambda: "x" * 100)
+
+
+def test_larger_size_grows_the_file(tmp_path):
+    first = SharedLog(tmp_path / "items", 4096)
+    append(first, [("save_item", {"name": "Lamp"})])
+
+    grown = SharedLog(tmp_path / "items", 8192)
+    assert SharedLog(tmp_path / "items", 1024).capacity == 8192
+
+    # Too large for half of the old size
+    append(first, [("save_item", {"name": "x" * 3000})], lambda: ["state"])
+    assert first.capacity == 8192
+    assert read(grown)[-1] == ("save_item", {"name": "x" * 3000})
+
+
+def test_readers_one_generation_behind_skip_the_snapshot(tmp_path):
+    writer = SharedLog(tmp_path / "items", 1024)
+    reader = SharedLog(tmp_path / "items", 1024)
+    append(writer, [("save_item", {"name": "x" * 100})])
+    assert len(read(reader)) == 1
+
+    append(writer, [("save_item", {"name": "y" * 100})])
+    append(writer, [("save_item", {"name": "z" * 300})], lambda: ["state"])
+
+    assert [data["name"][0] for _, data in read(reader)] == ["y", "z"]
+    assert read(SharedLog(tmp_path / "items", 1024))[0] == ("snapshot", ["state"])
+
+
+def test_appending_needs_exclusive_lock(tmp_path):
+    log = SharedLog(tmp_path / "items", 4096)
+
+    with log.locked():
+        with pytest.raises(RuntimeError):
+            log.append([("save_item", {})], lambda: [])
+
+
+@pytest.mark.anyio
+async def test_lock_all_waits_without_blocking_the_event_loop(tmp_path):
+    holder = SharedLog(tmp_path / "items", 4096)
+    waiter = SharedLog(tmp_path / "items", 4096)
+    acquired = asyncio.Event()
+
+    async def take_lock():
+        async with lock_all([(waiter, False)]):
+            acquired.set()
+
+    with holder.locked(exclusive=True):
+        task = asyncio.ensure_future(take_lock())
+        # Other coroutines keep running while the lock is held elsewhere
+        for _ in range(20):
+            await asyncio.sleep(0.001)
+        assert not acquired.is_set()
+
+    await asyncio.wait_for(task, timeout=1)
+    assert acquired.is_set()
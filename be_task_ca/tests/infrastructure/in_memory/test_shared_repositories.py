@@ -0,0 +1,189 @@
+import multiprocessing
+from uuid import UUID
+
+import pytest
+
+from be_task_ca.domain.item.entities import Item
+from be_task_ca.domain.unit_of_work import WriteConflictError
+from be_task_ca.domain.user.entities import CartItem, User
+from be_task_ca.infrastructure import factory
+from be_task_ca.infrastructure.in_memory.shared_log import SharedLog
+from be_task_ca.infrastructure.in_memory.shared_repositories import (
+    SharedInMemoryItemRepository,
+    SharedInMemoryUserRepository,
+)
+from be_task_ca.infrastructure.in_memory.unit_of_work import InMemoryUnitOfWork
+
+
+def open_items(path, capacity=1024 * 1024):
+    return SharedInMemoryItemRepository(SharedLog(path / "items", capacity))
+
+
+def open_users(path, item_repository=None):
+    return SharedInMemoryUserRepository(
+        SharedLog(path / "users", 1024 * 1024), item_repository
+    )
+
+
+async def committed(write):
+    # Runs the write in a unit of work of its own, like another request
+    unit_of_work = InMemoryUnitOfWork()
+    await unit_of_work.begin()
+    result = write()
+    await unit_of_work.commit()
+    return result
+
+
+def reserve_one_at_a_time(path, item_id, attempts, results):
+    # Runs in a worker process of its own
+    repository = open_items(path)
+    reserved = sum(repository.reserve_stock(UUID(item_id), 1) for _ in range(attempts))
+    results.put(reserved)
+
+
+def test_processes_see_each_others_writes(tmp_path):
+    first, second = open_items(tmp_path), open_items(tmp_path)
+
+    item = first.save_item(Item(name="Lamp", price=20.0, quantity=5))
+    assert second.reserve_stock(item.id, 2)
+
+    assert first.find_item_by_id(item.id).quantity == 3
+    assert second.find_item_by_name("Lamp").id == item.id
+    assert first.get_catalog_version() == second.get_catalog_version()
+    # Joining the node later replays everything written so far
+    assert open_items(tmp_path).find_item_by_id(item.id).quantity == 3
+
+
+def test_stock_is_never_oversold_across_processes(tmp_path):
+    item = open_items(tmp_path).save_item(Item(name="Lamp", quantity=60))
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [
+        context.Process(
+            target=reserve_one_at_a_time, args=(tmp_path, str(item.id), 40, results)
+        )
+        for _ in range(2)
+    ]
+    for worker in workers:
+        worker.start()
+    reserved = results.get(timeout=30) + results.get(timeout=30)
+    for worker in workers:
+        worker.join()
+
+    assert reserved == 60
+    assert open_items(tmp_path).find_item_by_id(item.id).quantity == 0
+
+
+@pytest.mark.anyio
+async def test_writes_reach_other_processes_on_commit(tmp_path):
+    first, second = open_items(tmp_path), open_items(tmp_path)
+    item = first.save_item(Item(name="Lamp", quantity=5))
+
+    rolled_back = InMemoryUnitOfWork()
+    await rolled_back.begin()
+    first.reserve_stock(item.id, 2)
+    first.insert_items([Item(name="Chair")])
+    assert second.find_item_by_id(item.id).quantity == 5
+    await rolled_back.rollback()
+
+    assert await committed(lambda: first.reserve_stock(item.id, 1))
+
+    assert second.find_item_by_id(item.id).quantity == 4
+    assert second.find_item_by_name("Chair") is None
+    assert open_items(tmp_path).find_item_by_id(item.id).quantity == 4
+
+
+@pytest.mark.anyio
+async def test_commit_fails_when_another_process_oversold_first(tmp_path):
+    first, second = open_items(tmp_path), open_items(tmp_path)
+    item = first.save_item(Item(name="Lamp", quantity=5))
+    pending = InMemoryUnitOfWork()
+    await pending.begin()
+    assert first.reserve_stock(item.id, 4)
+
+    assert await committed(lambda: second.reserve_stock(item.id, 3))
+
+    # Undone as soon as the other reservation is seen
+    assert first.find_item_by_id(item.id).quantity == 2
+    with pytest.raises(WriteConflictError):
+        await pending.commit()
+    assert second.find_item_by_id(item.id).quantity == 2
+
+
+@pytest.mark.anyio
+async def test_commit_fails_when_another_process_took_the_name(tmp_path):
+    first, second = open_items(tmp_path), open_items(tmp_path)
+    pending = InMemoryUnitOfWork()
+    await pending.begin()
+    first.save_item(Item(name="Lamp", quantity=1))
+
+    await committed(lambda: second.save_item(Item(name="Lamp", quantity=2)))
+
+    assert first.find_item_by_name("Lamp").quantity == 2
+    with pytest.raises(WriteConflictError):
+        await pending.commit()
+    assert [item.quantity for item in second.get_all_items()] == [2]
+
+
+@pytest.mark.anyio
+async def test_compaction_keeps_uncommitted_writes_out(tmp_path):
+    first, second = open_items(tmp_path, 2048), open_items(tmp_path, 2048)
+    item = first.save_item(Item(name="Lamp", quantity=100))
+    pending = InMemoryUnitOfWork()
+    await pending.begin()
+    second.reserve_stock(item.id, 10)
+    second.save_item(Item(name="Chair"))
+
+    for _ in range(15):
+        await committed(lambda: first.reserve_stock(item.id, 1))
+
+    # The log was compacted without the pending writes, which survive it
+    assert open_items(tmp_path).find_item_by_id(item.id).quantity == 85
+    assert second.find_item_by_id(item.id).quantity == 75
+    await pending.commit()
+    assert first.find_item_by_id(item.id).quantity == 75
+    assert first.find_item_by_name("Chair") is not None
+
+
+def test_carts_are_shared(tmp_path):
+    items = open_items(tmp_path)
+    first, second = open_users(tmp_path, items), open_users(tmp_path, items)
+    item = items.save_item(Item(name="Lamp", price=20.0, quantity=5))
+    user = first.save_user(User(email="ann@example.com"))
+
+    assert second.add_cart_item(CartItem(user.id, item.id, 2))
+    assert first.update_cart_item_quantity(user.id, item.id, 3)
+
+    assert second.find_cart_lines_for_user_id(user.id)[0].quantity == 3
+    assert first.remove_cart_item(user.id, item.id).quantity == 3
+    assert second.find_cart_items_for_user_id(user.id) == []
+    assert second.find_user_by_email("ann@example.com").id == user.id
+
+
+def test_compaction_keeps_the_data(tmp_path):
+    first, second = open_items(tmp_path, 2048), open_items(tmp_path, 2048)
+    item = first.save_item(Item(name="Lamp", quantity=100))
+
+    for _ in range(50):
+        first.reserve_stock(item.id, 1)
+
+    assert second.find_item_by_id(item.id).quantity == 50
+    assert len(second.get_all_items()) == 1
+
+
+def test_factory_opens_shared_repositories(tmp_path, monkeypatch):
+    monkeypatch.setattr(factory, "_in_memory_item_repository", None)
+    monkeypatch.setattr(factory, "_in_memory_user_repository", None)
+    monkeypatch.setenv("MEMORY_SHARED_DIR", str(tmp_path))
+    monkeypatch.setenv("MEMORY_SHARED_SIZE_MB", "1")
+    monkeypatch.delenv("MEMORY_JOURNAL_DIR", raising=False)
+
+    users = factory.get_user_repository("memory")
+    items = factory.get_item_repository("memory")
+    assert isinstance(users, SharedInMemoryUserRepository)
+    assert isinstance(items, SharedInMemoryItemRepository)
+    factory.close_in_memory_repositories()
+
+    monkeypatch.setenv("MEMORY_JOURNAL_DIR", str(tmp_path / "journal"))
+    with pytest.raises(ValueError):
+        factory.get_item_repository("memory")
@@ -0,0 +1,250 @@
+import asyncio
+import time
+
+import pytest
+
+from be_task_ca.domain.item.entities import Item
+from be_task_ca.domain.user.entities import CartItem, User
+from be_task_ca.infrastructure.in_memory.item_repository import InMemoryItemRepository
+from be_task_ca.infrastructure.in_memory.journal import FsyncPolicy, Journal
+from be_task_ca.infrastructure.in_memory.unit_of_work import InMemoryUnitOfWork
+from be_task_ca.infrastructure.in_memory.user_repository import InMemoryUserRepository
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = Journal(tmp_path / "items", snapshot_every=2)
+    yield journal
+    journal.close()
+
+
+def wal_lines(tmp_path):
+    return (tmp_path / "items.wal").read_text().splitlines()
+
+
+@pytest.mark.anyio
+async def test_commit_journals_buffered_writes(journal, tmp_path):
+    repository = InMemoryItemRepository(journal)
+    unit_of_work = InMemoryUnitOfWork()
+    await unit_of_work.begin()
+
+    item = Item(name="Lamp", quantity=5)
+    repository.save_item(item)
+    repository.reserve_stock(item.id, 2)
+
+    # Applied right away, journaled only on commit
+    assert repository.find_item_by_id(item.id).quantity == 3
+    assert journal.records_since_snapshot == 0
+
+    await unit_of_work.commit()
+
+    assert journal.records_since_snapshot == 0
+    assert wal_lines(tmp_path) == []
+    recovered = InMemoryItemRepository(Journal(tmp_path / "items"))
+    assert recovered.find_item_by_id(item.id).quantity == 3
+
+
+@pytest.mark.anyio
+async def test_commit_syncs_journal_once(tmp_path, monkeypatch):
+    journal = Journal(tmp_path / "items", fsync=FsyncPolicy.ALWAYS)
+    repository = InMemoryItemRepository(journal)
+    synced = []
+    monkeypatch.setattr(
+        "be_task_ca.infrastructure.in_memory.journal.os.fsync", synced.append
+    )
+    unit_of_work = InMemoryUnitOfWork()
+    await unit_of_work.begin()
+
+    item = repository.save_item(Item(name="Lamp", quantity=5))
+    repository.reserve_stock(item.id, 1)
+    repository.insert_items([Item(name="Chair")])
+    await unit_of_work.commit()
+
+    assert len(synced) == 1
+    assert len(wal_lines(tmp_path)) == 3
+    journal.close()
+
+
+@pytest.mark.anyio
+async def test_commit_syncs_journal_off_the_event_loop(tmp_path, monkeypatch):
+    journal = Journal(tmp_path / "items", fsync=FsyncPolicy.ALWAYS)
+    repository = InMemoryItemRepository(journal)
+    monkeypatch.setattr(
+        "be_task_ca.infrastructure.in_memory.journal.os.fsync",
+        lambda descriptor: time.sleep(0.2),
+    )
+    unit_of_work = InMemoryUnitOfWork()
+    await unit_of_work.begin()
+    repository.save_item(Item(name="Lamp"))
+
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.ensure_future(tick())
+    await unit_of_work.commit()
+    ticker.cancel()
+
+    assert ticks > 5
+    assert len(wal_lines(tmp_path)) == 1
+    journal.close()
+
+
+@pytest.mark.anyio
+async def test_rollback_undoes_item_writes(journal):
+    repository = InMemoryItemRepository(journal)
+    lamp = repository.save_item(Item(name="Lamp", price=10.0, quantity=5))
+    version = repository.get_catalog_version()
+
+    unit_of_work = InMemoryUnitOfWork()
+    await unit_of_work.begin()
+    repository.save_item(Item(id=lamp.id, name="Desk Lamp", price=12.0, quantity=5))
+    repository.reserve_stock(lamp.id, 2)
+    chair = Item(name="Chair")
+    repository.insert_items([chair])
+    await unit_of_work.rollback()
+
+    assert repository.find_item_by_id(lamp.id) == lamp
+    assert repository.find_item_by_name("Desk Lamp") is None
+    assert repository.find_item_by_id(chair.id) is None
+    assert repository.get_catalog_version() > version
+    assert journal.records_since_snapshot == 1
+
+
+@pytest.mark.anyio
+async def test_rollback_keeps_stock_moved_by_others():
+    repository = InMemoryItemRepository()
+    item = repository.save_item(Item(name="Lamp", quantity=10))
+
+    unit_of_work = InMemoryUnitOfWork()
+    await unit_of_work.begin()
+    repository.reserve_stock(item.id, 2)
+    other = InMemoryUnitOfWork()
+    await other.begin()
+    repository.reserve_stock(item.id, 3)
+    await other.commit()
+    await unit_of_work.rollback()
+
+    assert repository.find_item_by_id(item.id).quantity == 7
+
+
+@pytest.mark.anyio
+async def test_recovery_matches_memory_after_interleaved_rollback(tmp_path):
+    repository = InMemoryItemRepository(Journal(tmp_path / "items"))
+    item = repository.save_item(Item(name="Lamp", quantity=10))
+
+    rolled_back = InMemoryUnitOfWork()
+    await rolled_back.begin()
+    repository.reserve_stock(item.id, 2)
+    committed = InMemoryUnitOfWork()
+    await committed.begin()
+    repository.reserve_stock(item.id, 3)
+    await committed.commit()
+    await rolled_back.rollback()
+
+    edit = InMemoryUnitOfWork()
+    await edit.begin()
+    repository.save_item(Item(id=item.id, name="Desk Lamp", quantity=7))
+    other = InMemoryUnitOfWork()
+    await other.begin()
+    repository.release_stock(item.id, 1)
+    await other.commit()
+    await edit.rollback()
+    assert repository.find_item_by_id(item.id).quantity == 8
+
+    restock = InMemoryUnitOfWork()
+    await restock.begin()
+    repository.save_item(Item(id=item.id, name="Lamp", quantity=100))
+    sale = InMemoryUnitOfWork()
+    await sale.begin()
+    repository.reserve_stock(item.id, 1)
+    await sale.commit()
+    await restock.commit()
+
+    assert repository.find_item_by_id(item.id).quantity == 99
+    recovered = InMemoryItemRepository(Journal(tmp_path / "items"))
+    assert recovered.find_item_by_id(item.id) == repository.find_item_by_id(item.id)
+
+
+@pytest.mark.anyio
+async def test_stock_of_items_other_requests_have_not_committed_is_not_reserved():
+    repository = InMemoryItemRepository()
+    pending = InMemoryUnitOfWork()
+    await pending.begin()
+    item = repository.save_item(Item(name="Lamp", quantity=10))
+    [imported] = repository.insert_items([Item(name="Chair", quantity=10)])
+    assert repository.reserve_stock(item.id, 1)
+
+    other = InMemoryUnitOfWork()
+    await other.begin()
+    assert not repository.reserve_stock(item.id, 1)
+    assert not repository.reserve_stock(imported.id, 1)
+    await pending.commit()
+
+    assert repository.reserve_stock(item.id, 1)
+    assert repository.find_item_by_id(item.id).quantity == 8
+
+
+@pytest.mark.anyio
+async def test_snapshot_waits_for_uncommitted_writes(journal, tmp_path):
+    repository = InMemoryItemRepository(journal)
+    pending = InMemoryUnitOfWork()
+    await pending.begin()
+    repository.save_item(Item(name="Uncommitted"))
+
+    committed = InMemoryUnitOfWork()
+    await committed.begin()
+    repository.save_item(Item(name="Lamp"))
+    repository.save_item(Item(name="Chair"))
+    await committed.commit()
+
+    # A snapshot would have captured the pending item
+    assert len(wal_lines(tmp_path)) == 2
+
+    await pending.rollback()
+    recovered = InMemoryItemRepository(Journal(tmp_path / "items"))
+    assert {item.name for item in recovered.get_all_items()} == {"Lamp", "Chair"}
+
+
+@pytest.mark.anyio
+async def test_rollback_undoes_user_and_cart_writes():
+    repository = InMemoryUserRepository()
+    user = User(email="user@example.com", first_name="Ada")
+    repository.save_user(user)
+    kept, removed, added = Item().id, Item().id, Item().id
+    repository.add_cart_item(CartItem(user_id=user.id, item_id=kept, quantity=1))
+    repository.add_cart_item(CartItem(user_id=user.id, item_id=removed, quantity=2))
+
+    unit_of_work = InMemoryUnitOfWork()
+    await unit_of_work.begin()
+    repository.save_user(User(id=user.id, email="new@example.com", first_name="Bo"))
+    repository.update_cart_item_quantity(user.id, kept, 5)
+    repository.remove_cart_item(user.id, removed)
+    repository.add_cart_item(CartItem(user_id=user.id, item_id=added, quantity=1))
+    repository.insert_users([User(email="bulk@example.com")])
+    await unit_of_work.rollback()
+
+    found = repository.find_user_by_email("user@example.com")
+    assert found.first_name == "Ada"
+    assert found.cart_items == [
+        CartItem(user_id=user.id, item_id=kept, quantity=1),
+        CartItem(user_id=user.id, item_id=removed, quantity=2),
+    ]
+    assert repository.find_user_by_email("new@example.com") is None
+    assert repository.find_user_by_email("bulk@example.com") is None
+
+
+@pytest.mark.anyio
+async def test_writes_after_commit_are_journaled_directly(journal):
+    repository = InMemoryItemRepository(journal)
+    unit_of_work = InMemoryUnitOfWork()
+    await unit_of_work.begin()
+    await unit_of_work.commit()
+
+    repository.save_item(Item(name="Lamp"))
+
+    assert journal.records_since_snapshot == 1
@@ -3,6 +3,7 @@ import uuid
 
 from be_task_ca.domain.user.entities import User, CartItem
 from be_task_ca.infrastructure.in_memory.user_repository import InMemoryUserRepository
+from be_task_ca.domain.user.exceptions import DuplicateEmailError
 
 
 @pytest.fixture
@@ -122,4 +123,23 @@ def test_find_cart_items_for_user_id_nonexistent_user(repository):
 
     cart_items = repository.find_cart_items_for_user_id(random_id)
 
-    assert len(cart_items) == 0
\ No newline at end of file
+    assert len(cart_items) == 0
+
+def test_save_user_with_duplicate_email(repository):
+    repository.save_user(User(email="test@example.com", first_name="Test"))
+
+    with pytest.raises(DuplicateEmailError):
+        repository.save_user(User(email="test@example.com", first_name="Other"))
+
+    assert repository.find_user_by_email("test@example.com").first_name == "Test"
+
+
+def test_register_index(repository):
+    repository.register_index("last_name", lambda user: user.last_name)
+    repository.save_user(User(email="a@example.com", last_name="Doe"))
+    repository.save_user(User(email="b@example.com", last_name="Doe"))
+    repository.save_user(User(email="c@example.com", last_name="Roe"))
+
+    found_users = repository.find_users_by_index("last_name", "Doe")
+
+    assert {user.email for user in found_users} == {"a@example.com", "b@example.com"}
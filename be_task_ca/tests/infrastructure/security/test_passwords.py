@@ -0,0 +1,66 @@
+import hashlib
+import threading
+
+import pytest
+
+from be_task_ca.infrastructure.security.passwords import (
+    Pbkdf2Kdf,
+    PooledPasswordHasher,
+    ScryptKdf,
+    create_kdf,
+    verify_password,
+)
+
+
+@pytest.mark.parametrize("kdf", [ScryptKdf(n=2**10), Pbkdf2Kdf(iterations=1000)])
+def test_hash_and_verify(kdf):
+    hashed = kdf.hash("secret")
+
+    assert hashed.startswith(f"{kdf.scheme}$")
+    assert hashed != kdf.hash("secret")  # salted
+    assert verify_password("secret", hashed)
+    assert not verify_password("wrong", hashed)
+
+
+def test_verify_keeps_working_after_cost_change():
+    hashed = ScryptKdf(n=2**10).hash("secret")
+
+    assert ScryptKdf(n=2**11).verify("secret", hashed)
+
+
+def test_verify_legacy_sha512_hash():
+    legacy = hashlib.sha512(b"secret").hexdigest()
+
+    assert verify_password("secret", legacy)
+    assert not verify_password("wrong", legacy)
+
+
+def test_verify_rejects_malformed_hash():
+    assert not verify_password("secret", "scrypt$not-a-number$8$1$AA==$AA==")
+    assert not verify_password("secret", "pbkdf2_sha256$1000")
+
+
+def test_create_kdf():
+    assert create_kdf("scrypt", 2**10).n == 2**10
+    assert create_kdf("pbkdf2_sha256", 1000).iterations == 1000
+    with pytest.raises(ValueError):
+        create_kdf("md5", 1)
+
+
+@pytest.mark.anyio
+async def test_pooled_hasher_runs_off_the_event_loop():
+    threads = []
+
+    class RecordingKdf(ScryptKdf):
+        def hash(self, password):
+            threads.append(threading.current_thread())
+            return super().hash(password)
+
+    hasher = PooledPasswordHasher(RecordingKdf(n=2**10), max_workers=1)
+    try:
+        hashed = await hasher.hash("secret")
+
+        assert await hasher.verify("secret", hashed)
+        assert threads[0] is not threading.current_thread()
+    finally:
+        hasher.close()
@@ -0,0 +1,117 @@
+import pytest
+
+from be_task_ca.infrastructure import container as app_container
+from be_task_ca.infrastructure.container import AppContainer, get_app_container
+from be_task_ca.infrastructure.database import config as database_config
+from be_task_ca.infrastructure.database.unit_of_work import SQLUnitOfWork
+from be_task_ca.infrastructure.in_memory.unit_of_work import InMemoryUnitOfWork
+
+
+class CountingSessionFactory:
+    def __init__(self):
+        self.sessions = []
+
+    def __call__(self):
+        session = FakeSession()
+        self.sessions.append(session)
+        return session
+
+
+class FakeSession:
+    closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.anyio
+async def test_session_opens_on_first_repository():
+    session_factory = CountingSessionFactory()
+    container = AppContainer("sql", session_factory).request_container()
+
+    assert session_factory.sessions == []
+    user_repository = await container.user_repository()
+    await container.item_repository()
+
+    assert await container.user_repository() is user_repository
+    assert len(session_factory.sessions) == 1
+    assert isinstance(container.unit_of_work, SQLUnitOfWork)
+    await container.close()
+    assert session_factory.sessions[0].closed
+
+
+@pytest.mark.anyio
+async def test_unused_container_has_nothing_to_commit():
+    session_factory = CountingSessionFactory()
+    container = AppContainer("sql", session_factory).request_container()
+
+    await container.commit()
+    await container.close()
+
+    assert session_factory.sessions == []
+    assert container.unit_of_work is None
+
+
+@pytest.mark.anyio
+async def test_memory_container_begins_unit_of_work():
+    container = AppContainer("memory").request_container()
+
+    await container.item_repository()
+
+    assert isinstance(container.unit_of_work, InMemoryUnitOfWork)
+    assert container.unit_of_work.active
+    await container.rollback()
+    with pytest.raises(ValueError):
+        await container.session()
+
+
+def test_memory_app_container_creates_no_engine(monkeypatch):
+    monkeypatch.setenv("REPOSITORY_TYPE", "memory")
+    monkeypatch.setattr(app_container, "_app_container", None)
+    monkeypatch.setattr(database_config, "_async_engine", None)
+
+    assert get_app_container().session_factory is None
+    assert database_config._async_engine is None
+
+
+def test_memory_app_container_has_no_item_cache(monkeypatch):
+    monkeypatch.setenv("REPOSITORY_TYPE", "memory")
+    monkeypatch.setenv("ITEM_CACHE_SIZE", "10")
+    monkeypatch.setattr(app_container, "_app_container", None)
+
+    assert get_app_container().item_cache is None
+
+
+def test_sql_container_needs_session_factory():
+    with pytest.raises(ValueError):
+        AppContainer("sql")
+
+
+def test_memory_container_has_no_session_factory():
+    with pytest.raises(ValueError):
+        AppContainer("memory").session_factory_for(read_only=False)
+
+
+@pytest.mark.anyio
+async def test_read_only_requests_use_replicas_in_turn():
+    primary = CountingSessionFactory()
+    replicas = [CountingSessionFactory(), CountingSessionFactory()]
+    app_container = AppContainer("sql", primary, replicas)
+
+    for read_only in (True, True, True, False):
+        await app_container.request_container(read_only).item_repository()
+
+    assert [len(replica.sessions) for replica in replicas] == [2, 1]
+    assert len(primary.sessions) == 1
+
+
+@pytest.mark.anyio
+async def test_reads_use_primary_without_replicas():
+    primary = CountingSessionFactory()
+    container = AppContainer("sql", primary).request_container(read_only=True)
+
+    await container.item_repository()
+
+    assert len(primary.sessions) == 1
+    assert not container.read_only
+    assert not container.wrote_to_primary
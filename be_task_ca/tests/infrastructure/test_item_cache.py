@@ -0,0 +1,174 @@
+from dataclasses import replace
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from be_task_ca.domain.item.entities import Item
+from be_task_ca.infrastructure import factory
+from be_task_ca.infrastructure.in_memory.async_repositories import (
+    AsyncInMemoryItemRepository,
+)
+from be_task_ca.infrastructure.in_memory.item_repository import InMemoryItemRepository
+from be_task_ca.infrastructure.item_cache import CachingItemRepository, ItemCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def store():
+    return InMemoryItemRepository()
+
+
+@pytest.fixture
+def cache():
+    return ItemCache(max_size=2, ttl=10, clock=FakeClock())
+
+
+@pytest.fixture
+def item(store):
+    return store.save_item(Item(name="Lamp", price=20.0, quantity=5))
+
+
+def caching(store, cache):
+    return CachingItemRepository(AsyncInMemoryItemRepository(store), cache)
+
+
+def test_evicts_least_recently_used_item(cache):
+    first, second, third = (Item(name=name) for name in ("a", "b", "c"))
+    cache.put(first)
+    cache.put(second)
+    assert cache.get(first.id) is first
+
+    cache.put(third)
+
+    assert cache.get(second.id) is None
+    assert cache.get_by_name("b") is None
+    assert cache.get_by_name("a") is first
+    assert cache.report()["evictions"] == 1
+    assert cache.report()["size"] == 2
+
+
+def test_expires_items_after_ttl(cache):
+    item = Item(name="a")
+    cache.put(item)
+
+    cache._clock.now = 10
+
+    assert cache.get(item.id) is None
+    assert cache.report()["expirations"] == 1
+    assert cache.report()["size"] == 0
+
+
+def test_renamed_item_is_not_found_by_old_name(cache):
+    item = Item(name="old")
+    cache.put(item)
+    cache.put(replace(item, name="new"))
+
+    assert cache.get_by_name("old") is None
+    assert cache.get_by_name("new").id == item.id
+
+
+def test_read_older_than_forgotten_invalidations_is_not_cached(cache):
+    item = Item(name="a")
+    token = cache.token()
+    for _ in range(3):
+        cache.invalidate(Item().id)
+
+    cache.put(item, token)
+
+    assert cache.get(item.id) is None
+
+
+@pytest.mark.anyio
+async def test_serves_lookups_from_cache(store, cache, item):
+    repository = caching(store, cache)
+
+    assert (await repository.find_item_by_id(item.id)).quantity == 5
+    store.reserve_stock(item.id, 1)
+
+    # Later lookups, by id or by name, do not reach the store until expiry
+    assert (await repository.find_item_by_id(item.id)).quantity == 5
+    assert (await repository.find_item_by_name("Lamp")).quantity == 5
+    assert await repository.find_item_by_id(Item().id) is None
+    assert cache.report()["hits"] == 2
+    assert cache.report()["misses"] == 2
+
+
+@pytest.mark.anyio
+async def test_stock_changes_invalidate_cached_item_on_commit(store, cache, item):
+    await caching(store, cache).find_item_by_id(item.id)
+    writer = caching(store, cache)
+
+    assert await writer.reserve_stock(item.id, 2)
+    # Other requests keep the committed item until the write commits
+    assert (await caching(store, cache).find_item_by_id(item.id)).quantity == 5
+    writer.committed()
+
+    assert (await caching(store, cache).find_item_by_id(item.id)).quantity == 3
+    assert cache.report()["invalidations"] == 1
+
+
+@pytest.mark.anyio
+async def test_item_read_before_a_commit_is_not_cached_after_it(store, cache, item):
+    reader, writer = caching(store, cache), caching(store, cache)
+    token = cache.token()
+    stale = await AsyncInMemoryItemRepository(store).find_item_by_id(item.id)
+
+    await writer.reserve_stock(item.id, 1)
+    writer.committed()
+    cache.put(stale, token)
+
+    assert (await reader.find_item_by_id(item.id)).quantity == 4
+
+
+@pytest.mark.anyio
+async def test_request_does_not_cache_its_own_writes(store, cache, item):
+    repository = caching(store, cache)
+    await repository.find_item_by_id(item.id)
+
+    await repository.save_item(replace(item, price=25.0))
+
+    assert (await repository.find_item_by_id(item.id)).price == 25.0
+    assert (await repository.find_item_by_name("Lamp")).price == 25.0
+    assert cache.get(item.id).price == 20.0
+
+    repository.committed()
+    assert cache.report()["size"] == 0
+
+
+@pytest.mark.anyio
+async def test_factory_caches_sql_items_when_configured(monkeypatch, item):
+    monkeypatch.setattr(factory, "_item_cache", None)
+    monkeypatch.setenv("ITEM_CACHE_SIZE", "100")
+    session = AsyncSession()
+
+    repository = factory.get_async_item_repository(
+        "sql", session, factory.get_item_cache()
+    )
+
+    assert isinstance(repository, CachingItemRepository)
+    assert repository.cache is factory.get_item_cache()
+    assert repository.cache.max_size == 100
+
+    repository.cache.put(item)
+    repository._written_ids.add(item.id)
+    await session.commit()
+    assert repository.cache.get(item.id) is None
+
+
+def test_factory_leaves_cache_out_by_default(monkeypatch):
+    monkeypatch.setattr(factory, "_item_cache", None)
+    monkeypatch.delenv("ITEM_CACHE_SIZE", raising=False)
+
+    repository = factory.get_async_item_repository(
+        "sql", AsyncSession(), factory.get_item_cache()
+    )
+
+    assert not isinstance(repository, CachingItemRepository)
+    assert factory.get_item_cache() is None
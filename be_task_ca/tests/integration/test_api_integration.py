@@ -1,16 +1,25 @@
 import pytest
 from fastapi.testclient import TestClient
+import json
 import uuid
 
 from be_task_ca.main import app
 from be_task_ca.application.dto.user_dto import CreateUserRequest, AddToCartRequest
 from be_task_ca.application.dto.item_dto import CreateItemRequest
+from be_task_ca.infrastructure.api.admission import (
+    AdmissionController,
+    ConcurrencyLimiter,
+)
+from be_task_ca.infrastructure.container import reset_app_container
 
 
 @pytest.fixture
 def client():
     """Create a test client for the FastAPI application."""
-    return TestClient(app)
+    # One event loop for the whole test, which the pooled async database
+    # connections are bound to
+    with TestClient(app) as client:
+        yield client
 
 
 @pytest.mark.parametrize("use_fixture", ["use_memory_db", "use_sql_db"])
@@ -41,6 +50,12 @@ def test_create_and_get_item(client, request, use_fixture):
     created_item_in_list = next((item for item in items if item["name"] == unique_name), None)
     assert created_item_in_list is not None
 
+    detail_response = client.get(f"/items/{created_item['id']}")
+
+    assert detail_response.status_code == 200
+    assert detail_response.json() == created_item
+    assert client.get(f"/items/{uuid.uuid4()}").status_code == 404
+
 
 @pytest.mark.parametrize("use_fixture", ["use_memory_db", "use_sql_db"])
 def test_create_user_and_add_to_cart(client, request, use_fixture, db_session):
@@ -91,4 +106,424 @@ def test_create_user_and_add_to_cart(client, request, use_fixture, db_session):
 
     assert get_cart_response.status_code == 200
     cart = get_cart_response.json()
-    assert len(cart["items"]) == 1
\ No newline at end of file
+    assert len(cart["items"]) == 1
+    assert cart["items"][0]["name"] == item_data["name"]
+    assert cart["items"][0]["line_total"] == 31.98
+    assert cart["total"] == 31.98
+
+    cart_line_url = f"/users/{user['id']}/cart/{item['id']}"
+    update_response = client.put(cart_line_url, json={"quantity": 5})
+
+    assert update_response.status_code == 200
+    assert update_response.json()["items"][0]["quantity"] == 5
+
+    remove_response = client.delete(cart_line_url)
+
+    assert remove_response.status_code == 200
+    assert remove_response.json()["items"] == []
+    assert client.delete(cart_line_url).status_code == 404
+
+@pytest.mark.parametrize("use_fixture", ["use_memory_db", "use_sql_db"])
+def test_get_items_with_cursor(client, request, use_fixture):
+    """Test walking the item catalog page by page through the API."""
+    request.getfixturevalue(use_fixture)
+
+    for _ in range(3):
+        item_data = {"name": f"Paged Item {uuid.uuid4()}", "price": 1.0, "quantity": 1}
+        assert client.post("/items/", json=item_data).status_code == 200
+
+    first_page = client.get("/items/", params={"limit": 2})
+    assert first_page.status_code == 200
+    body = first_page.json()
+    assert len(body["items"]) == 2
+    assert body["next_cursor"] is not None
+
+    second_page = client.get(
+        "/items/", params={"limit": 2, "cursor": body["next_cursor"]}
+    )
+    assert second_page.status_code == 200
+    first_ids = {item["id"] for item in body["items"]}
+    assert not first_ids & {item["id"] for item in second_page.json()["items"]}
+
+    assert client.get("/items/", params={"cursor": "garbage"}).status_code == 400
+    assert client.get("/items/", params={"limit": 0}).status_code == 422
+
+
+@pytest.mark.parametrize("use_fixture", ["use_memory_db", "use_sql_db"])
+def test_get_items_with_fields(client, request, use_fixture):
+    """Test requesting a sparse fieldset of the catalog."""
+    request.getfixturevalue(use_fixture)
+
+    item_data = {"name": f"Sparse Item {uuid.uuid4()}", "price": 2.5, "quantity": 4}
+    assert client.post("/items/", json=item_data).status_code == 200
+
+    response = client.get("/items/", params={"limit": 2, "fields": "name,price"})
+
+    assert response.status_code == 200
+    assert response.headers["etag"]
+    for item in response.json()["items"]:
+        assert set(item) == {"id", "name", "price"}
+
+    response = client.get("/items/", params={"fields": "name,secret"})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("use_fixture", ["use_memory_db", "use_sql_db"])
+def test_get_items_filtered_and_sorted_by_price(client, request, use_fixture):
+    """Test filtering the catalog by price band and stock, sorted by price."""
+    request.getfixturevalue(use_fixture)
+
+    base = 200000.0 + uuid.uuid4().int % 100000 * 10
+    for offset, quantity in ((3, 1), (1, 2), (2, 0), (9, 1)):
+        item_data = {
+            "name": f"Banded Item {uuid.uuid4()}",
+            "price": base + offset,
+            "quantity": quantity,
+        }
+        assert client.post("/items/", json=item_data).status_code == 200
+
+    params = {
+        "min_price": base, "max_price": base + 5, "in_stock": "true", "sort": "-price",
+    }
+    response = client.get("/items/", params=params)
+
+    assert response.status_code == 200
+    assert [item["price"] for item in response.json()["items"]] == [base + 3, base + 1]
+
+    response = client.get("/items/", params={**params, "limit": 1})
+    next_page = client.get(
+        "/items/", params={**params, "limit": 1, "cursor": response.json()["next_cursor"]}
+    )
+    assert [item["price"] for item in next_page.json()["items"]] == [base + 1]
+
+    assert client.get("/items/", params={"sort": "name"}).status_code == 422
+
+
+@pytest.mark.parametrize("use_fixture", ["use_memory_db", "use_sql_db"])
+def test_get_items_as_ndjson_stream(client, request, use_fixture):
+    """Test exporting the catalog as newline-delimited JSON."""
+    request.getfixturevalue(use_fixture)
+
+    unique_name = f"Streamed Item {uuid.uuid4()}"
+    item_data = {"name": unique_name, "price": 3.5, "quantity": 2}
+    assert client.post("/items/", json=item_data).status_code == 200
+
+    response = client.get("/items/", headers={"Accept": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    streamed = next(row for row in rows if row["name"] == unique_name)
+    assert streamed["price"] == 3.5
+
+
+@pytest.mark.parametrize("use_fixture", ["use_memory_db", "use_sql_db"])
+def test_bulk_create_items(client, request, use_fixture):
+    """Test importing items as a JSON array and as NDJSON."""
+    request.getfixturevalue(use_fixture)
+
+    prefix = str(uuid.uuid4())[:8]
+    rows = [
+        {"name": f"{prefix} Bulk 1", "price": 1.0, "quantity": 1},
+        {"name": f"{prefix} Bulk 2", "price": 2.0, "quantity": 2},
+    ]
+
+    response = client.post("/items/bulk", json=rows)
+
+    assert response.status_code == 200
+    assert response.json()["created"] == 2
+
+    ndjson_rows = [
+        {"name": f"{prefix} Bulk 2", "price": 2.0, "quantity": 2},
+        {"name": f"{prefix} Bulk 3", "price": 3.0, "quantity": 3},
+    ]
+    response = client.post(
+        "/items/bulk",
+        content="\n".join(json.dumps(row) for row in ndjson_rows),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["created"] == 1
+    assert [result["status"] for result in body["results"]] == ["conflict", "created"]
+
+
+def test_bulk_create_items_validation_error(client, use_memory_db):
+    """Test that invalid rows are reported with their position."""
+    rows = [
+        {"name": "Valid", "price": 1.0, "quantity": 1},
+        {"name": "Missing price", "quantity": 1},
+    ]
+
+    response = client.post("/items/bulk", json=rows)
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", 1, "price"]
+
+
+def test_bulk_create_items_caps_batch_size(client, use_memory_db, monkeypatch):
+    """Test that oversized item imports are rejected before any is validated."""
+    monkeypatch.setenv("BULK_ITEMS_MAX_ROWS", "2")
+    prefix = str(uuid.uuid4())[:8]
+    rows = [
+        {"name": f"{prefix} Capped {number}", "price": 1.0, "quantity": 1}
+        for number in range(3)
+    ]
+
+    response = client.post("/items/bulk", json=rows)
+
+    assert response.status_code == 413
+    assert client.post("/items/bulk", json=rows[:2]).status_code == 200
+
+
+@pytest.mark.parametrize("use_fixture", ["use_memory_db", "use_sql_db"])
+def test_bulk_create_users(client, request, use_fixture):
+    """Test registering users in bulk, with per-row results."""
+    request.getfixturevalue(use_fixture)
+
+    prefix = str(uuid.uuid4())[:8]
+    rows = [
+        {
+            "first_name": "Bulk",
+            "last_name": "User",
+            "email": f"{prefix}_{number}@example.com",
+            "password": "secret",
+        }
+        for number in (1, 2, 1)
+    ]
+
+    response = client.post("/users/bulk", json=rows)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["created"] == 2
+    assert [result["status"] for result in body["results"]] == [
+        "created", "created", "conflict"
+    ]
+
+    duplicate = client.post("/users/", json=rows[1])
+    assert duplicate.status_code == 409
+
+
+def test_bulk_create_users_caps_batch_size(client, use_memory_db, monkeypatch):
+    """Test that oversized bulk signups are rejected before any is hashed."""
+    monkeypatch.setenv("BULK_USERS_MAX_ROWS", "2")
+    rows = [
+        {
+            "first_name": "Bulk",
+            "last_name": "User",
+            "email": f"capped_{number}@example.com",
+            "password": "secret",
+        }
+        for number in range(3)
+    ]
+
+    response = client.post("/users/bulk", json=rows)
+
+    assert response.status_code == 413
+    assert client.post("/users/bulk", json=rows[:2]).status_code == 200
+
+
+@pytest.mark.parametrize("use_fixture", ["use_memory_db", "use_sql_db"])
+def test_get_items_conditional_request(client, request, use_fixture):
+    """Test that an unchanged catalog is answered with 304 Not Modified."""
+    request.getfixturevalue(use_fixture)
+
+    first = client.get("/items/", params={"limit": 1})
+    etag = first.headers["ETag"]
+
+    not_modified = client.get(
+        "/items/", params={"limit": 1}, headers={"If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+
+    other_page = client.get(
+        "/items/", params={"limit": 2}, headers={"If-None-Match": etag}
+    )
+    assert other_page.status_code == 200
+
+    item_data = {"name": f"ETag Item {uuid.uuid4()}", "price": 1.0, "quantity": 1}
+    assert client.post("/items/", json=item_data).status_code == 200
+
+    modified = client.get("/items/", params={"limit": 1}, headers={"If-None-Match": etag})
+    assert modified.status_code == 200
+    assert modified.headers["ETag"] != etag
+
+
+@pytest.mark.parametrize("use_fixture", ["use_memory_db", "use_sql_db"])
+def test_selling_out_changes_the_etag(client, request, use_fixture):
+    """Test that a listing filtered by stock is not revalidated once it sells out."""
+    request.getfixturevalue(use_fixture)
+
+    # Priced apart from other items, also those left by earlier runs on the
+    # same database, so the listing below holds only this one
+    price = 10000 + uuid.uuid4().int % 10**6 / 100
+    item_data = {"name": f"Last One {uuid.uuid4()}", "price": price, "quantity": 1}
+    item = client.post("/items/", json=item_data).json()
+    user_data = {
+        "first_name": "Last",
+        "last_name": "Buyer",
+        "email": f"last_buyer_{uuid.uuid4()}@example.com",
+        "password": "secret",
+    }
+    user = client.post("/users/", json=user_data).json()
+    params = {"in_stock": "true", "min_price": price, "max_price": price}
+
+    listing = client.get("/items/", params=params)
+    assert [row["id"] for row in listing.json()["items"]] == [item["id"]]
+
+    cart_line = {"item_id": item["id"], "quantity": 1}
+    assert client.post(f"/users/{user['id']}/cart", json=cart_line).status_code == 200
+
+    sold_out = client.get(
+        "/items/", params=params, headers={"If-None-Match": listing.headers["ETag"]}
+    )
+    assert sold_out.status_code == 200
+    assert sold_out.headers["ETag"] != listing.headers["ETag"]
+    assert sold_out.json()["items"] == []
+
+
+@pytest.mark.parametrize("use_fixture", ["use_memory_db", "use_sql_db"])
+def test_search_items(client, request, use_fixture):
+    """Test searching the catalog by name and description prefixes."""
+    request.getfixturevalue(use_fixture)
+
+    token = "qz" + uuid.uuid4().hex[:8]
+    item_data = {
+        "name": f"{token}kettle Steel",
+        "description": "Boils water",
+        "price": 30.0,
+        "quantity": 3,
+    }
+    assert client.post("/items/", json=item_data).status_code == 200
+
+    response = client.get("/items/search", params={"q": f"{token}KET ste"})
+
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()["items"]] == [item_data["name"]]
+    assert client.get("/items/search", params={"q": ""}).status_code == 422
+
+
+def test_overloaded_requests_are_shed(client, monkeypatch, use_memory_db):
+    """Requests without a free slot get a 503 while cheap routes keep working."""
+    controller = AdmissionController(
+        ConcurrencyLimiter(limit=0, queue_size=0, queue_timeout=0),
+        ConcurrencyLimiter(limit=1, queue_size=0, queue_timeout=0),
+        cheap_paths=["/"],
+        retry_after=3,
+    )
+    monkeypatch.setattr(
+        "be_task_ca.infrastructure.factory._admission_controller", controller
+    )
+
+    response = client.get("/items/")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+    assert client.get("/").status_code == 200
+    assert controller.cheap_limiter.active == 0
+
+
+def test_pool_metrics_count_request_checkouts(client, use_sql_db):
+    """The internal pool endpoint reports the checkouts made by requests."""
+    before = client.get("/internal/pool").json()["checkouts"]
+    assert client.get("/items/").status_code == 200
+
+    report = client.get("/internal/pool").json()
+
+    assert report["checkouts"] > before
+    assert report["checked_out"] == 0
+    assert report["wait_seconds_histogram"][-1]["le"] == "+Inf"
+
+
+def test_cart_endpoints_stay_within_query_budgets(
+    client, use_sql_db, endpoint_query_budget
+):
+    """Cart reads and writes cost a fixed number of queries, however many lines."""
+    user = client.post("/users/", json={
+        "first_name": "Budget",
+        "last_name": "User",
+        "email": f"budget_{uuid.uuid4()}@example.com",
+        "password": "budget_password",
+    }).json()
+    for _ in range(5):
+        item = client.post("/items/", json={
+            "name": f"Budget Item {uuid.uuid4()}", "price": 1.0, "quantity": 10
+        }).json()
+        response = client.post(
+            f"/users/{user['id']}/cart", json={"item_id": item["id"], "quantity": 1}
+        )
+        endpoint_query_budget(response, 5)
+
+    response = client.get(f"/users/{user['id']}/cart")
+
+    assert len(response.json()["items"]) == 5
+    endpoint_query_budget(response, 1)
+
+
+def test_requests_without_repositories_check_out_no_connection(client, use_sql_db):
+    """Only requests that resolve a repository open a session."""
+    before = client.get("/internal/pool").json()["checkouts"]
+
+    assert client.get("/").status_code == 200
+    assert client.get("/docs").status_code == 200
+
+    assert client.get("/internal/pool").json()["checkouts"] == before
+
+
+def test_item_cache_serves_repeated_stock_failures(client, monkeypatch, use_sql_db):
+    """Failed reservations read the item once, then from the item cache."""
+    assert client.get("/internal/item-cache").status_code == 404
+    monkeypatch.setattr("be_task_ca.infrastructure.factory._item_cache", None)
+    monkeypatch.setenv("ITEM_CACHE_SIZE", "10")
+    # The app container takes the cache when it is built
+    reset_app_container()
+    user = client.post("/users/", json={
+        "first_name": "Cache",
+        "last_name": "User",
+        "email": f"cache_{uuid.uuid4()}@example.com",
+        "password": "cache_password",
+    }).json()
+    item = client.post("/items/", json={
+        "name": f"Cached Item {uuid.uuid4()}", "price": 1.0, "quantity": 1
+    }).json()
+
+    for _ in range(2):
+        response = client.post(
+            f"/users/{user['id']}/cart", json={"item_id": item["id"], "quantity": 2}
+        )
+        assert response.status_code == 409
+
+    report = client.get("/internal/item-cache").json()
+    assert report["misses"] == 1
+    assert report["hits"] == 1
+
+
+def test_item_cache_serves_item_lookups(client, monkeypatch, use_sql_db):
+    """Item lookups read the database once, then the item cache until a write."""
+    monkeypatch.setattr("be_task_ca.infrastructure.factory._item_cache", None)
+    monkeypatch.setenv("ITEM_CACHE_SIZE", "10")
+    user = client.post("/users/", json={
+        "first_name": "Cache",
+        "last_name": "Reader",
+        "email": f"cache_reader_{uuid.uuid4()}@example.com",
+        "password": "cache_password",
+    }).json()
+    item = client.post("/items/", json={
+        "name": f"Cached Item {uuid.uuid4()}", "price": 1.0, "quantity": 5
+    }).json()
+
+    for _ in range(3):
+        assert client.get(f"/items/{item['id']}").json()["quantity"] == 5
+    client.post(
+        f"/users/{user['id']}/cart", json={"item_id": item["id"], "quantity": 2}
+    )
+
+    # The cart add found the item in the cache and dropped it on commit
+    assert client.get(f"/items/{item['id']}").json()["quantity"] == 3
+    report = client.get("/internal/item-cache").json()
+    assert report["hits"] == 3
+    assert report["misses"] == 2
+    assert report["invalidations"] == 1
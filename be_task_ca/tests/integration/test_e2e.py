@@ -7,7 +7,8 @@ from be_task_ca.main import app
 
 @pytest.fixture
 def client():
-    return TestClient(app)
+    with TestClient(app) as client:
+        yield client
 
 
 @pytest.mark.parametrize("use_fixture", ["use_memory_db", "use_sql_db"])
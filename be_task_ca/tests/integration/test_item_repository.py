@@ -1,9 +1,23 @@
+import asyncpg
 import pytest
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
 from be_task_ca.domain.item.entities import Item
+from be_task_ca.domain.item.exceptions import DuplicateItemNameError
+from be_task_ca.domain.item.queries import ItemQuery, ItemSort
 from be_task_ca.infrastructure.factory import get_item_repository
+from be_task_ca.infrastructure.database.config import to_async_url
+from be_task_ca.infrastructure.database.repositories.async_item_repository import (
+    AsyncSQLItemRepository,
+)
+from be_task_ca.infrastructure.database.models.item_model import ItemModel
 from be_task_ca.infrastructure.database.repositories.item_repository import SQLItemRepository
 from be_task_ca.infrastructure.in_memory.item_repository import InMemoryItemRepository
+from be_task_ca.tests.conftest import TEST_DATABASE_URL
 
 
 def test_parameters():
@@ -90,4 +104,333 @@ def test_get_all_items(request, params):
     assert len(relevant_items) == 2
     names = [item.name for item in relevant_items]
     assert f"{prefix} Item 1" in names
-    assert f"{prefix} Item 2" in names
\ No newline at end of file
+    assert f"{prefix} Item 2" in names
+
+@pytest.mark.parametrize("params", test_parameters())
+def test_get_items_page(request, params):
+    """Test keyset pagination with both repository implementations."""
+    repo = request.getfixturevalue(params["repo_fixture"])
+    request.getfixturevalue(params["use_fixture"])
+
+    prefix = str(uuid.uuid4())[:8]
+    saved_ids = set()
+    for i in range(5):
+        item = Item(name=f"{prefix} Item {i}", price=10.0, quantity=1)
+        repo.save_item(item)
+        saved_ids.add(item.id)
+
+    seen_ids = []
+    after = None
+    while True:
+        page = repo.get_items_page(2, after)
+        if not page:
+            break
+        assert len(page) <= 2
+        seen_ids.extend(item.id for item in page)
+        after = page[-1].id
+
+    assert seen_ids == sorted(seen_ids)
+    assert saved_ids <= set(seen_ids)
+
+
+@pytest.mark.parametrize("params", test_parameters())
+def test_get_items_page_with_fields(request, params):
+    """Test that sparse reads only load the requested columns."""
+    repo = request.getfixturevalue(params["repo_fixture"])
+    request.getfixturevalue(params["use_fixture"])
+
+    item = Item(name=f"Sparse {uuid.uuid4()}", description="Long text", price=5.0)
+    repo.save_item(item)
+
+    page = repo.get_items_page(1000, fields=["name", "price"])
+    loaded = next(found for found in page if found.id == item.id)
+
+    assert loaded.name == item.name
+    assert loaded.price == 5.0
+    assert loaded.description is None
+
+
+@pytest.mark.parametrize("params", test_parameters())
+def test_iter_all_items(request, params):
+    """Test streaming every item in batches with both repository implementations."""
+    repo = request.getfixturevalue(params["repo_fixture"])
+    request.getfixturevalue(params["use_fixture"])
+
+    prefix = str(uuid.uuid4())[:8]
+    for i in range(5):
+        repo.save_item(Item(name=f"{prefix} Item {i}", price=1.0, quantity=1))
+
+    streamed = [item for item in repo.iter_all_items(batch_size=2)]
+    relevant_names = {item.name for item in streamed if item.name.startswith(prefix)}
+
+    assert relevant_names == {f"{prefix} Item {i}" for i in range(5)}
+
+
+@pytest.mark.parametrize("params", test_parameters())
+def test_insert_items_skips_conflicts(request, params):
+    """Test bulk inserting items with both repository implementations."""
+    repo = request.getfixturevalue(params["repo_fixture"])
+    request.getfixturevalue(params["use_fixture"])
+
+    prefix = str(uuid.uuid4())[:8]
+    existing = Item(name=f"{prefix} Existing", price=1.0, quantity=1)
+    repo.save_item(existing)
+
+    new_items = [
+        Item(name=f"{prefix} Tab\tand\\backslash", description=None, price=2.5, quantity=3),
+        Item(name=f"{prefix} Existing", description="Duplicate", price=9.0, quantity=9),
+        Item(name=f"{prefix} Newline", description="Line 1\nLine 2", price=0.1, quantity=0),
+    ]
+    inserted = repo.insert_items(new_items)
+
+    assert [item.id for item in inserted] == [new_items[0].id, new_items[2].id]
+    assert repo.find_existing_item_names(
+        [f"{prefix} Existing", f"{prefix} Newline", f"{prefix} Missing"]
+    ) == {f"{prefix} Existing", f"{prefix} Newline"}
+
+    escaped = repo.find_item_by_id(new_items[0].id)
+    assert escaped.name == f"{prefix} Tab\tand\\backslash"
+    assert escaped.description is None
+    assert repo.find_item_by_id(new_items[2].id).description == "Line 1\nLine 2"
+    assert repo.find_item_by_name(f"{prefix} Existing").price == 1.0
+
+
+@pytest.mark.anyio
+async def test_async_insert_items_copies_with_asyncpg(test_engine, monkeypatch):
+    """Test that bulk inserts on the asyncio stack stream rows with COPY."""
+    copied = []
+    copy_records_to_table = asyncpg.Connection.copy_records_to_table
+
+    async def spy(self, table_name, **options):
+        copied.append(len(options["records"]))
+        return await copy_records_to_table(self, table_name, **options)
+
+    monkeypatch.setattr(asyncpg.Connection, "copy_records_to_table", spy)
+    engine = create_async_engine(to_async_url(TEST_DATABASE_URL), poolclass=NullPool)
+    prefix = str(uuid.uuid4())[:8]
+    new_items = [
+        Item(name=f"{prefix} Tab\tand\\backslash", description=None, price=2.5),
+        Item(name=f"{prefix} Newline", description="Line 1\nLine 2", quantity=3),
+    ]
+
+    try:
+        async with engine.connect() as connection:
+            async with AsyncSession(bind=connection) as session:
+                repo = AsyncSQLItemRepository(session)
+                await repo.save_item(Item(name=f"{prefix} Existing", price=1.0))
+                inserted = await repo.insert_items(
+                    [*new_items, Item(name=f"{prefix} Existing", price=9.0)]
+                )
+
+                assert copied == [3]
+                assert [item.id for item in inserted] == [item.id for item in new_items]
+                found = await repo.find_item_by_id(new_items[0].id)
+                assert found.name == new_items[0].name
+                assert found.description is None
+                assert (await repo.find_item_by_name(f"{prefix} Existing")).price == 1.0
+                await session.rollback()
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.parametrize("params", test_parameters())
+def test_catalog_version_moves_forward(request, params):
+    """Test the catalog version counter with both repository implementations."""
+    repo = request.getfixturevalue(params["repo_fixture"])
+    request.getfixturevalue(params["use_fixture"])
+
+    initial = repo.get_catalog_version()
+    item = Item(name=f"Versioned {uuid.uuid4()}", price=1.0, quantity=1)
+    repo.save_item(item)
+    after_create = repo.get_catalog_version()
+    item.price = 2.0
+    repo.save_item(item)
+    after_update = repo.get_catalog_version()
+    repo.insert_items([Item(name=f"Versioned {uuid.uuid4()}")])
+
+    assert initial < after_create < after_update < repo.get_catalog_version()
+
+
+@pytest.mark.parametrize("params", test_parameters())
+def test_search_items(request, params):
+    """Test ranked prefix search with both repository implementations."""
+    repo = request.getfixturevalue(params["repo_fixture"])
+    request.getfixturevalue(params["use_fixture"])
+
+    token = "zx" + uuid.uuid4().hex[:8]
+    in_name = Item(name=f"{token}lamp Deluxe", description="Bright", price=1.0)
+    in_description = Item(name=f"Plain {uuid.uuid4()}", description=f"A {token}lamp shade")
+    unrelated = Item(name=f"{token}chair", description="Wooden")
+    for item in (in_description, in_name, unrelated):
+        repo.save_item(item)
+
+    results = repo.search_items([f"{token}lamp"], 10)
+    assert [item.id for item in results] == [in_name.id, in_description.id]
+
+    results = repo.search_items([token, "delu"], 10)
+    assert [item.id for item in results] == [in_name.id]
+
+    assert len(repo.search_items([token], 1)) == 1
+    assert repo.search_items([], 10) == []
+
+
+@pytest.mark.parametrize("params", test_parameters())
+def test_query_items(request, params):
+    """Test filtered, price sorted listings with both repository implementations."""
+    repo = request.getfixturevalue(params["repo_fixture"])
+    request.getfixturevalue(params["use_fixture"])
+
+    # A price band of its own keeps rows from other tests out of the results
+    base = 100000.0 + uuid.uuid4().int % 100000 * 10
+    prices = [base + 4, base + 1, base + 3, base + 1, base + 2, base + 9]
+    items = [
+        Item(name=f"Filtered {uuid.uuid4()}", price=price, quantity=i % 3)
+        for i, price in enumerate(prices)
+    ]
+    for item in items:
+        repo.save_item(item)
+
+    in_band = [item for item in items if item.price <= base + 4]
+    ascending = sorted(in_band, key=lambda item: (item.price, item.id))
+    query = ItemQuery(min_price=base, max_price=base + 4, sort=ItemSort.PRICE)
+
+    seen = []
+    after = None
+    while True:
+        page = repo.query_items(query, 2, after)
+        seen.extend(page)
+        if len(page) < 2:
+            break
+        after = query.position(page[-1])
+    assert [item.id for item in seen] == [item.id for item in ascending]
+
+    query = ItemQuery(min_price=base, in_stock=True, sort=ItemSort.PRICE_DESC)
+    first_page = repo.query_items(query, 2)
+    second_page = repo.query_items(query, 10, query.position(first_page[-1]))
+    expected = sorted(
+        (item for item in items if item.quantity),
+        key=lambda item: (item.price, item.id),
+        reverse=True,
+    )
+    assert [item.id for item in first_page + second_page] == [
+        item.id for item in expected
+    ]
+
+    query = ItemQuery(min_price=base + 2, max_price=base + 3, sort=ItemSort.ID)
+    results = repo.query_items(query, 10, fields=["name"])
+    assert [item.id for item in results] == sorted(
+        item.id for item in items if base + 2 <= item.price <= base + 3
+    )
+    assert {item.price for item in results} == {0.0}
+
+
+@pytest.mark.parametrize("params", test_parameters())
+def test_save_item_upserts_and_rejects_duplicate_name(request, params):
+    """Test that saving updates by id and reports a taken name."""
+    repo = request.getfixturevalue(params["repo_fixture"])
+    request.getfixturevalue(params["use_fixture"])
+
+    name = f"Upsert Item {uuid.uuid4()}"
+    item = repo.save_item(Item(name=name, price=1.0, quantity=1))
+    repo.save_item(Item(id=item.id, name=name, price=2.0, quantity=5))
+
+    assert repo.find_item_by_id(item.id) == Item(
+        id=item.id, name=name, price=2.0, quantity=5
+    )
+
+    with pytest.raises(DuplicateItemNameError):
+        repo.save_item(Item(name=name, price=3.0, quantity=1))
+
+
+@pytest.mark.parametrize("params", test_parameters())
+def test_find_items_by_ids(request, params):
+    """Test fetching several items by id in one lookup."""
+    repo = request.getfixturevalue(params["repo_fixture"])
+    request.getfixturevalue(params["use_fixture"])
+
+    items = [
+        repo.save_item(Item(name=f"Multi {uuid.uuid4()}", price=float(i), quantity=i))
+        for i in range(3)
+    ]
+    ids = [items[2].id, uuid.uuid4(), items[0].id]
+
+    found = repo.find_items_by_ids(ids, fields=["name"])
+
+    assert [(item.id, item.name) for item in found] == [
+        (items[2].id, items[2].name),
+        (items[0].id, items[0].name),
+    ]
+
+
+@pytest.mark.parametrize("params", test_parameters())
+def test_reserve_and_release_stock(request, params):
+    """Test that stock is only reserved while enough units are left."""
+    repo = request.getfixturevalue(params["repo_fixture"])
+    request.getfixturevalue(params["use_fixture"])
+
+    item = repo.save_item(Item(name=f"Stock {uuid.uuid4()}", price=1.0, quantity=3))
+    version = repo.get_catalog_version()
+
+    assert repo.reserve_stock(item.id, 2)
+    assert not repo.reserve_stock(item.id, 2)
+    assert repo.find_item_by_id(item.id).quantity == 1
+    # Listings filtered by stock change with it
+    assert repo.get_catalog_version() > version
+
+    assert repo.release_stock(item.id, 2)
+    assert repo.find_item_by_id(item.id).quantity == 3
+    assert not repo.reserve_stock(uuid.uuid4(), 1)
+    assert not repo.release_stock(uuid.uuid4(), 1)
+
+
+def test_catalog_version_moves_when_an_earlier_write_commits_last(test_engine):
+    """Test that a write drawing its version first but committing last is seen."""
+    early = Item(name=f"Early {uuid.uuid4()}", price=1.0, quantity=1)
+    late = Item(name=f"Late {uuid.uuid4()}", price=1.0, quantity=1)
+
+    def catalog_version():
+        with Session(test_engine) as session:
+            return SQLItemRepository(session).get_catalog_version()
+
+    try:
+        with Session(test_engine) as slow, Session(test_engine) as fast:
+            SQLItemRepository(slow).save_item(early)
+            SQLItemRepository(fast).save_item(late)
+            fast.commit()
+            version = catalog_version()
+            slow.commit()
+
+        assert catalog_version() > version
+    finally:
+        with Session(test_engine) as session:
+            session.execute(
+                delete(ItemModel).where(ItemModel.id.in_([early.id, late.id]))
+            )
+            session.commit()
+
+
+def test_concurrent_reservations_never_oversell(test_engine):
+    """Test many sessions racing to reserve the last units of one item."""
+    item = Item(name=f"Flash Sale {uuid.uuid4()}", price=1.0, quantity=50)
+    with Session(test_engine) as session:
+        SQLItemRepository(session).save_item(item)
+        session.commit()
+
+    def reserve(_):
+        with Session(test_engine) as session:
+            reserved = SQLItemRepository(session).reserve_stock(item.id, 1)
+            session.commit()
+            return reserved
+
+    try:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(reserve, range(200)))
+
+        with Session(test_engine) as session:
+            remaining = SQLItemRepository(session).find_item_by_id(item.id).quantity
+        assert results.count(True) == 50
+        assert remaining == 0
+    finally:
+        with Session(test_engine) as session:
+            session.execute(delete(ItemModel).where(ItemModel.id == item.id))
+            session.commit()
@@ -0,0 +1,75 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from be_task_ca.infrastructure import container
+from be_task_ca.infrastructure.container import AppContainer
+from be_task_ca.infrastructure.database.config import Base
+from be_task_ca.main import app
+
+
+def sqlite_session_factory(path):
+    """Schema and session factory for a SQLite file standing in for a server."""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    # No pooling, aiosqlite connections cannot move between the test
+    # client's event loops
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    return async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def replicated_app(tmp_path, monkeypatch, use_sql_db):
+    """The app on a primary and a replica that never receives the writes."""
+    def use_replica(read_your_writes_seconds):
+        monkeypatch.setattr(container, "_app_container", AppContainer(
+            "sql",
+            sqlite_session_factory(tmp_path / "primary.db"),
+            [sqlite_session_factory(tmp_path / "replica.db")],
+            read_your_writes_seconds,
+        ))
+
+    use_replica(60)
+    return use_replica
+
+
+LAMP = {"name": "Lamp", "price": 10.0, "quantity": 1}
+
+
+def item_names(client):
+    response = client.get("/items/")
+    assert response.status_code == 200
+    return [item["name"] for item in response.json()["items"]]
+
+
+def test_reads_go_to_replica_and_writes_to_primary(replicated_app):
+    writer, reader = TestClient(app), TestClient(app)
+
+    response = writer.post("/items/", json=LAMP)
+
+    assert response.status_code == 200
+    assert "read_primary_until" in response.cookies
+    # The replica has not caught up with the write
+    assert item_names(reader) == []
+    assert "read_primary_until" not in reader.cookies
+
+
+def test_writer_reads_its_writes_from_primary(replicated_app):
+    client = TestClient(app)
+
+    client.post("/items/", json=LAMP)
+
+    assert item_names(client) == ["Lamp"]
+
+
+def test_stickiness_ends_after_window(replicated_app):
+    # The cookie's deadline is already past when the next read arrives
+    replicated_app(0)
+    client = TestClient(app)
+
+    client.post("/items/", json=LAMP)
+
+    assert item_names(client) == []
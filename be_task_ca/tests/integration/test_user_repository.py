@@ -1,6 +1,9 @@
 import pytest
 import uuid
-from be_task_ca.domain.user.entities import User, CartItem
+from sqlalchemy import event
+from be_task_ca.domain.user.entities import CartLine, User, CartItem
+from be_task_ca.domain.user.exceptions import DuplicateEmailError
+from be_task_ca.domain.user.queries import UserShape
 from be_task_ca.domain.item.entities import Item
 from be_task_ca.infrastructure.factory import get_user_repository, get_item_repository
 from be_task_ca.infrastructure.database.repositories.user_repository import SQLUserRepository
@@ -24,9 +27,9 @@ def sql_user_repo(db_session):
 
 
 @pytest.fixture
-def memory_user_repo():
+def memory_user_repo(memory_item_repo):
     """Fixture for in-memory user repository."""
-    return InMemoryUserRepository()
+    return InMemoryUserRepository(item_repository=memory_item_repo)
 
 
 @pytest.mark.parametrize("params", test_parameters())
@@ -121,6 +124,43 @@ def test_save_user_with_cart_items(request, params):
     assert item2.id in item_ids
 
 
+@pytest.mark.parametrize("params", test_parameters())
+def test_cart_line_operations(request, params):
+    """Test adding, updating and removing single cart lines."""
+    user_repo = request.getfixturevalue(params["repo_fixture"])
+    request.getfixturevalue(params["use_fixture"])
+
+    if params["name"] == "SQL":
+        item_repo = request.getfixturevalue("sql_item_repo")
+    else:
+        item_repo = request.getfixturevalue("memory_item_repo")
+
+    user = User(email=f"user_{uuid.uuid4()}@example.com", first_name="Cart")
+    user_repo.save_user(user)
+    items = [Item(name=f"Cart Item {uuid.uuid4()}", quantity=10) for _ in range(2)]
+    for item in items:
+        item_repo.save_item(item)
+
+    first_line = CartItem(user_id=user.id, item_id=items[0].id, quantity=1)
+    assert user_repo.add_cart_item(first_line)
+    assert user_repo.add_cart_item(
+        CartItem(user_id=user.id, item_id=items[1].id, quantity=2)
+    )
+    assert not user_repo.add_cart_item(first_line)
+
+    assert user_repo.update_cart_item_quantity(user.id, items[0].id, 4)
+    assert not user_repo.update_cart_item_quantity(user.id, uuid.uuid4(), 5)
+    # A compare-and-set against a quantity the line no longer holds fails
+    assert not user_repo.update_cart_item_quantity(user.id, items[0].id, 6, expected=1)
+    assert user_repo.update_cart_item_quantity(user.id, items[0].id, 5, expected=4)
+    assert user_repo.remove_cart_item(user.id, items[1].id)
+    assert not user_repo.remove_cart_item(user.id, items[1].id)
+
+    assert user_repo.find_cart_items_for_user_id(user.id) == [
+        CartItem(user_id=user.id, item_id=items[0].id, quantity=5)
+    ]
+
+
 @pytest.mark.parametrize("params", test_parameters())
 def test_update_user(request, params):
     """Test updating user information with both repository implementations."""
@@ -147,4 +187,117 @@ def test_update_user(request, params):
 
     assert updated_user.first_name == "Updated"
     assert updated_user.shipping_address == "Updated Address"
-    assert updated_user.email == unique_email
\ No newline at end of file
+    assert updated_user.email == unique_email
+
+
+@pytest.mark.parametrize("params", test_parameters())
+def test_insert_users_skips_conflicts(request, params):
+    """Test bulk inserting users with both repository implementations."""
+    repo = request.getfixturevalue(params["repo_fixture"])
+    request.getfixturevalue(params["use_fixture"])
+
+    prefix = str(uuid.uuid4())[:8]
+    existing = User(email=f"{prefix}_existing@example.com", first_name="Existing")
+    repo.save_user(existing)
+
+    new_users = [
+        User(email=f"{prefix}_1@example.com", first_name="One", hashed_password="h1"),
+        User(email=f"{prefix}_existing@example.com", first_name="Duplicate"),
+        User(email=f"{prefix}_2@example.com", first_name="Two", hashed_password="h2"),
+    ]
+    inserted = repo.insert_users(new_users)
+
+    assert [user.id for user in inserted] == [new_users[0].id, new_users[2].id]
+    assert repo.find_user_by_email(f"{prefix}_2@example.com").id == new_users[2].id
+    assert repo.find_user_by_id(new_users[0].id).hashed_password == "h1"
+    assert repo.find_user_by_email(f"{prefix}_existing@example.com").first_name == (
+        "Existing"
+    )
+
+
+@pytest.mark.parametrize("params", test_parameters())
+def test_save_user_rejects_duplicate_email(request, params):
+    """Test that saving a user with a taken email raises a domain error."""
+    repo = request.getfixturevalue(params["repo_fixture"])
+    request.getfixturevalue(params["use_fixture"])
+
+    email = f"user_{uuid.uuid4()}@example.com"
+    repo.save_user(User(email=email, first_name="First"))
+
+    with pytest.raises(DuplicateEmailError):
+        repo.save_user(User(email=email, first_name="Second"))
+
+
+@pytest.mark.parametrize("params", test_parameters())
+def test_find_user_shapes(request, params):
+    """Test loading a user with and without its cart, and checking existence."""
+    user_repo = request.getfixturevalue(params["repo_fixture"])
+    request.getfixturevalue(params["use_fixture"])
+
+    if params["name"] == "SQL":
+        item_repo = request.getfixturevalue("sql_item_repo")
+    else:
+        item_repo = request.getfixturevalue("memory_item_repo")
+
+    item = item_repo.save_item(Item(name=f"Shape Item {uuid.uuid4()}", quantity=1))
+    user = User(email=f"user_{uuid.uuid4()}@example.com", first_name="Shape")
+    user_repo.save_user(user)
+    user_repo.add_cart_item(CartItem(user_id=user.id, item_id=item.id, quantity=1))
+
+    profile = user_repo.find_user_by_email(user.email, UserShape.PROFILE)
+    assert profile.first_name == "Shape"
+    assert profile.cart_items == []
+
+    full = user_repo.find_user_by_id(user.id, UserShape.WITH_CART)
+    assert [line.item_id for line in full.cart_items] == [item.id]
+
+    assert user_repo.user_exists(user.id)
+    assert not user_repo.user_exists(uuid.uuid4())
+    assert user_repo.find_user_by_id(uuid.uuid4(), UserShape.PROFILE) is None
+
+
+def test_sql_user_reads_issue_bounded_queries(db_session, sql_user_repo):
+    """Test that the cart is loaded eagerly and profiles skip it entirely."""
+    user = User(email=f"user_{uuid.uuid4()}@example.com", first_name="Count")
+    sql_user_repo.save_user(user)
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    connection = db_session.connection()
+    event.listen(connection, "before_cursor_execute", count)
+    try:
+        sql_user_repo.user_exists(user.id)
+        assert len(statements) == 1
+
+        sql_user_repo.find_user_by_id(user.id, UserShape.PROFILE)
+        assert len(statements) == 2
+        assert "cart_items" not in statements[-1]
+
+        sql_user_repo.find_user_by_id(user.id).cart_items
+        assert len(statements) == 4
+    finally:
+        event.remove(connection, "before_cursor_execute", count)
+
+
+@pytest.mark.parametrize("params", test_parameters())
+def test_find_cart_lines_for_user_id(request, params):
+    """Test that cart lines come back with the name and price of their items."""
+    user_repo = request.getfixturevalue(params["repo_fixture"])
+    request.getfixturevalue(params["use_fixture"])
+
+    if params["name"] == "SQL":
+        item_repo = request.getfixturevalue("sql_item_repo")
+    else:
+        item_repo = request.getfixturevalue("memory_item_repo")
+
+    user = User(email=f"user_{uuid.uuid4()}@example.com", first_name="Lines")
+    user_repo.save_user(user)
+    lamp = item_repo.save_item(Item(name=f"Lamp {uuid.uuid4()}", price=2.5, quantity=9))
+    user_repo.add_cart_item(CartItem(user_id=user.id, item_id=lamp.id, quantity=3))
+
+    assert user_repo.find_cart_lines_for_user_id(user.id) == [
+        CartLine(item_id=lamp.id, quantity=3, name=lamp.name, price=2.5)
+    ]
+    assert user_repo.find_cart_lines_for_user_id(uuid.uuid4()) == []
@@ -0,0 +1,30 @@
+import uuid
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from be_task_ca.commands import create_db_schema
+from be_task_ca.infrastructure.database.repositories.item_repository import (
+    SQLItemRepository,
+)
+
+
+def test_create_db_schema_adds_item_versions_to_an_old_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE items (id CHAR(32) PRIMARY KEY, name VARCHAR UNIQUE, "
+            "description VARCHAR, price FLOAT, quantity INTEGER)"
+        )
+        connection.execute(
+            text("INSERT INTO items VALUES (:id, 'Lamp', NULL, 1.0, 3)"),
+            {"id": uuid.uuid4().hex},
+        )
+
+    create_db_schema(engine)
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("items")}
+    assert "ix_items_version" in indexes
+    with Session(engine) as session:
+        assert SQLItemRepository(session).get_catalog_version() == 1
+    engine.dispose()